@@ -1,9 +1,11 @@
 import threading
 import os
 import sys
+import json
+import time
 import logging
 from functools import wraps
-from flask import Flask, send_from_directory, jsonify, session, request, redirect, url_for, render_template_string
+from flask import Flask, Response, send_from_directory, jsonify, session, request, redirect, url_for, render_template_string
 from waitress import serve
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -12,7 +14,9 @@ from flask_talisman import Talisman
 # Add Flask to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from strategy_lab.runner import main as run_bot
+from strategy_lab import telemetry, live_feed
+from strategy_lab.state_channel import StateReader, default_path
+from strategy_lab.supervisor import BotSupervisor
 
 app = Flask(__name__, static_folder='.')
 
@@ -70,23 +74,49 @@ def api_stats():
         logger.error(f"API Error: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
-from trading_architect import AlphaVantageEngine
+from strategy_lab.history_helper import get_backtest_history, get_backtest_stats
+
+@app.route('/api/backtest')
+@login_required
+def api_backtest():
+    """History Lab data, served from the backtest result cache (no query unless a backtest wrote)"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+        return jsonify({
+            "status": "success",
+            "history": get_backtest_history(limit=limit),
+            "stats": get_backtest_stats()
+        })
+    except Exception as e:
+        logger.error(f"API Error: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+_scan_engine = None
+_scan_engine_lock = threading.Lock()
+
+def scan_engine():
+    """One engine per process, so its forecast cache (and quota) outlives the request. Built on first scan."""
+    global _scan_engine
+    with _scan_engine_lock:
+        if _scan_engine is None:
+            from trading_architect import AlphaVantageEngine  # Pulls in requests; only needed here
+            # We need an API Key. Ideally from env var, defaulting for safety.
+            api_key = os.environ.get("ALPHA_VANTAGE_KEY", "POPZN5W6J3DCL2WE")
+            _scan_engine = AlphaVantageEngine(api_key=api_key)
+        return _scan_engine
 
 @app.route('/api/scan')
 @login_required
 def api_scan():
     """Run a market scan for a specific list of tickers."""
+    from strategy_lab.data.request_scheduler import HIGH
     try:
         # In a real app, this list might come from a DB or config
         watchlist = ["AMD", "NVDA", "SPY", "QQQ", "TSLA"]
         results = []
         
-        # We need an API Key. Ideally from env var, defaulting for safety.
-        api_key = os.environ.get("ALPHA_VANTAGE_KEY", "POPZN5W6J3DCL2WE")
-        engine = AlphaVantageEngine(api_key=api_key)
-        
-        for symbol in watchlist:
-            forecast = engine.get_consensus_forecast(symbol)
+        # Cached forecasts come back immediately; misses are fetched together at HIGH priority
+        for forecast in scan_engine().get_consensus_forecasts(watchlist, priority=HIGH):
             if forecast['decision'] == 'BUY':
                 results.append(forecast)
                 
@@ -104,8 +134,8 @@ def api_scan():
 def api_analysis_losses():
     """Return details of recent losing trades for AI analysis."""
     try:
-        import sqlite3
-        conn = sqlite3.connect('data_lake.db')
+        from strategy_lab import storage
+        conn = storage.get_connection('data_lake.db')
         c = conn.cursor()
         
         # Fetch last 5 losing trades with strategy info
@@ -123,8 +153,6 @@ def api_analysis_losses():
         
         for row in c.fetchall():
             losses.append(dict(zip(columns, row)))
-            
-        conn.close()
         
         return jsonify({
             "status": "success",
@@ -137,6 +165,29 @@ def api_analysis_losses():
 
 # --- ROUTES ---
 
+@app.route('/api/stream')
+@login_required
+@limiter.exempt
+def api_stream():
+    """Server-sent events: full snapshot on connect, then one delta per bot cycle"""
+    stream = live_feed.FEED.stream(last_event_id=request.headers.get('Last-Event-ID'))
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Don't let a reverse proxy buffer the stream
+    })
+
+@app.route('/api/state')
+@login_required
+def api_state():
+    """Latest cycle state. In process mode these are the bot's bytes from the state channel, served as-is."""
+    if BOT_MODE == "process":
+        _, data = STATE_READER.read()
+    else:
+        data = live_feed.FEED.state_json() if live_feed.FEED.seq else None
+    if not data:
+        return jsonify({"status": "pending", "message": "No cycle has completed yet"}), 503
+    return Response(data, mimetype='application/json')
+
 @app.route('/login', methods=['GET', 'POST'])
 @limiter.limit("5 per minute")  # Prevent brute force
 def login():
@@ -175,10 +226,40 @@ def send_static(path):
 
 @app.route('/health')
 def health():
-    return jsonify({"status": "healthy", "service": "strategy-lab"})
+    body = {"status": "healthy", "service": "strategy-lab", "bot_mode": BOT_MODE}
+    if BOT_MODE == "process":
+        status = STATE_READER.status()
+        body["bot"] = {
+            "pid": status["pid"],
+            "heartbeat_age_secs": round(time.time() - status["heartbeat"], 1),
+            "cycle_running": bool(status["busy_since"]),
+        } if status else None
+    return jsonify(body)
+
+@app.route('/metrics')
+@limiter.exempt
+def metrics():
+    """Prometheus scrape target, rendered from memory (no DB hits).
+    In process mode: the bot's metrics (from its channel) + this web process's own under strategy_lab_web_."""
+    if BOT_MODE == "process":
+        _, bot_metrics = METRICS_READER.read()
+        text = (bot_metrics or b"").decode("utf-8") + telemetry.render_prometheus(prefix="strategy_lab_web_")
+    else:
+        text = telemetry.render_prometheus()
+    return Response(text, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+# --- BOT ---
+# thread (default): in-process bot thread
+# process: supervised child process with its own GIL; state arrives over a memory-mapped channel.
+#          The child dies with this process and is not started while another bot is live.
+# off: web only
+BOT_MODE = os.environ.get("BOT_MODE", "thread").lower()
+STATE_READER = StateReader(default_path("state"))
+METRICS_READER = StateReader(default_path("metrics"))
 
 def start_bot_thread():
     """Run the bot in a background thread"""
+    from strategy_lab.runner import main as run_bot
     logger.info("🚀 Starting Strategy Lab Bot in Background Thread...")
     
     # Simulate command line arguments for the bot
@@ -189,14 +270,37 @@ def start_bot_thread():
     except Exception as e:
         logger.error(f"❌ Bot crashed: {e}")
 
-# Start the bot thread immediately on import
-if not any(t.name == "BotThread" for t in threading.enumerate()):
+def bridge_state_channel(interval: float = 0.5):
+    """Feeds the bot process's cycle state into the SSE live feed (one decode per published cycle)."""
+    reader = StateReader(STATE_READER.path)
+    last_seq = 0
+    while True:
+        try:
+            seq, data = reader.read()
+            if data and seq != last_seq:
+                last_seq = seq
+                live_feed.FEED.publish(json.loads(data))
+        except Exception as e:
+            logger.error(f"⚠️ State bridge error: {e}")
+        time.sleep(interval)
+
+# Start the bot immediately on import
+running = {t.name for t in threading.enumerate()}
+if BOT_MODE == "process" and "BotSupervisor" not in running:
+    BotSupervisor(["--live", "--auto-trade"], STATE_READER.path, METRICS_READER.path).start()
+    threading.Thread(target=bridge_state_channel, name="StateBridge", daemon=True).start()
+    logger.info("✅ Bot process supervisor started")
+elif BOT_MODE == "thread" and "BotThread" not in running:
     t = threading.Thread(target=start_bot_thread, name="BotThread")
     t.daemon = True
     t.start()
     logger.info("✅ Bot thread started")
+elif BOT_MODE == "off":
+    logger.info("⏸️  BOT_MODE=off: bot not started")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
     logger.info(f"🔌 Starting Waitress Server on 0.0.0.0:{port}...")
-    serve(app, host='0.0.0.0', port=port)
+    # Each open /api/stream holds a worker thread, so leave headroom for regular requests
+    threads = int(os.environ.get("WAITRESS_THREADS", 32))
+    serve(app, host='0.0.0.0', port=port, threads=threads)
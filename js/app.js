@@ -80,55 +80,118 @@ const app = createApp({
 
         // --- Data Loader ---
         const loadStrategyData = () => {
-            if (window.STRATEGY_DATA) {
-                const data = window.STRATEGY_DATA;
-
-                // 1. Update Consultant (The Verdict)
-                bestBet.value = data.best_bet;
-                currentVerdict.value = data.judge_verdict || "Waiting for Judge...";
+            if (window.STRATEGY_DATA) applyState(window.STRATEGY_DATA);
+        };
 
-                // 2. Update Brain Logs
-                brainLogs.value = generateLogs(currentVerdict.value, bestBet.value);
+        const applyState = (data) => {
+            // 1. Update Consultant (The Verdict)
+            bestBet.value = data.best_bet;
+            currentVerdict.value = data.judge_verdict || "Waiting for Judge...";
 
-                // 3. Update Portfolio
-                if (data.portfolio) {
-                    portfolio.value = data.portfolio || { total_pnl: 0, win_rate: 0, total_trades: 0, open_trades: [], history: [] };
-                    backtestHistory.value = data.backtest_history || [];
-                    backtestStats.value = data.backtest_stats || { total_decisions: 0, strategies: [], regimes: {} };
-                }
+            // 2. Update Brain Logs
+            brainLogs.value = generateLogs(currentVerdict.value, bestBet.value);
 
-                // 4. Update Market Stats (Real Data)
-                if (data.market_stats) {
-                    price.value = data.market_stats.price;
-                    change.value = data.market_stats.change_pct;
-                    dayHigh.value = data.market_stats.day_high;
-                    dayLow.value = data.market_stats.day_low;
-                    volume.value = data.market_stats.volume;
-                    panicLevel.value = translateIV(data.market_stats.panic_score);
-                }
+            // 3. Update Portfolio
+            if (data.portfolio) {
+                portfolio.value = data.portfolio || { total_pnl: 0, win_rate: 0, total_trades: 0, open_trades: [], history: [] };
+            }
+            // Inline history: older single-file exports and the live stream state
+            if (data.backtest_history) loadHistoryData(data);
+
+            // 4. Update Market Stats (Real Data)
+            if (data.market_stats) {
+                price.value = data.market_stats.price;
+                change.value = data.market_stats.change_pct;
+                dayHigh.value = data.market_stats.day_high;
+                dayLow.value = data.market_stats.day_low;
+                volume.value = data.market_stats.volume;
+                panicLevel.value = translateIV(data.market_stats.panic_score);
             }
         };
 
+        const loadHistoryData = (data) => {
+            backtestHistory.value = data.backtest_history || [];
+            backtestStats.value = data.backtest_stats || { total_decisions: 0, strategies: [], regimes: {} };
+        };
+
         // --- Hot Reload Logic ---
-        const refreshStrategyData = () => {
-            const oldScript = document.getElementById('strategy-data-script');
+        // The exporter writes one file per section plus a manifest of content hashes;
+        // we poll the (tiny) manifest and only reload the sections whose hash moved.
+        const SECTION_LOADERS = {
+            fast: { id: 'strategy-data-script', onload: loadStrategyData },
+            slow: { id: 'strategy-history-script', onload: () => window.STRATEGY_HISTORY && loadHistoryData(window.STRATEGY_HISTORY) },
+        };
+        const loadedHashes = {};
+
+        const loadSection = (section, file, version) => {
+            const loader = SECTION_LOADERS[section];
+            if (!loader) return;
+            const oldScript = document.getElementById(loader.id);
             if (oldScript) oldScript.remove();
 
             const script = document.createElement('script');
-            script.id = 'strategy-data-script';
-            script.src = 'js/strategy_data.js?t=' + Date.now();
-            script.onload = loadStrategyData;
+            script.id = loader.id;
+            script.src = `js/${file}?v=${version}`;
+            script.onload = loader.onload;
             document.body.appendChild(script);
         };
 
-        onMounted(() => {
-            // Initial Connect
+        const refreshStrategyData = async () => {
+            try {
+                const res = await fetch('js/strategy_manifest.json?t=' + Date.now(), { cache: 'no-store' });
+                if (!res.ok) throw new Error(res.status);
+                const manifest = await res.json();
+                Object.entries(manifest.sections || {}).forEach(([section, meta]) => {
+                    if (loadedHashes[section] === meta.hash) return;
+                    loadedHashes[section] = meta.hash;
+                    loadSection(section, meta.file, meta.hash);
+                });
+            } catch (e) {
+                // No manifest yet (bot hasn't exported): fall back to the single data file
+                loadSection('fast', 'strategy_data.js', Date.now());
+            }
+        };
+
+        const startPolling = () => {
             refreshStrategyData();
 
-            // Poll every 5s
+            // Poll the manifest every 5s
             setInterval(() => {
                 refreshStrategyData();
             }, 5000);
+        };
+
+        // --- Live Stream (SSE) ---
+        // One snapshot on connect, then a delta of the changed sections per bot cycle.
+        // Falls back to manifest polling if the stream is unavailable (static hosting, auth).
+        const liveState = {};
+        const startStream = () => {
+            if (!window.EventSource) return startPolling();
+
+            let connected = false;
+            const source = new EventSource('/api/stream');
+            const apply = (replace) => (event) => {
+                connected = true;
+                const data = JSON.parse(event.data);
+                if (replace) Object.keys(liveState).forEach((k) => delete liveState[k]);
+                Object.assign(liveState, data);
+                applyState(liveState);
+            };
+            source.addEventListener('snapshot', apply(true));
+            source.addEventListener('delta', apply(false));
+            source.onerror = () => {
+                // Transient drops reconnect on their own (with Last-Event-ID); never connected = no stream here
+                if (!connected) {
+                    source.close();
+                    startPolling();
+                }
+            };
+        };
+
+        onMounted(() => {
+            // Initial Connect (the static <script> already ran once)
+            loadStrategyData();
+            startStream();
         });
 
         return {
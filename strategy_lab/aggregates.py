@@ -0,0 +1,201 @@
+"""
+Running Aggregates
+Per-strategy, per-regime and global totals kept up to date in the same
+transaction that closes a trade or stores a backtest decision, so stats
+reads cost O(#strategies) instead of a scan over all history.
+
+Verify / rebuild:
+    python -m strategy_lab.aggregates [--db data_lake.db] [--rebuild]
+"""
+import argparse
+import sqlite3
+import sys
+from typing import Dict, List, Optional
+
+from strategy_lab import storage
+
+GLOBAL = ""  # key of the single global row in each table
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS trade_stats (
+        scope TEXT NOT NULL,        -- 'global' | 'strategy'
+        key TEXT NOT NULL,
+        trades INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        total_pnl REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, key)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS backtest_stats (
+        scope TEXT NOT NULL,        -- 'global' | 'strategy' | 'regime'
+        key TEXT NOT NULL,
+        decisions INTEGER NOT NULL DEFAULT 0,
+        outcome_sum REAL NOT NULL DEFAULT 0,
+        outcome_count INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, key)
+    ) WITHOUT ROWID
+    ''',
+)
+
+
+# --- WRITE PATH (call inside the caller's transaction) ---
+
+def record_trade_close(conn: sqlite3.Connection, strategy_id: Optional[str], pnl: Optional[float]):
+    pnl = pnl or 0.0
+    win = 1 if pnl > 0 else 0
+    for scope, key in (("global", GLOBAL), ("strategy", strategy_id or GLOBAL)):
+        conn.execute('''
+            INSERT INTO trade_stats (scope, key, trades, wins, total_pnl) VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(scope, key) DO UPDATE SET
+                trades = trades + 1, wins = wins + excluded.wins, total_pnl = total_pnl + excluded.total_pnl
+        ''', (scope, key, win, pnl))
+
+
+def record_decision(conn: sqlite3.Connection, recommended_strategy: Optional[str],
+                    outcome_7d: Optional[float], market_regime: Optional[str]):
+    has_outcome = 1 if outcome_7d is not None else 0
+    win = 1 if outcome_7d is not None and outcome_7d > 0 else 0
+    rows = [("global", GLOBAL), ("regime", market_regime or GLOBAL)]
+    if recommended_strategy is not None:
+        rows.append(("strategy", recommended_strategy))
+    for scope, key in rows:
+        conn.execute('''
+            INSERT INTO backtest_stats (scope, key, decisions, outcome_sum, outcome_count, wins) VALUES (?, ?, 1, ?, ?, ?)
+            ON CONFLICT(scope, key) DO UPDATE SET
+                decisions = decisions + 1,
+                outcome_sum = outcome_sum + excluded.outcome_sum,
+                outcome_count = outcome_count + excluded.outcome_count,
+                wins = wins + excluded.wins
+        ''', (scope, key, outcome_7d or 0.0, has_outcome, win))
+
+
+# --- READ PATH ---
+
+def get_trade_summary(db_path: str = storage.DEFAULT_DB_PATH) -> Dict:
+    """Global closed-trade totals: {'trades', 'wins', 'total_pnl'}"""
+    row = storage.get_connection(db_path).execute(
+        "SELECT trades, wins, total_pnl FROM trade_stats WHERE scope = 'global' AND key = ''").fetchone()
+    trades, wins, total_pnl = row if row else (0, 0, 0.0)
+    return {"trades": trades, "wins": wins, "total_pnl": total_pnl}
+
+
+def get_strategy_rows(db_path: str = storage.DEFAULT_DB_PATH) -> List[tuple]:
+    """(strategy_id, trades, wins, avg_pnl, total_pnl) per strategy."""
+    return storage.get_connection(db_path).execute('''
+        SELECT key, trades, wins, total_pnl / trades, total_pnl
+        FROM trade_stats WHERE scope = 'strategy' AND trades > 0
+    ''').fetchall()
+
+
+def get_backtest_summary(db_path: str = storage.DEFAULT_DB_PATH) -> Dict:
+    """Same shape as history_helper.get_backtest_stats(), read from the running totals."""
+    conn = storage.get_connection(db_path)
+    row = conn.execute("SELECT decisions FROM backtest_stats WHERE scope = 'global' AND key = ''").fetchone()
+    stats = {"total_decisions": row[0] if row else 0, "strategies": [], "regimes": {}}
+
+    for name, count, avg_outcome, win_rate in conn.execute('''
+        SELECT key, decisions,
+               ROUND(CASE WHEN outcome_count > 0 THEN outcome_sum / outcome_count END, 2),
+               ROUND(wins * 100.0 / decisions, 1) AS win_rate
+        FROM backtest_stats WHERE scope = 'strategy'
+        ORDER BY win_rate DESC
+    '''):
+        stats["strategies"].append({"name": name, "count": count, "avg_outcome": avg_outcome, "win_rate": win_rate})
+
+    for regime, days in conn.execute("SELECT key, decisions FROM backtest_stats WHERE scope = 'regime'"):
+        stats["regimes"][regime or None] = days
+    return stats
+
+
+# --- FULL RECOMPUTE ---
+
+def _recompute(conn: sqlite3.Connection) -> Dict[str, Dict[tuple, tuple]]:
+    """Aggregates computed from scratch over the base tables (the slow way)."""
+    trade = {}
+    row = conn.execute("SELECT COUNT(*), SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END), TOTAL(pnl) FROM trades WHERE status = 'CLOSED'").fetchone()
+    if row[0]:
+        trade[("global", GLOBAL)] = (row[0], row[1], row[2])
+    for key, n, wins, total in conn.execute('''
+        SELECT COALESCE(strategy_id, ''), COUNT(*), SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END), TOTAL(pnl)
+        FROM trades WHERE status = 'CLOSED' GROUP BY 1
+    '''):
+        trade[("strategy", key)] = (n, wins, total)
+
+    backtest = {}
+    groups = (
+        ("global", "''", ""),
+        ("regime", "COALESCE(market_regime, '')", ""),
+        ("strategy", "recommended_strategy", "WHERE recommended_strategy IS NOT NULL"),
+    )
+    for scope, key_expr, where in groups:
+        for key, n, total, n_outcome, wins in conn.execute(f'''
+            SELECT {key_expr}, COUNT(*), TOTAL(outcome_7d), COUNT(outcome_7d),
+                   SUM(CASE WHEN outcome_7d > 0 THEN 1 ELSE 0 END)
+            FROM backtest_history {where} GROUP BY 1
+        '''):
+            if n:
+                backtest[(scope, key)] = (n, total, n_outcome, wins)
+    return {"trade_stats": trade, "backtest_stats": backtest}
+
+
+def rebuild_in_transaction(conn: sqlite3.Connection):
+    """Replaces the aggregate tables with a full recompute (caller owns the transaction)."""
+    fresh = _recompute(conn)
+    conn.execute("DELETE FROM trade_stats")
+    conn.execute("DELETE FROM backtest_stats")
+    conn.executemany("INSERT INTO trade_stats (scope, key, trades, wins, total_pnl) VALUES (?, ?, ?, ?, ?)",
+                     [k + v for k, v in fresh["trade_stats"].items()])
+    conn.executemany("INSERT INTO backtest_stats (scope, key, decisions, outcome_sum, outcome_count, wins) VALUES (?, ?, ?, ?, ?, ?)",
+                     [k + v for k, v in fresh["backtest_stats"].items()])
+
+
+def rebuild(db_path: str = storage.DEFAULT_DB_PATH):
+    with storage.transaction(db_path) as conn:
+        rebuild_in_transaction(conn)
+
+
+def verify(db_path: str = storage.DEFAULT_DB_PATH, tolerance: float = 1e-6) -> List[str]:
+    """Compares the running totals against a full recompute. Returns a list of mismatches."""
+    conn = storage.get_connection(db_path)
+    fresh = _recompute(conn)
+    stored = {
+        "trade_stats": {(r[0], r[1]): tuple(r[2:]) for r in conn.execute(
+            "SELECT scope, key, trades, wins, total_pnl FROM trade_stats WHERE trades > 0")},
+        "backtest_stats": {(r[0], r[1]): tuple(r[2:]) for r in conn.execute(
+            "SELECT scope, key, decisions, outcome_sum, outcome_count, wins FROM backtest_stats WHERE decisions > 0")},
+    }
+
+    problems = []
+    for table in ("trade_stats", "backtest_stats"):
+        for key in sorted(set(fresh[table]) | set(stored[table])):
+            expected, actual = fresh[table].get(key), stored[table].get(key)
+            if expected is None or actual is None or any(
+                abs((a or 0) - (e or 0)) > tolerance * max(1.0, abs(e or 0)) for a, e in zip(actual, expected)
+            ):
+                problems.append(f"{table}{key}: stored={actual} recomputed={expected}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify (and optionally rebuild) running aggregates")
+    parser.add_argument("--db", default=storage.DEFAULT_DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Recompute aggregates from the base tables")
+    args = parser.parse_args()
+
+    from strategy_lab import migrations
+    migrations.migrate(args.db)
+
+    if args.rebuild:
+        rebuild(args.db)
+        print("🔁 Aggregates rebuilt from trades + backtest_history")
+
+    problems = verify(args.db)
+    if problems:
+        print(f"❌ {len(problems)} aggregate mismatches:")
+        for p in problems:
+            print(f"  {p}")
+        sys.exit(1)
+    print("✅ Aggregates match a full recompute")
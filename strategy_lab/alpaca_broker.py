@@ -2,10 +2,16 @@
 Alpaca Broker Interface
 Handles order execution and position monitoring
 """
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+from strategy_lab.broker_state import LocalTradeStream
+from strategy_lab.config import FLATTEN_SETTINGS
+
 # Load environment variables
 load_dotenv()
 
@@ -19,8 +25,75 @@ except ImportError:
     print("⚠️  Alpaca SDK not installed. Run: pip install alpaca-py")
 
 
+def flatten_positions(symbols: Iterable[str], close_one: Callable[[str], bool],
+                      bulk_close: Optional[Callable[[], Dict[str, bool]]] = None,
+                      settings: Optional[Dict] = None, sleep: Callable[[float], None] = time.sleep) -> Dict:
+    """
+    Emergency flatten. `bulk_close()` (one request for everything) goes first when given and
+    returns {symbol: closed}; whatever it didn't close, or everything if it raised, is closed
+    with `close_one(symbol)` fanned out over a thread pool, each retried with capped
+    exponential backoff.
+    Returns {"closed", "failed", "timings" (symbol -> secs to flat), "attempts", "bulk", "elapsed"}
+    """
+    settings = {**FLATTEN_SETTINGS, **(settings or {})}
+    started = time.perf_counter()
+    report = {"closed": [], "failed": [], "timings": {}, "attempts": {}, "bulk": False, "elapsed": 0.0}
+    remaining = list(dict.fromkeys(symbols))
+
+    if bulk_close:
+        try:
+            results = bulk_close()
+            report["bulk"] = True
+            done = time.perf_counter() - started
+            for symbol, ok in results.items():
+                if ok:
+                    report["closed"].append(symbol)
+                    report["timings"][symbol] = done
+                    report["attempts"][symbol] = 1
+            remaining = [s for s in dict.fromkeys(remaining + list(results)) if not results.get(s)]
+        except Exception as e:
+            print(f"⚠️  Bulk close failed, closing one by one: {e}")
+
+    def close_with_retry(symbol: str) -> int:
+        for attempt in range(1, settings["max_attempts"] + 1):
+            if close_one(symbol):
+                return attempt
+            if attempt < settings["max_attempts"]:
+                sleep(min(settings["max_backoff_secs"], settings["backoff_secs"] * 2 ** (attempt - 1)))
+        return 0
+
+    if remaining:
+        with ThreadPoolExecutor(max_workers=min(settings["workers"], len(remaining)),
+                                thread_name_prefix="Flatten") as pool:
+            futures = {pool.submit(close_with_retry, symbol): symbol for symbol in remaining}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                attempts = future.result()
+                report["timings"][symbol] = time.perf_counter() - started
+                report["attempts"][symbol] = attempts or settings["max_attempts"]
+                (report["closed"] if attempts else report["failed"]).append(symbol)
+
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+
+def print_flatten_report(report: Dict):
+    print(f"\n⏱️  Flatten: {len(report['closed'])} closed, {len(report['failed'])} failed "
+          f"in {report['elapsed'] * 1000:.0f}ms{' (bulk)' if report['bulk'] else ''}")
+    for symbol, secs in sorted(report["timings"].items(), key=lambda kv: kv[1]):
+        status = "❌" if symbol in report["failed"] else "✅"
+        print(f"   {status} {symbol:<8}{secs * 1000:>8.0f}ms  attempts={report['attempts'][symbol]}")
+
+
 class AlpacaBroker:
-    def __init__(self, paper_trading=True):
+    def __init__(self, paper_trading=True, client=None):
+        self.paper_trading = paper_trading
+        self.last_flatten: Optional[Dict] = None
+        if client is not None:  # Injected (tests / benchmarks): no SDK or credentials needed
+            self.client = client
+            self._credentials = None
+            return
+        
         if not ALPACA_AVAILABLE:
             raise ImportError("Alpaca SDK not available. Install with: pip install alpaca-py")
         
@@ -33,7 +106,7 @@ class AlpacaBroker:
         
         # Initialize trading client
         self.client = TradingClient(api_key, secret_key, paper=paper_trading)
-        self.paper_trading = paper_trading
+        self._credentials = (api_key, secret_key)
         
         print(f"✅ Alpaca {'Paper' if paper_trading else 'LIVE'} Trading Connected")
     
@@ -67,6 +140,21 @@ class AlpacaBroker:
             print(f"❌ Error fetching positions: {e}")
             return []
     
+    def trade_stream(self, handler: Callable[[Dict], None]) -> Callable[[], None]:
+        """
+        Subscribe `handler` to the trade-updates websocket (runs in its own thread).
+        Events are passed as plain dicts (see trade_update_dict). Returns a stop function.
+        """
+        from alpaca.trading.stream import TradingStream  # websockets: only loaded when streaming
+        stream = TradingStream(*self._credentials, paper=self.paper_trading)
+
+        async def on_update(update):
+            handler(trade_update_dict(update))
+
+        stream.subscribe_trade_updates(on_update)
+        threading.Thread(target=stream.run, name="AlpacaTradeStream", daemon=True).start()
+        return stream.stop
+
     def submit_market_order(self, symbol: str, qty: int, side: str) -> Optional[str]:
         """
         Submit a market order
@@ -100,20 +188,46 @@ class AlpacaBroker:
             print(f"❌ Failed to close {symbol}: {e}")
             return False
     
-    def close_all_positions(self) -> int:
-        """Emergency: Close all open positions"""
+    def _bulk_close(self) -> Dict[str, bool]:
+        """DELETE /positions (also cancels open orders): one request, per-symbol statuses back."""
+        responses = self.client.close_all_positions(cancel_orders=True)
+        return {r.symbol: 200 <= int(r.status) < 300 for r in responses}
+    
+    def close_all_positions(self, use_bulk: Optional[bool] = None) -> int:
+        """
+        Emergency: Close all open positions
+        Bulk endpoint first, then concurrent per-symbol closes (with retries) for anything left.
+        The full report (per-symbol timings) is kept in self.last_flatten.
+        """
         try:
-            positions = self.get_open_positions()
-            count = 0
-            for pos in positions:
-                if self.close_position(pos["symbol"]):
-                    count += 1
-            print(f"✅ Closed {count}/{len(positions)} positions")
-            return count
+            use_bulk = FLATTEN_SETTINGS["use_bulk"] if use_bulk is None else use_bulk
+            # The bulk call needs no position list; the fallback does
+            symbols = [] if use_bulk else [p["symbol"] for p in self.get_open_positions()]
+            report = flatten_positions(symbols, self.close_position,
+                                       bulk_close=self._bulk_close if use_bulk else None)
+            if use_bulk and not report["bulk"]:
+                report = flatten_positions([p["symbol"] for p in self.get_open_positions()], self.close_position)
+            self.last_flatten = report
+            print_flatten_report(report)
+            return len(report["closed"])
         except Exception as e:
             print(f"❌ Error closing all positions: {e}")
             return 0
 
+def trade_update_dict(update) -> Dict:
+    """Alpaca TradeUpdate -> {"event", "order_id", "symbol", "side", "qty", "price", "position_qty"}"""
+    event = getattr(update.event, "value", update.event)
+    side = getattr(update.order.side, "value", update.order.side)
+    return {
+        "event": str(event),
+        "order_id": str(update.order.id),
+        "symbol": update.order.symbol,
+        "side": str(side).upper(),
+        "qty": float(update.qty) if update.qty is not None else 0.0,
+        "price": float(update.price) if update.price is not None else None,
+        "position_qty": float(update.position_qty) if update.position_qty is not None else None,
+    }
+
 
 # Dry-run version for testing (doesn't actually submit orders)
 class DryRunBroker:
@@ -128,6 +242,7 @@ class DryRunBroker:
             "equity": 100000.0
         }
         self.mock_positions = []
+        self.stream = LocalTradeStream()  # Same fill events the Alpaca websocket would send
         print("✅ Dry-Run Mode Active (orders will be logged, not executed)")
     
     def get_account(self) -> Dict:
@@ -136,9 +251,23 @@ class DryRunBroker:
     def get_open_positions(self) -> List[Dict]:
         return self.mock_positions
     
+    def trade_stream(self, handler: Callable[[Dict], None]) -> Callable[[], None]:
+        return self.stream.subscribe(handler)
+    
     def submit_market_order(self, symbol: str, qty: int, side: str) -> Optional[str]:
         order_id = f"DRY-RUN-{len(self.mock_positions)+1}"
         print(f"🔷 DRY-RUN ORDER: {side} {qty} {symbol} (ID: {order_id})")
+        signed = qty if side.upper() == "BUY" else -qty
+        position = next((p for p in self.mock_positions if p["symbol"] == symbol), None)
+        if position is None:
+            position = {"symbol": symbol, "qty": 0, "avg_entry_price": 0.0, "current_price": 0.0,
+                        "unrealized_pl": 0.0, "unrealized_plpc": 0.0}
+            self.mock_positions = self.mock_positions + [position]
+        position["qty"] += signed
+        if position["qty"] == 0:
+            self.mock_positions = [p for p in self.mock_positions if p["symbol"] != symbol]
+        self.stream.publish({"event": "fill", "order_id": order_id, "symbol": symbol, "side": side.upper(), "qty": float(qty),
+                             "price": None, "position_qty": float(position["qty"])})
         return order_id
     
     def close_position(self, symbol: str) -> bool:
@@ -7,7 +7,7 @@ from strategy_lab.market_features import MarketFeatureEngine
 from strategy_lab.judge import TheJudge
 from strategy_lab.scanner import StrategyScanner
 from strategy_lab.core import StrategyValidator
-import sqlite3
+from strategy_lab import storage, migrations, aggregates
 import json
 from datetime import datetime, timedelta
 import yfinance as yf
@@ -23,36 +23,8 @@ class HistoricalBacktester:
         self._init_backtest_db()
         
     def _init_backtest_db(self):
-        """Create backtest history table"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS backtest_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                symbol TEXT,
-                price REAL,
-                day_high REAL,
-                day_low REAL,
-                volume INTEGER,
-                iv REAL,
-                vix REAL,
-                spy_trend TEXT,
-                sector_trend TEXT,
-                verdict TEXT,
-                recommended_strategy TEXT,
-                strategy_direction TEXT,
-                confidence REAL,
-                outcome_1d REAL,
-                outcome_3d REAL,
-                outcome_7d REAL,
-                market_regime TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Create backtest history table (via the shared schema migrations)"""
+        migrations.migrate(self.db_path)
         print("✅ Backtest database initialized")
         
     def fetch_historical_macro(self, date):
@@ -209,43 +181,39 @@ class HistoricalBacktester:
         
     def _store_decision(self, **kwargs):
         """Store a historical decision point"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            INSERT INTO backtest_history (
-                timestamp, symbol, price, day_high, day_low, volume,
-                iv, vix, spy_trend, sector_trend, verdict,
-                recommended_strategy, strategy_direction, confidence,
-                outcome_1d, outcome_3d, outcome_7d, market_regime
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            kwargs['timestamp'],
-            kwargs['symbol'],
-            kwargs['price'],
-            kwargs['day_high'],
-            kwargs['day_low'],
-            kwargs['volume'],
-            kwargs['iv'],
-            kwargs['vix'],
-            kwargs['spy_trend'],
-            kwargs['sector_trend'],
-            kwargs['verdict'],
-            kwargs['recommended_strategy'],
-            kwargs['strategy_direction'],
-            kwargs['confidence'],
-            kwargs['outcome_1d'],
-            kwargs['outcome_3d'],
-            kwargs['outcome_7d'],
-            kwargs['market_regime']
-        ))
-        
-        conn.commit()
-        conn.close()
-        
+        with storage.transaction(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO backtest_history (
+                    timestamp, symbol, price, day_high, day_low, volume,
+                    iv, vix, spy_trend, sector_trend, verdict,
+                    recommended_strategy, strategy_direction, confidence,
+                    outcome_1d, outcome_3d, outcome_7d, market_regime
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                kwargs['timestamp'],
+                kwargs['symbol'],
+                kwargs['price'],
+                kwargs['day_high'],
+                kwargs['day_low'],
+                kwargs['volume'],
+                kwargs['iv'],
+                kwargs['vix'],
+                kwargs['spy_trend'],
+                kwargs['sector_trend'],
+                kwargs['verdict'],
+                kwargs['recommended_strategy'],
+                kwargs['strategy_direction'],
+                kwargs['confidence'],
+                kwargs['outcome_1d'],
+                kwargs['outcome_3d'],
+                kwargs['outcome_7d'],
+                kwargs['market_regime']
+            ))
+            aggregates.record_decision(conn, kwargs['recommended_strategy'], kwargs['outcome_7d'], kwargs['market_regime'])
+
     def get_insights(self):
         """Analyze the backtest results"""
-        conn = sqlite3.connect(self.db_path)
+        conn = storage.get_connection(self.db_path)
         c = conn.cursor()
         
         print("\n📊 BACKTEST INSIGHTS")
@@ -299,8 +267,6 @@ class HistoricalBacktester:
         if row[0] > 0:
             print(f"  Blocked {row[0]} times | Avg market move: {row[1]:+.2f}%")
             print(f"  (Negative = correctly avoided drops)")
-            
-        conn.close()
 
 if __name__ == "__main__":
     print("🚀 Historical Backtest Runner")
@@ -0,0 +1,98 @@
+"""
+Bar Store
+Local OHLCV history for many symbols (market_bars), so a universe scan reads
+hundreds of symbols from disk instead of making hundreds of network calls per cycle.
+
+  - one row per (symbol, interval, bar start); re-writing a bar replaces it
+  - writes are bulk (one transaction per download)
+  - reads walk the primary key backwards: newest `lookback` bars per symbol, returned oldest first
+"""
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from strategy_lab import storage
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS market_bars (
+        symbol TEXT NOT NULL,
+        interval TEXT NOT NULL,     -- yfinance notation: '5m', '1h', '1d'
+        ts INTEGER NOT NULL,        -- Bar start, epoch seconds
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL NOT NULL,
+        volume REAL,
+        PRIMARY KEY (symbol, interval, ts)
+    ) WITHOUT ROWID
+    ''',
+    # Retention sweeps: WHERE ts < ?
+    "CREATE INDEX IF NOT EXISTS idx_market_bars_ts ON market_bars(ts)",
+)
+
+COLUMNS = ("time", "open", "high", "low", "close", "volume")  # Same keys as a snapshot's "bars"
+
+
+def write_bars(interval: str, bars_by_symbol: Dict[str, Dict[str, List]],
+               db_path: str = storage.DEFAULT_DB_PATH) -> int:
+    """
+    Upserts {symbol: {"time": [...], "open": [...], ..., "close": [...]}} in one transaction.
+    Bars without a close are skipped. Returns the number of rows written.
+    """
+    rows = []
+    for symbol, bars in bars_by_symbol.items():
+        times = bars.get("time") or []
+        columns = [bars.get(name) or [None] * len(times) for name in COLUMNS[1:]]
+        for ts, o, h, l, c, v in zip(times, *columns):
+            if c is None or c != c:  # NaN: no trade in that bar
+                continue
+            rows.append((symbol, interval, int(ts), o, h, l, c, v))
+    with storage.transaction(db_path) as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO market_bars (symbol, interval, ts, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    return len(rows)
+
+
+def load_closes(symbols: Iterable[str], interval: str, lookback: int,
+                db_path: str = storage.DEFAULT_DB_PATH) -> Dict[str, List[float]]:
+    """Newest `lookback` closes per symbol, oldest first. Symbols with no bars are omitted."""
+    conn = storage.get_connection(db_path)
+    closes = {}
+    for symbol in symbols:
+        rows = conn.execute('''
+            SELECT close FROM market_bars WHERE symbol = ? AND interval = ?
+            ORDER BY ts DESC LIMIT ?
+        ''', (symbol, interval, lookback)).fetchall()
+        if rows:
+            closes[symbol] = [row[0] for row in reversed(rows)]
+    return closes
+
+
+def load_bars(symbol: str, interval: str, lookback: int,
+              db_path: str = storage.DEFAULT_DB_PATH) -> Dict[str, List]:
+    """One symbol's newest `lookback` bars as a snapshot-style "bars" dict (oldest first)."""
+    rows = storage.get_connection(db_path).execute('''
+        SELECT ts, open, high, low, close, volume FROM market_bars WHERE symbol = ? AND interval = ?
+        ORDER BY ts DESC LIMIT ?
+    ''', (symbol, interval, lookback)).fetchall()
+    rows.reverse()
+    return {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+
+
+def symbols(interval: str, db_path: str = storage.DEFAULT_DB_PATH) -> List[str]:
+    """Every symbol with bars at this interval."""
+    try:
+        return [row[0] for row in storage.get_connection(db_path).execute(
+            "SELECT DISTINCT symbol FROM market_bars WHERE interval = ? ORDER BY symbol", (interval,))]
+    except sqlite3.OperationalError:
+        return []
+
+
+def prune(older_than_secs: float, now: Optional[float] = None, db_path: str = storage.DEFAULT_DB_PATH) -> int:
+    """Drops bars that started more than `older_than_secs` ago. Returns rows deleted."""
+    cutoff = (now or time.time()) - older_than_secs
+    with storage.transaction(db_path) as conn:
+        return conn.execute("DELETE FROM market_bars WHERE ts < ?", (cutoff,)).rowcount
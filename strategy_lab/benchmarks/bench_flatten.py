@@ -0,0 +1,109 @@
+"""
+Benchmark: time-to-flat for AlpacaBroker.close_all_positions against a mock trading client.
+
+The mock answers every request after `--latency` ms (one HTTPS round trip) and fails a
+per-symbol close with probability `--fail-rate` (what a 429 / 5xx looks like to us).
+Compared:
+  - sequential:  the old loop, close_position() one symbol after another
+  - concurrent:  close_all_positions(use_bulk=False), per-symbol closes on a thread pool
+  - bulk:        close_all_positions(), one DELETE /positions, retries for what it missed
+
+Usage:
+    python -m strategy_lab.benchmarks.bench_flatten                       # 50 positions, 80ms
+    python -m strategy_lab.benchmarks.bench_flatten --positions 200 --latency 150 --fail-rate 0.1
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from strategy_lab.alpaca_broker import AlpacaBroker
+
+
+class MockTradingClient:
+    """The subset of alpaca TradingClient used by AlpacaBroker, with simulated latency and failures."""
+
+    def __init__(self, symbols, latency: float, fail_rate: float, seed: int = 42):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.open = set(symbols)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _roundtrip(self):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+    def _fails(self) -> bool:
+        with self._lock:
+            return self.rng.random() < self.fail_rate
+
+    def get_all_positions(self):
+        self._roundtrip()
+        return [SimpleNamespace(symbol=s, qty="10", avg_entry_price="100", current_price="101",
+                                unrealized_pl="10", unrealized_plpc="0.01") for s in sorted(self.open)]
+
+    def close_position(self, symbol):
+        self._roundtrip()
+        if self._fails():
+            raise RuntimeError("500 internal server error")
+        with self._lock:
+            self.open.discard(symbol)
+
+    def close_all_positions(self, cancel_orders=None):
+        self._roundtrip()
+        responses = []
+        for symbol in sorted(self.open):
+            ok = not self._fails()
+            responses.append(SimpleNamespace(symbol=symbol, status=200 if ok else 500))
+            if ok:
+                with self._lock:
+                    self.open.discard(symbol)
+        return responses
+
+
+def sequential(broker):
+    for position in broker.get_open_positions():
+        broker.close_position(position["symbol"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positions", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=80, help="Per request, ms")
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    symbols = [f"S{i:03d}" for i in range(args.positions)]
+    settings_note = f"{args.positions} positions, {args.latency:.0f}ms/request, {args.fail_rate:.0%} failures"
+    print(f"Time to flat: {settings_note}")
+    print(f"\n{'method':<14}{'flat (ms)':>11}{'requests':>10}{'left open':>11}{'p50 sym (ms)':>14}{'max sym (ms)':>14}")
+
+    runs = [("sequential", lambda b: sequential(b)),
+            ("concurrent", lambda b: b.close_all_positions(use_bulk=False)),
+            ("bulk", lambda b: b.close_all_positions(use_bulk=True))]
+    for name, flatten in runs:
+        client = MockTradingClient(symbols, args.latency / 1000, args.fail_rate)
+        broker = AlpacaBroker(client=client)
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            flatten(broker)
+            elapsed = time.perf_counter() - t0
+        timings = list(broker.last_flatten["timings"].values()) if broker.last_flatten else []
+        p50 = f"{statistics.median(timings) * 1000:.0f}" if timings else "-"
+        worst = f"{max(timings) * 1000:.0f}" if timings else "-"
+        print(f"{name:<14}{elapsed * 1000:>11.0f}{client.requests:>10}{len(client.open):>11}{p50:>14}{worst:>14}")
+
+
+if __name__ == "__main__":
+    main()
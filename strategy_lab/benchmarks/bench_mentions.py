@@ -0,0 +1,98 @@
+"""
+Benchmark: per-symbol mention scan vs the single-pass MentionScanner.
+
+The per-symbol path is what RedditEngine.fetch_hype used to do for each ticker:
+one \\bSYMBOL\\b regex per post per ticker, plus twelve keyword `in` checks per
+mention. It is timed on a sample (it scales with posts x tickers) and its
+counts are checked against the scanner's on that sample.
+
+Usage:
+    python -m strategy_lab.benchmarks.bench_mentions                      # 100k posts, 500 tickers
+    python -m strategy_lab.benchmarks.bench_mentions --posts 20000 --tickers 50
+"""
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from strategy_lab.social_sentiment import BEARISH_WORDS, BULLISH_WORDS, MentionScanner
+
+FILLER = ("the", "market", "earnings", "guidance", "today", "week", "is", "going", "to", "options",
+          "chart", "support", "resistance", "volume", "fed", "rates", "dd", "long", "short", "hold")
+
+
+def make_tickers(n: int, rng: random.Random):
+    tickers = {"AMD", "NVDA", "SPY", "QQQ", "TSLA", "AAPL", "MSFT", "BRK.B"}
+    while len(tickers) < n:
+        tickers.add("".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 5))))
+    return sorted(tickers)[:n]
+
+
+def make_posts(n: int, tickers, rng: random.Random):
+    """Upper-cased title + body, ~60 words, ~30% mention one or two watched tickers."""
+    keywords = BULLISH_WORDS + BEARISH_WORDS
+    posts = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(30, 90))]
+        if rng.random() < 0.3:
+            for _ in range(rng.randint(1, 2)):
+                words.insert(rng.randrange(len(words)), "$" + rng.choice(tickers) if rng.random() < 0.3 else rng.choice(tickers))
+        if rng.random() < 0.4:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        posts.append(" ".join(words).upper())
+    return posts
+
+
+def per_symbol_counts(posts, tickers):
+    counts = {t: [0, 0, 0] for t in tickers}
+    for symbol in tickers:
+        for content in posts:
+            if re.search(fr'\b{re.escape(symbol)}\b', content):
+                c = counts[symbol]
+                c[0] += 1
+                if any(x in content for x in BULLISH_WORDS):
+                    c[1] += 1
+                if any(x in content for x in BEARISH_WORDS):
+                    c[2] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--sample", type=int, default=2_000, help="Posts timed with the per-symbol scan")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tickers = make_tickers(args.tickers, rng)
+    posts = make_posts(args.posts, tickers, rng)
+    sample = posts[:args.sample]
+    print(f"{len(posts):,} posts, {len(tickers)} tickers")
+
+    t0 = time.perf_counter()
+    scanner = MentionScanner(tickers)
+    counts = scanner.count(posts)
+    scanner_secs = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    baseline = per_symbol_counts(sample, tickers)
+    baseline_secs = (time.perf_counter() - t0) * len(posts) / len(sample)
+
+    assert MentionScanner(tickers).count(sample) == baseline, "scanner disagrees with per-symbol scan"
+
+    mentioned = sum(c[0] for c in counts.values())
+    print(f"\n{'method':<22}{'total (s)':>12}{'posts/s':>14}")
+    print(f"{'per-symbol regex*':<22}{baseline_secs:>12.2f}{len(posts) / baseline_secs:>14,.0f}")
+    print(f"{'MentionScanner':<22}{scanner_secs:>12.2f}{len(posts) / scanner_secs:>14,.0f}")
+    print(f"\nspeedup: {baseline_secs / scanner_secs:.0f}x   ({mentioned:,} mentions attributed)")
+    print(f"* extrapolated from {len(sample):,} posts; counts matched on that sample")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: hot query latency with and without the v2 indexes.
+
+Usage:
+    python -m strategy_lab.benchmarks.bench_queries                 # 1M trades, 10M backtest rows
+    python -m strategy_lab.benchmarks.bench_queries --trades 100000 --backtest 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from strategy_lab import storage, migrations
+
+STRATEGIES = ["bull_call_spread_trend", "bear_put_spread_trend", "iron_condor_range", "calendar_spread_catalyst", "long_call_momentum"]
+REGIMES = ["BULL_RUN", "BEAR_CRASH", "SIDEWAYS"]
+
+HOT_QUERIES = {
+    "open_trades": '''
+        SELECT t.id, t.symbol, t.entry_price, t.strategy_id, s.direction, t.entry_date
+        FROM trades t JOIN signals s ON t.signal_id = s.id
+        WHERE t.status = 'OPEN'
+    ''',
+    "closed_history": '''
+        SELECT t.id, t.strategy_id, t.pnl, t.lesson, t.exit_date
+        FROM trades t WHERE t.status = 'CLOSED'
+        ORDER BY t.exit_date DESC LIMIT 5
+    ''',
+    "recent_losses": '''
+        SELECT t.symbol, t.strategy_id, t.entry_price, t.exit_price, t.pnl, t.entry_date
+        FROM trades t WHERE t.pnl < 0 AND t.status = 'CLOSED'
+        ORDER BY t.exit_date DESC LIMIT 5
+    ''',
+    "strategy_stats": '''
+        SELECT strategy_id, COUNT(*), SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END), AVG(pnl), SUM(pnl)
+        FROM trades WHERE status = 'CLOSED' GROUP BY strategy_id
+    ''',
+    "backtest_history": '''
+        SELECT * FROM backtest_history ORDER BY timestamp DESC LIMIT 50
+    ''',
+    "backtest_strategies": '''
+        SELECT recommended_strategy, COUNT(*), AVG(outcome_7d),
+               SUM(CASE WHEN outcome_7d > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*)
+        FROM backtest_history WHERE recommended_strategy IS NOT NULL
+        GROUP BY recommended_strategy
+    ''',
+    "backtest_regimes": '''
+        SELECT market_regime, COUNT(*) FROM backtest_history GROUP BY market_regime
+    ''',
+}
+
+
+def populate(db_path: str, n_trades: int, n_backtest: int, open_trades: int = 200):
+    rng = random.Random(42)
+    conn = storage.get_connection(db_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    base = 1_600_000_000
+
+    def signals():
+        for i in range(1, n_trades + 1):
+            yield (i, rng.choice(STRATEGIES), "AMD", rng.choice(["BULLISH", "BEARISH"]), "{}", str(base + i))
+
+    def trades():
+        for i in range(1, n_trades + 1):
+            is_open = i > n_trades - open_trades
+            pnl = None if is_open else rng.gauss(0.2, 3.0)
+            exit_date = None if is_open else time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(base + i * 60))
+            yield (i, i, rng.choice(STRATEGIES), "AMD", "OPEN" if is_open else "CLOSED",
+                   100.0, None if is_open else 101.0, exit_date, pnl)
+
+    def decisions():
+        for i in range(n_backtest):
+            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(base + i * 60))
+            strat = rng.choice(STRATEGIES + [None])
+            yield (ts, "AMD", 100.0, 20.0, "BULLISH", "VERDICT: NEUTRAL", strat, rng.gauss(0.5, 4.0), rng.choice(REGIMES))
+
+    print(f"Populating {n_trades:,} trades and {n_backtest:,} backtest rows...")
+    t0 = time.perf_counter()
+    with storage.transaction(db_path) as c:
+        c.executemany("INSERT INTO signals (id, strategy_id, symbol, direction, features, timestamp) VALUES (?, ?, ?, ?, ?, ?)", signals())
+        c.executemany("INSERT INTO trades (id, signal_id, strategy_id, symbol, status, entry_price, exit_price, exit_date, pnl) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", trades())
+        c.executemany('''
+            INSERT INTO backtest_history (timestamp, symbol, price, vix, spy_trend, verdict, recommended_strategy, outcome_7d, market_regime)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', decisions())
+    conn.execute("PRAGMA synchronous=NORMAL")
+    print(f"  done in {time.perf_counter() - t0:.1f}s")
+
+
+def time_queries(db_path: str, repeats: int):
+    conn = storage.get_connection(db_path)
+    results = {}
+    for name, sql in HOT_QUERIES.items():
+        samples = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            conn.execute(sql).fetchall()
+            samples.append((time.perf_counter() - t0) * 1000)
+        results[name] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--backtest", type=int, default=10_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--db", default="bench_data_lake.db")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated DB file")
+    args = parser.parse_args()
+
+    for path in (args.db, args.db + "-wal", args.db + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    try:
+        migrations.migrate(args.db, target=1)  # Canonical tables, no indexes yet
+        populate(args.db, args.trades, args.backtest)
+
+        before = time_queries(args.db, args.repeats)
+        t0 = time.perf_counter()
+        migrations.migrate(args.db)  # Build the v2 indexes
+        print(f"Index build: {time.perf_counter() - t0:.1f}s")
+        after = time_queries(args.db, args.repeats)
+
+        print(f"\n{'query':<22}{'no index (ms)':>16}{'indexed (ms)':>16}{'speedup':>10}")
+        for name in HOT_QUERIES:
+            speedup = before[name] / after[name] if after[name] else float("inf")
+            print(f"{name:<22}{before[name]:>16.2f}{after[name]:>16.2f}{speedup:>9.0f}x")
+    finally:
+        storage.close_connections(args.db)
+        if not args.keep:
+            for path in (args.db, args.db + "-wal", args.db + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Broker State Cache
+Keeps the account and open positions in memory so the pre-trade risk check reads
+local state instead of making two HTTPS round trips on the decision path:
+
+  - background poll: account + positions fetched concurrently every `refresh_secs`
+  - trade-update stream (Alpaca websocket, or LocalTradeStream in dry-run/tests):
+    fills set the position quantity at once and trigger an early poll for cash
+  - optimistic fills: our own orders are applied locally the moment they are accepted,
+    and re-applied on top of any poll that started before them; keyed by order id, so a
+    stream event for the same order (which may arrive before submit returns) retires it
+    instead of counting the fill twice
+  - a read that finds the state older than `stale_after_secs` polls synchronously first
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from strategy_lab import telemetry
+from strategy_lab.config import BROKER_STATE_SETTINGS
+
+
+class LocalTradeStream:
+    """In-process stand-in for the broker's trade-update stream (same event dicts)."""
+
+    def __init__(self):
+        self._handlers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Callable[[Dict], None]) -> Callable[[], None]:
+        with self._lock:
+            self._handlers.append(handler)
+        return lambda: self._unsubscribe(handler)
+
+    def _unsubscribe(self, handler):
+        with self._lock:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+
+    def publish(self, update: Dict):
+        """update = {"event", "order_id", "symbol", "side", "qty", "price", "position_qty"}"""
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(update)
+
+
+def _signed(qty: float, side: str) -> float:
+    return qty if side.upper() == "BUY" else -qty
+
+
+class _PendingFill:
+    """An accepted order of ours whose fill the broker hasn't confirmed yet."""
+    __slots__ = ("applied_at", "order_id", "symbol", "remaining", "price")
+
+    def __init__(self, applied_at: float, order_id: Optional[str], symbol: str, remaining: float,
+                 price: Optional[float]):
+        self.applied_at = applied_at
+        self.order_id = order_id
+        self.symbol = symbol
+        self.remaining = remaining  # Signed qty not yet reported filled by the stream
+        self.price = price
+
+
+class BrokerState:
+    """
+    The Quartermaster.
+    Wraps a broker (AlpacaBroker / DryRunBroker). Call start() once, close() on shutdown.
+    """
+
+    def __init__(self, broker, settings: Optional[Dict] = None, clock: Callable[[], float] = time.time):
+        self.broker = broker
+        self.settings = {**BROKER_STATE_SETTINGS, **(settings or {})}
+        self.clock = clock
+        self._account: Dict = {}
+        self._positions: Dict[str, Dict] = {}
+        self._pending: List[_PendingFill] = []
+        self._streamed: "OrderedDict[str, Tuple[float, bool]]" = OrderedDict()  # order id -> (filled qty, done)
+        self._updated_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="BrokerPoll")
+        self._thread: Optional[threading.Thread] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if self.settings["stream"] and hasattr(self.broker, "trade_stream"):
+            try:
+                self._unsubscribe = self.broker.trade_stream(self.on_trade_update)
+            except Exception as e:
+                print(f"⚠️  Trade stream unavailable, polling only ({e})")
+        self._thread = threading.Thread(target=self._run, name="BrokerState", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._unsubscribe:
+            self._unsubscribe()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️  Broker state refresh failed: {e}")
+            self._wake.wait(self.settings["refresh_secs"])
+            self._wake.clear()
+
+    def request_refresh(self):
+        """Poll now instead of at the next tick (e.g. after a fill changed cash)."""
+        self._wake.set()
+
+    # --- Poll ---
+
+    def refresh(self) -> bool:
+        """One poll: account and positions fetched concurrently. Returns False if either call failed."""
+        with self._refresh_lock:
+            started = self.clock()
+            with telemetry.timer("broker_refresh_duration_seconds"):
+                account_f = self._pool.submit(self.broker.get_account)
+                positions_f = self._pool.submit(self.broker.get_open_positions)
+                account, positions = account_f.result(), positions_f.result()
+            if not account:
+                telemetry.inc("broker_refresh_errors_total")
+                return False
+            with self._lock:
+                self._account = dict(account)
+                self._positions = {p["symbol"]: dict(p) for p in positions}
+                # Fills we applied after this poll began may not be in it yet: keep them on top
+                self._pending = [fill for fill in self._pending if fill.applied_at >= started]
+                for fill in self._pending:
+                    self._apply(fill.symbol, fill.remaining, fill.price)
+                self._updated_at = self.clock()
+            self._ready.set()
+            return True
+
+    # --- Local updates ---
+
+    def _apply(self, symbol: str, signed_qty: float, price: Optional[float]):
+        position = self._positions.get(symbol)
+        old_qty = position["qty"] if position else 0
+        new_qty = old_qty + signed_qty
+        if new_qty == 0:
+            self._positions.pop(symbol, None)
+        else:
+            position = position or {"symbol": symbol, "avg_entry_price": price or 0.0,
+                                    "current_price": price or 0.0, "unrealized_pl": 0.0, "unrealized_plpc": 0.0}
+            if price and abs(new_qty) > abs(old_qty) and old_qty * new_qty >= 0:
+                position["avg_entry_price"] = (position["avg_entry_price"] * abs(old_qty)
+                                               + price * abs(signed_qty)) / abs(new_qty)
+            position["qty"] = new_qty
+            self._positions[symbol] = position
+        if price and self._account:
+            notional = signed_qty * price
+            self._account["cash"] = self._account.get("cash", 0.0) - notional
+            self._account["buying_power"] = self._account.get("buying_power", 0.0) - abs(notional)
+
+    def apply_fill(self, symbol: str, qty: float, side: str, price: Optional[float] = None,
+                   order_id: Optional[str] = None):
+        """
+        Optimistic update for one of our own orders (before the broker confirms it).
+        Whatever the stream already reported for `order_id` is not applied again.
+        """
+        signed = _signed(qty, side)
+        with self._lock:
+            if order_id is not None and order_id in self._streamed:
+                filled, done = self._streamed[order_id]
+                if done:
+                    return
+                signed -= _signed(filled, side)
+            fill = _PendingFill(self.clock(), order_id, symbol, signed, price)
+            self._pending.append(fill)
+            self._apply(symbol, signed, price)
+
+    def _remember_streamed(self, order_id: str, qty: float, done: bool):
+        filled = self._streamed.pop(order_id, (0.0, False))[0] + qty
+        self._streamed[order_id] = (filled, done)
+        while len(self._streamed) > self.settings["max_tracked_orders"]:
+            self._streamed.popitem(last=False)
+
+    def on_trade_update(self, update: Dict):
+        """
+        Trade-update stream handler. Fills carry the broker's resulting position quantity,
+        which replaces whatever we had for that symbol; the event's own order stops being
+        pending, while our other unconfirmed orders in the symbol stay on top.
+        """
+        event = update.get("event")
+        if event not in ("fill", "partial_fill"):
+            return
+        symbol = update["symbol"]
+        order_id = update.get("order_id")
+        position_qty = update.get("position_qty")
+        with self._lock:
+            if order_id is not None:
+                self._remember_streamed(order_id, update.get("qty") or 0.0, event == "fill")
+                for fill in [f for f in self._pending if f.order_id == order_id]:
+                    fill.remaining -= _signed(update.get("qty") or 0.0, update.get("side", "BUY"))
+                    if event == "fill" or fill.remaining == 0:
+                        self._pending.remove(fill)
+            elif position_qty is not None:
+                # Can't tell which of our orders this is: the broker's quantity wins outright
+                self._pending = [f for f in self._pending if f.symbol != symbol]
+            if position_qty is not None:
+                unconfirmed = sum(f.remaining for f in self._pending if f.symbol == symbol)
+                qty = position_qty + unconfirmed
+                position = self._positions.get(symbol)
+                if qty == 0:
+                    self._positions.pop(symbol, None)
+                elif position:
+                    position["qty"] = qty
+                else:
+                    self._positions[symbol] = {"symbol": symbol, "qty": qty,
+                                               "avg_entry_price": update.get("price") or 0.0,
+                                               "current_price": update.get("price") or 0.0,
+                                               "unrealized_pl": 0.0, "unrealized_plpc": 0.0}
+        telemetry.inc("broker_trade_updates_total", event=event)
+        self.request_refresh()  # Cash / buying power only come from the account endpoint
+
+    # --- Reads (decision path) ---
+
+    def _ensure_fresh(self):
+        age = self.age()
+        if age is None or age > self.settings["stale_after_secs"]:
+            self.refresh()
+
+    def age(self) -> Optional[float]:
+        with self._lock:
+            return None if self._updated_at is None else self.clock() - self._updated_at
+
+    def account(self) -> Dict:
+        self._ensure_fresh()
+        with self._lock:
+            return dict(self._account)
+
+    def positions(self) -> List[Dict]:
+        self._ensure_fresh()
+        with self._lock:
+            return [dict(p) for p in self._positions.values()]
+
+    def position_count(self) -> int:
+        self._ensure_fresh()
+        with self._lock:
+            return len(self._positions)
@@ -28,3 +28,112 @@ DRY_RUN_MODE = True  # Log orders but don't submit (for testing)
 
 # Alpaca Settings (loaded from .env for security)
 ALPACA_PAPER_TRADING = True  # NEVER set to False without explicit user action
+
+# Broker State Cache (broker_state.py): account + positions read from memory on the decision path
+BROKER_STATE_SETTINGS = {
+    "refresh_secs": 15,         # Background poll (account + positions, concurrently)
+    "stale_after_secs": 60,     # A read older than this polls synchronously first
+    "stream": True,             # Subscribe to trade updates (fills update positions at once)
+    "max_tracked_orders": 1000, # Order ids remembered from the stream (dedupes optimistic fills)
+}
+
+# Emergency flatten (AlpacaBroker.close_all_positions)
+FLATTEN_SETTINGS = {
+    "use_bulk": True,           # One DELETE /positions first; per-symbol closes only for what it missed
+    "workers": 16,              # Concurrent per-symbol closes
+    "max_attempts": 4,          # Per symbol
+    "backoff_secs": 0.25,       # Doubles per retry...
+    "max_backoff_secs": 2.0,    # ...up to this
+}
+
+# Watchlist Mode (runner.py --watchlist)
+WATCHLIST = ["AMD", "NVDA", "TSLA", "AAPL", "MSFT", "META", "GOOGL", "AMZN", "SPY", "QQQ"]
+WATCHLIST_SETTINGS = {
+    "fetch_workers": 8,         # Concurrent snapshot downloads (I/O bound -> threads)
+    "analysis_workers": None,   # Process pool size for features/judge/scan (None = CPU count)
+    "cycle_deadline_secs": 45,  # Whatever isn't done by then is skipped (60s cadence)
+}
+
+# Universe Scan (runner.py --universe): hundreds of symbols ranked from the local bar store
+UNIVERSE_SETTINGS = {
+    "interval": "5m",               # Base bars: trend, key levels, divergence, SMA
+    "htf_interval": "1h",           # Higher-timeframe trend
+    "lookback_bars": 200,           # Bars per symbol in the feature matrix (SMA200 needs 200)
+    "backfill_period": {"5m": "5d", "1h": "1mo"},   # First download for an empty store
+    "refresh_period": {"5m": "1d", "1h": "5d"},     # Later downloads (overlap is upserted)
+    "refresh_secs": {"5m": 60, "1h": 900},          # At most one bulk download per interval this often
+    "top_k": 10,                    # Only these go on to option-chain + sentiment enrichment
+    "enrich_workers": 8,
+    "cycle_deadline_secs": 45,      # Enrichment not done by then is skipped (60s cadence)
+    "retention_days": 45,         # Bars older than this are pruned (off-hours maintenance)
+}
+
+# Sector ETF per symbol (correlation.py); anything unlisted is compared against the default sector
+SECTOR_ETFS = {
+    "AMD": "SMH", "NVDA": "SMH",
+    "AAPL": "XLK", "MSFT": "XLK",
+    "GOOGL": "XLC", "META": "XLC",
+    "AMZN": "XLY", "TSLA": "XLY",
+}
+CORRELATION_SETTINGS = {
+    "default_sector": "QQQ",
+    "interval": "1m",               # Same bars as the snapshot's closes
+    "backfill_period": "5d",        # First download
+    "refresh_period": "1d",         # Later downloads (merged into the store)
+    "max_age_secs": 30,             # All ETFs re-downloaded at most once per cycle (60s cadence)
+    "max_bars": 2500,               # Per ETF kept in memory (~5 sessions of 1m bars)
+    "window_bars": 60,              # Rolling window of 1m returns
+    "min_samples": 20,              # Fewer aligned returns than this -> no corr/beta yet
+}
+
+# Live Scheduler (runner.py --live)
+SCHEDULER_SETTINGS = {
+    "bar_secs": 60,                     # Cycle on every 1m bar boundary
+    "settle_secs": 2,                   # Give the provider a moment to publish the finished bar
+    "maintenance_interval_secs": 3600,  # Off-hours housekeeping cadence
+}
+
+# Discord Notifier (background worker)
+NOTIFIER_SETTINGS = {
+    "max_queue": 200,           # Alerts beyond this are dropped, never block the cycle
+    "max_embeds": 10,           # Discord's per-message embed limit
+    "batch_window_secs": 0.5,   # Wait this long for more alerts to share a message
+    "max_attempts": 5,          # Per message, across 429s / 5xx / network errors
+    "request_timeout_secs": 10,
+    "signal_cooldown_secs": 1800,  # Re-alert the same strategy after 30 mins
+}
+
+# Reddit Sentiment Ingestor (background refresh, cycle reads from memory)
+SENTIMENT_SETTINGS = {
+    "refresh_secs": 60,             # One conditional fetch of every subreddit per minute
+    "window_secs": 3600,            # Rolling window for mention / sentiment counters
+    "posts_per_fetch": 50,          # Newest posts requested per subreddit
+    "request_timeout_secs": 5,
+    "max_seen_ids": 5000,           # Remembered post IDs (oldest forgotten first)
+    "first_fetch_wait_secs": 10,    # How long a cold cycle waits for the first refresh
+}
+
+# Alpha Vantage (trading_architect.AlphaVantageEngine via data.request_scheduler)
+ALPHA_VANTAGE_SETTINGS = {
+    "requests_per_minute": 5,       # Free plan; raise to the premium plan's rate if upgraded
+    "requests_per_day": 25,         # Free plan daily quota (None = unlimited)
+    "max_workers": 4,               # Concurrent requests in flight (still bounded by the bucket)
+    "max_attempts": 3,              # Per request, across rate-limit notes and network errors
+    "request_timeout_secs": 10,
+}
+
+# Consensus forecast cache (memory LRU + consensus_forecasts table)
+FORECAST_CACHE_SETTINGS = {
+    "ttl_secs": 300,        # Fresh for 5 mins: served without touching the API
+    "stale_secs": 3600,     # Up to 1h old: served immediately, refreshed in the background
+    "max_entries": 512,     # Symbols kept in memory
+}
+
+# Raw API response archive (separate DB file, see raw_archive.py)
+RAW_ARCHIVE_SETTINGS = {
+    "codec": "zstd",                # Falls back to zlib when `zstandard` isn't installed
+    "zstd_level": 10,
+    "zlib_level": 6,
+    "retention_days": 30,           # Fetches older than this are dropped (payloads once unreferenced)
+    "prune_interval_secs": 3600,    # At most one retention pass per hour, piggybacked on writes
+}
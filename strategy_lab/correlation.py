@@ -0,0 +1,186 @@
+"""
+Sector Correlation Engine
+Replaces the per-symbol QQQ download (and the trend-tag-only comparison) with:
+
+  - a shared store of sector ETF bars: every ETF in one bulk download, at most
+    once per `max_age_secs` (i.e. once per cycle), reused by every symbol
+  - incremental rolling statistics per (symbol, ETF): each new aligned bar's returns are
+    pushed into running sums, so a cycle costs O(new bars) rather than O(window)
+  - numeric features: return correlation and beta vs the symbol's sector ETF
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from strategy_lab import telemetry
+from strategy_lab.config import CORRELATION_SETTINGS, SECTOR_ETFS
+
+
+class RollingCorrelation:
+    """
+    Pearson correlation and beta of x on y over the last `window` (x, y) return pairs.
+    Running sums are rebuilt from the window every `window` pushes so float drift can't accumulate.
+    """
+
+    __slots__ = ("window", "pairs", "sx", "sy", "sxx", "syy", "sxy", "_pushes")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.pairs: deque = deque()
+        self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+        self._pushes = 0
+
+    def push(self, x: float, y: float):
+        self.pairs.append((x, y))
+        self._add(x, y, 1.0)
+        if len(self.pairs) > self.window:
+            self._add(*self.pairs.popleft(), -1.0)
+        self._pushes += 1
+        if self._pushes % self.window == 0:
+            self._rebuild()
+
+    def _add(self, x: float, y: float, sign: float):
+        self.sx += sign * x
+        self.sy += sign * y
+        self.sxx += sign * x * x
+        self.syy += sign * y * y
+        self.sxy += sign * x * y
+
+    def _rebuild(self):
+        self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+        for x, y in self.pairs:
+            self._add(x, y, 1.0)
+
+    @property
+    def n(self) -> int:
+        return len(self.pairs)
+
+    def _moments(self) -> Optional[Tuple[float, float, float]]:
+        n = len(self.pairs)
+        if n < 2:
+            return None
+        cov = self.sxy - self.sx * self.sy / n
+        var_x = self.sxx - self.sx * self.sx / n
+        var_y = self.syy - self.sy * self.sy / n
+        return cov, var_x, var_y
+
+    def corr(self) -> Optional[float]:
+        moments = self._moments()
+        if moments is None or moments[1] <= 0 or moments[2] <= 0:
+            return None
+        cov, var_x, var_y = moments
+        return max(-1.0, min(1.0, cov / math.sqrt(var_x * var_y)))
+
+    def beta(self) -> Optional[float]:
+        moments = self._moments()
+        if moments is None or moments[2] <= 0:
+            return None
+        return moments[0] / moments[2]
+
+
+class _PairState:
+    __slots__ = ("stats", "last_ts", "last_x", "last_y")
+
+    def __init__(self, window: int):
+        self.stats = RollingCorrelation(window)
+        self.last_ts: Optional[float] = None
+        self.last_x: Optional[float] = None
+        self.last_y: Optional[float] = None
+
+
+class SectorCorrelations:
+    """
+    The Cartographer.
+    `fetch_bars(symbols, interval, period)` is the provider's bulk download
+    (YFinanceEngine.fetch_bars). Thread-safe: snapshot threads share one instance.
+    """
+
+    def __init__(self, fetch_bars: Callable[[List[str], str, str], Dict[str, Dict[str, List]]],
+                 sector_map: Optional[Dict[str, str]] = None, settings: Optional[Dict] = None,
+                 clock: Callable[[], float] = time.time):
+        self.fetch_bars = fetch_bars
+        self.sector_map = dict(SECTOR_ETFS if sector_map is None else sector_map)
+        self.settings = {**CORRELATION_SETTINGS, **(settings or {})}
+        self.clock = clock
+        self._bars: Dict[str, Dict[float, float]] = {}     # ETF -> {bar start: close}
+        self._sorted: Dict[str, Tuple[List[float], List[float]]] = {}  # ETF -> (times, closes)
+        self._fetched_at: Optional[float] = None
+        self._pairs: Dict[Tuple[str, str], _PairState] = {}
+        self._fetch_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def sector_for(self, symbol: str) -> str:
+        return self.sector_map.get(symbol, self.settings["default_sector"])
+
+    @property
+    def etfs(self) -> List[str]:
+        return sorted(set(self.sector_map.values()) | {self.settings["default_sector"]})
+
+    # --- Shared ETF store ---
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        One bulk download of every sector ETF, unless the store is younger than max_age_secs.
+        Concurrent callers wait for the same download. Returns True if it fetched.
+        """
+        with self._fetch_lock:
+            now = self.clock()
+            if not force and self._fetched_at is not None and now - self._fetched_at < self.settings["max_age_secs"]:
+                return False
+            period = self.settings["refresh_period"] if self._bars else self.settings["backfill_period"]
+            with telemetry.span("sector_fetch"):
+                downloaded = self.fetch_bars(self.etfs, self.settings["interval"], period)
+            with self._lock:
+                for etf, bars in downloaded.items():
+                    merged = self._bars.setdefault(etf, {})
+                    merged.update(zip(bars["time"], bars["close"]))
+                    times = sorted(merged)[-self.settings["max_bars"]:]
+                    self._bars[etf] = {t: merged[t] for t in times}
+                    self._sorted[etf] = (times, [merged[t] for t in times])
+            self._fetched_at = now
+            return True
+
+    def sector_closes(self, etf: str) -> List[float]:
+        with self._lock:
+            return list(self._sorted.get(etf, ((), ()))[1])
+
+    # --- Per-symbol rolling stats ---
+
+    def update(self, symbol: str, bars: Dict[str, List]) -> Dict:
+        """
+        Feeds the symbol's bars (time/close, oldest first) into its rolling stats against its
+        sector ETF, refreshing the ETF store first if it is due. Only bars newer than the last
+        call are processed, and never the newest one (still forming). Returns the snapshot fields:
+            {"sector_etf", "sector_closes", "sector_corr", "sector_beta", "sector_samples"}
+        """
+        self.refresh()
+        etf = self.sector_for(symbol)
+        with self._lock:
+            sector = self._bars.get(etf, {})
+            state = self._pairs.get((symbol, etf))
+            if state is None:
+                state = self._pairs[(symbol, etf)] = _PairState(self.settings["window_bars"])
+            for ts, close in zip(bars.get("time", [])[:-1], bars.get("close", [])[:-1]):
+                if state.last_ts is not None and ts <= state.last_ts:
+                    continue
+                sector_close = sector.get(ts)
+                if sector_close is None or not close or not sector_close:
+                    continue  # Bar missing on one side: wait for an aligned one
+                if state.last_x:
+                    state.stats.push(close / state.last_x - 1, sector_close / state.last_y - 1)
+                state.last_ts, state.last_x, state.last_y = ts, close, sector_close
+            samples = state.stats.n
+            enough = samples >= self.settings["min_samples"]
+            corr = state.stats.corr() if enough else None
+            beta = state.stats.beta() if enough else None
+            closes = list(self._sorted.get(etf, ((), ()))[1])
+
+        return {
+            "sector_etf": etf,
+            "sector_closes": closes,
+            "sector_corr": round(corr, 4) if corr is not None else None,
+            "sector_beta": round(beta, 4) if beta is not None else None,
+            "sector_samples": samples,
+        }
@@ -0,0 +1,166 @@
+"""
+Alpha Vantage Parser
+Turns raw payloads into sorted NumPy columns once, when the response arrives,
+instead of re-walking the JSON (and trusting dict order) on every score:
+
+  Time Series (...)  -> {'time', 'open', 'high', 'low', 'close', 'volume'}  oldest first
+  NEWS_SENTIMENT     -> {'time', 'overall', 'ticker', 'relevance'}           oldest first
+
+Parsed results are cached by the payload's content hash (the raw archive's key),
+so a duplicate response is never parsed twice. Scoring works on whole batches.
+Times are the provider's wall-clock (US/Eastern for intraday) as epoch-like seconds;
+only their order matters here.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SERIES_FIELDS = {"1. open": "open", "2. high": "high", "3. low": "low", "4. close": "close", "5. volume": "volume"}
+TECH_LOOKBACK = 50      # Closes in the technical average
+PARSED_CACHE_SIZE = 256
+
+Columns = Dict[str, np.ndarray]
+
+
+def _series_key(payload: Dict) -> Optional[str]:
+    return next((k for k in payload if k.startswith("Time Series")), None)
+
+
+def parse_time_series(payload: Optional[Dict]) -> Optional[Columns]:
+    """Any 'Time Series (...)' payload (intraday, daily, ...) -> sorted columns, or None."""
+    if not payload:
+        return None
+    key = _series_key(payload)
+    series = payload.get(key) if key else None
+    if not series:
+        return None
+    stamps = list(series)
+    order = np.argsort(np.array(stamps, dtype="datetime64[s]"), kind="stable")
+    times = np.array(stamps, dtype="datetime64[s]")[order].astype(np.int64)
+    rows = list(series.values())
+    columns = {"time": times}
+    for field, name in SERIES_FIELDS.items():
+        values = np.array([row.get(field, "nan") for row in rows], dtype=np.float64)
+        columns[name] = values[order]
+    return columns
+
+
+def _news_time(stamp: str) -> str:
+    # 20240102T093000 -> 2024-01-02T09:30:00
+    return f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]}T{stamp[9:11]}:{stamp[11:13]}:{stamp[13:15]}"
+
+
+def parse_news_sentiment(payload: Optional[Dict], symbol: Optional[str] = None) -> Optional[Columns]:
+    """
+    NEWS_SENTIMENT -> overall score per article, plus `symbol`'s own score/relevance (NaN if absent).
+    A valid payload with no articles gives empty columns; None means there was no usable response.
+    """
+    if not payload or not isinstance(payload.get("feed"), list):
+        return None
+    feed = payload["feed"]
+    times, overall, ticker, relevance = [], [], [], []
+    for item in feed:
+        stamp = item.get("time_published") or ""
+        times.append(_news_time(stamp) if len(stamp) >= 15 else "NaT")
+        overall.append(float(item.get("overall_sentiment_score", 0) or 0))
+        match = next((t for t in item.get("ticker_sentiment", []) if t.get("ticker") == symbol), None)
+        ticker.append(float(match.get("ticker_sentiment_score", "nan")) if match else np.nan)
+        relevance.append(float(match.get("relevance_score", "nan")) if match else np.nan)
+    stamps = np.array(times, dtype="datetime64[s]")
+    order = np.argsort(stamps, kind="stable")  # NaT sorts last
+    return {
+        "time": stamps[order].astype(np.int64),
+        "overall": np.array(overall, dtype=np.float64)[order],
+        "ticker": np.array(ticker, dtype=np.float64)[order],
+        "relevance": np.array(relevance, dtype=np.float64)[order],
+    }
+
+
+def parse(function: str, payload: Optional[Dict], symbol: Optional[str] = None) -> Optional[Columns]:
+    if function == "NEWS_SENTIMENT":
+        return parse_news_sentiment(payload, symbol)
+    if function.startswith("TIME_SERIES"):
+        return parse_time_series(payload)
+    return None
+
+
+class ParsedCache:
+    """
+    The Ledger Clerk.
+    content hash -> parsed columns (LRU). Arrays are shared read-only.
+    """
+
+    def __init__(self, size: int = PARSED_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[tuple, Optional[Columns]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_parse(self, digest: Optional[str], function: str, payload: Optional[Dict],
+                     symbol: Optional[str] = None) -> Optional[Columns]:
+        key = (digest, function, symbol)
+        if digest is not None:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+        parsed = parse(function, payload, symbol)
+        if parsed is not None:
+            for column in parsed.values():
+                column.flags.writeable = False
+        if digest is not None:
+            with self._lock:
+                self._entries[key] = parsed
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return parsed
+
+
+PARSED = ParsedCache()
+
+
+class AVResponse:
+    """What a scheduled Alpha Vantage request resolves to: the raw payload, its archive hash, parsed columns."""
+
+    __slots__ = ("data", "digest", "columns")
+
+    def __init__(self, data: Dict, digest: Optional[str], columns: Optional[Columns]):
+        self.data = data
+        self.digest = digest
+        self.columns = columns
+
+
+# --- Batch scoring ---
+
+def technical_scores(series: List[Optional[Columns]], lookback: int = TECH_LOOKBACK) -> np.ndarray:
+    """
+    One score (0-100) per symbol: latest close vs the mean of the last `lookback` closes.
+    >1% above -> 75 (bullish), >1% below -> 25 (bearish), else / no data -> 50.
+    """
+    window = np.full((len(series), lookback), np.nan)
+    for i, columns in enumerate(series):
+        if columns is not None and len(columns["close"]):
+            closes = columns["close"][-lookback:]
+            window[i, lookback - len(closes):] = closes
+    has_data = ~np.isnan(window[:, -1])
+    scores = np.full(len(series), 50.0)
+    if has_data.any():
+        rows = window[has_data]
+        avg = np.nanmean(rows, axis=1)
+        current = rows[:, -1]
+        scores[has_data] = np.where(current > avg * 1.01, 75.0, np.where(current < avg * 0.99, 25.0, 50.0))
+    return scores
+
+
+def sentiment_scores(news: List[Optional[Columns]]) -> np.ndarray:
+    """One score (0-100) per symbol: mean overall article sentiment, -0.5..0.5 mapped to 0..100."""
+    lengths = np.array([len(n["overall"]) if n is not None else 0 for n in news])
+    scores = np.full(len(news), 50.0)
+    if not lengths.any():
+        return scores
+    values = np.concatenate([n["overall"] for n in news if n is not None and len(n["overall"])])
+    sums = np.add.reduceat(values, np.concatenate(([0], np.cumsum(lengths[lengths > 0])[:-1])))
+    means = sums / lengths[lengths > 0]
+    scores[lengths > 0] = np.clip((means + 0.5) * 100, 0, 100)
+    return scores
@@ -0,0 +1,215 @@
+"""
+Request Scheduler
+Proactive rate limiting for quota'd APIs (Alpha Vantage): instead of firing a
+request and sleeping when the provider complains, every call waits for a
+token first.
+
+  - TokenBucket: per-minute rate (burst = one minute's worth) + per-day quota
+  - priority queue: interactive calls (HIGH) jump ahead of background ones
+  - concurrent dispatch on a small thread pool, as fast as tokens allow
+  - coalescing: a request whose key is already queued or in flight shares its Future
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from strategy_lab import telemetry
+
+HIGH = 0     # A user is waiting (web request)
+NORMAL = 5
+LOW = 10     # Background prefetch / refresh
+
+
+class RetryLater(Exception):
+    """Raised by a request function to be re-queued (with a fresh token) after `delay` seconds."""
+
+    def __init__(self, delay: float, reason: str = ""):
+        super().__init__(reason or f"retry in {delay}s")
+        self.delay = delay
+
+
+class TokenBucket:
+    """
+    The Ration Book.
+    Refills continuously at per_minute / 60 tokens per second; the daily quota resets at 00:00 UTC.
+    """
+
+    def __init__(self, per_minute: float, per_day: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic, wall: Callable[[], float] = time.time):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.per_day = per_day
+        self.clock = clock
+        self.wall = wall
+        self.tokens = self.capacity
+        self._updated = clock()
+        self._day = None
+        self.used_today = 0
+        self._exhausted_day = None  # Provider said today's quota is gone
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        day = time.gmtime(self.wall())[:3]
+        if day != self._day:
+            self._day, self.used_today = day, 0
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns how long to wait (inf: daily quota spent)."""
+        with self._lock:
+            self._refill()
+            if self._exhausted_day == self._day or (self.per_day is not None and self.used_today >= self.per_day):
+                return float("inf")
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.used_today += 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        """The provider says we're over the limit anyway: start the minute over."""
+        with self._lock:
+            self._refill()
+            self.tokens = 0.0
+
+    def exhaust(self):
+        """The provider says the daily quota is spent (maybe by another client): no tokens until 00:00 UTC."""
+        with self._lock:
+            self._refill()
+            self._exhausted_day = self._day
+
+
+class _Job:
+    __slots__ = ("key", "fn", "priority", "future", "attempt")
+
+    def __init__(self, key, fn, priority, future):
+        self.key, self.fn, self.priority, self.future = key, fn, priority, future
+        self.attempt = 1
+
+
+class RequestScheduler:
+    """
+    The Dispatcher's Clerk.
+    submit() never blocks; the returned Future resolves to the request function's result
+    (None when the daily quota is spent or retries ran out).
+    """
+
+    def __init__(self, bucket: TokenBucket, max_workers: int = 4, max_attempts: int = 3, name: str = "api"):
+        self.bucket = bucket
+        self.max_attempts = max_attempts
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}Request")
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._seq = itertools.count()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._dispatcher = threading.Thread(target=self._dispatch, name=f"{name}Scheduler", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, key: Hashable, fn: Callable[[int], object], priority: int = NORMAL) -> Future:
+        """`fn(attempt)` performs one request. Same key while pending -> same Future."""
+        with self._cond:
+            future = self._inflight.get(key)
+            if future is not None:
+                telemetry.inc("provider_requests_coalesced_total", provider=self.name)
+                return future
+            future = Future()
+            self._inflight[key] = future
+            self._push(_Job(key, fn, priority, future))
+        return future
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _push(self, job: _Job):
+        # Caller holds the lock
+        heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+        telemetry.set_gauge("provider_queue_depth", len(self._heap), provider=self.name)
+        self._cond.notify()
+
+    def _requeue(self, job: _Job):
+        with self._cond:
+            if not self._stop:
+                self._push(job)
+                return
+        self._finish(job, None)  # Closed while the retry timer ran: resolve instead of hanging
+
+    def _finish(self, job: _Job, result=None, error: Optional[BaseException] = None):
+        with self._cond:
+            self._inflight.pop(job.key, None)
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                wait = self.bucket.try_acquire()
+                if wait == float("inf"):
+                    _, _, job = heapq.heappop(self._heap)
+                elif wait > 0:
+                    self._cond.wait(wait)  # A higher-priority submit may arrive meanwhile
+                    continue
+                else:
+                    _, _, job = heapq.heappop(self._heap)
+                    telemetry.set_gauge("provider_queue_depth", len(self._heap), provider=self.name)
+                    self._pool.submit(self._run, job).add_done_callback(
+                        lambda run, job=job: run.cancelled() and self._finish(job, None))  # Cancelled by close()
+                    continue
+            telemetry.inc("provider_quota_exhausted_total", provider=self.name)
+            print(f"⚠️  {self.name}: daily quota spent, dropping {job.key}")
+            self._finish(job, None)
+
+    def _run(self, job: _Job):
+        try:
+            result = job.fn(job.attempt)
+        except RetryLater as e:
+            if job.attempt >= self.max_attempts:
+                print(f"❌ {self.name}: giving up on {job.key} after {job.attempt} attempts ({e})")
+                self._finish(job, None)
+                return
+            job.attempt += 1
+            timer = threading.Timer(e.delay, self._requeue, args=(job,))
+            timer.daemon = True
+            timer.start()
+            return
+        except Exception as e:
+            self._finish(job, error=e)
+            return
+        self._finish(job, result)
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, job in pending:
+            self._finish(job, None)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_SCHEDULERS: Dict[Tuple[str, str], RequestScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_scheduler(name: str, api_key: str, per_minute: float, per_day: Optional[int] = None,
+                  max_workers: int = 4, max_attempts: int = 3) -> RequestScheduler:
+    """One scheduler (and so one quota) per API key per process, however many engines share it."""
+    with _SCHEDULERS_LOCK:
+        scheduler = _SCHEDULERS.get((name, api_key))
+        if scheduler is None:
+            scheduler = _SCHEDULERS[(name, api_key)] = RequestScheduler(
+                TokenBucket(per_minute, per_day), max_workers=max_workers, max_attempts=max_attempts, name=name)
+        return scheduler
@@ -2,6 +2,8 @@ import yfinance as yf
 import pandas as pd
 from typing import Dict, List, Optional
 import time
+from strategy_lab import telemetry
+from strategy_lab.correlation import SectorCorrelations
 
 class YFinanceEngine:
     """
@@ -10,6 +12,11 @@ class YFinanceEngine:
     No Rate Limits. Real-time(ish).
     """
 
+    def __init__(self):
+        # Sector ETF bars: one bulk download per cycle, shared by every snapshot
+        self.sectors = SectorCorrelations(self.fetch_bars)
+
+    @telemetry.timed("provider_request_duration_seconds", provider="yfinance", call="snapshot")
     def fetch_snapshot(self, symbol: str) -> Dict:
         """
         Fetches EVERYTHING in one go to minimize network calls.
@@ -18,10 +25,14 @@ class YFinanceEngine:
                 "symbol": str,
                 "price": float,
                 "closes": List[float],    # 1-min closes (last 100)
+                "bars": Dict[str, List],  # 1-min OHLC: time (epoch s), open, high, low, close
                 "htf_closes": List[float], # Hourly closes (last 100)
                 "sma_200": float,
                 "current_iv": float,       # Estimated from options
-                "sector_closes": List[float] # QQQ closes
+                "sector_etf": str,           # e.g. SMH for AMD (config.SECTOR_ETFS)
+                "sector_closes": List[float], # Sector ETF 1-min closes (shared store)
+                "sector_corr": float,        # Rolling 1-min return correlation vs the ETF (None until warm)
+                "sector_beta": float         # ...and beta
             }
         """
         print(f"⚡ YF: Fetching Snapshot for {symbol}...")
@@ -38,10 +49,18 @@ class YFinanceEngine:
             df_intraday = ticker.history(period="5d", interval="1m")
             if df_intraday.empty:
                 print("⚠️ YF: No Intraday Data Found")
+                telemetry.inc("provider_errors_total", provider="yfinance", call="snapshot")
                 return {}
             
             closes = df_intraday['Close'].tolist()
             current_price = closes[-1]
+            bars = {
+                "time": [ts.timestamp() for ts in df_intraday.index],
+                "open": df_intraday['Open'].tolist(),
+                "high": df_intraday['High'].tolist(),
+                "low": df_intraday['Low'].tolist(),
+                "close": closes
+            }
             
             # Rich Stats (Calculated from available data to save API calls)
             # Assuming df_intraday covers at least the current trading day
@@ -61,29 +80,10 @@ class YFinanceEngine:
             sma_200 = sum(daily_closes[-200:]) / 200 if len(daily_closes) >= 200 else 0
             
             # D. IV Estimation (Volatility)
-            # We grab the nearest expiration option chain
-            current_iv = 0.50 # Default fallback
-            try:
-                exps = ticker.options
-                if exps:
-                    # Get front month chain (approx 30 days out usually ideal, but nearest is fine for 'current' state)
-                    chain = ticker.option_chain(exps[0])
-                    # Average IV of slightly OTM calls/puts?
-                    # Simplify: YF provides 'impliedVolatility' column in the chain DataFrame
-                    calls = chain.calls
-                    # Filter for near-the-money
-                    # strike ~ current_price
-                    atm_calls = calls.iloc[(calls['strike'] - current_price).abs().argsort()[:5]]
-                    iv_avg = atm_calls['impliedVolatility'].mean()
-                    if iv_avg > 0: current_iv = iv_avg
-            except Exception as e:
-                print(f"⚠️ YF: Options Data Error: {e}")
+            current_iv = self.fetch_current_iv(symbol, current_price, ticker=ticker)
 
-            # E. Sector Data (QQQ)
-            # We can cache this or fetch every time (it's fast)
-            qqq = yf.Ticker("QQQ")
-            df_qqq = qqq.history(period="5d", interval="1m")
-            sector_closes = df_qqq['Close'].tolist()
+            # E. Sector Data: ETF bars come from the shared store (fetched once per cycle)
+            sector = self.sectors.update(symbol, bars)
 
             return {
                 "symbol": symbol,
@@ -94,17 +94,76 @@ class YFinanceEngine:
                 "change_pct": float(change_pct_day),
                 "volume": int(volume_accumulated),
                 "closes": closes,
+                "bars": bars,
                 "htf_closes": htf_closes,
                 "sma_200": float(sma_200),
                 "current_iv": float(current_iv),
-                "sector_closes": sector_closes
+                **sector
             }
 
         except Exception as e:
             print(f"❌ YF Engine Error: {e}")
+            telemetry.inc("provider_errors_total", provider="yfinance", call="snapshot")
             return {}
 
 
+    def fetch_current_iv(self, symbol: str, current_price: float, ticker=None) -> float:
+        """
+        Average implied volatility of the 5 nearest-the-money calls in the front expiry.
+        Falls back to 0.50 when there is no chain.
+        """
+        current_iv = 0.50 # Default fallback
+        try:
+            ticker = ticker or yf.Ticker(symbol)
+            exps = ticker.options
+            if exps:
+                # Get front month chain (approx 30 days out usually ideal, but nearest is fine for 'current' state)
+                chain = ticker.option_chain(exps[0])
+                # YF provides 'impliedVolatility' column in the chain DataFrame
+                calls = chain.calls
+                # Filter for near-the-money (strike ~ current_price)
+                atm_calls = calls.iloc[(calls['strike'] - current_price).abs().argsort()[:5]]
+                iv_avg = atm_calls['impliedVolatility'].mean()
+                if iv_avg > 0: current_iv = iv_avg
+        except Exception as e:
+            print(f"⚠️ YF: Options Data Error: {e}")
+        return float(current_iv)
+
+    @telemetry.timed("provider_request_duration_seconds", provider="yfinance", call="bulk_bars")
+    def fetch_bars(self, symbols: List[str], interval: str, period: str) -> Dict[str, Dict[str, List]]:
+        """
+        OHLCV for many symbols in ONE download (yfinance batches + threads it).
+        Returns {symbol: {"time", "open", "high", "low", "close", "volume"}}; symbols with no data are omitted.
+        """
+        print(f"⚡ YF: Bulk {interval} bars for {len(symbols)} symbols ({period})...")
+        try:
+            df = yf.download(symbols, period=period, interval=interval, group_by="ticker",
+                             auto_adjust=True, threads=True, progress=False)
+        except Exception as e:
+            print(f"❌ YF Bulk Download Error: {e}")
+            telemetry.inc("provider_errors_total", provider="yfinance", call="bulk_bars")
+            return {}
+
+        bars = {}
+        for symbol in symbols:
+            try:
+                frame = df[symbol] if isinstance(df.columns, pd.MultiIndex) else df
+            except KeyError:
+                continue
+            frame = frame.dropna(subset=["Close"])
+            if frame.empty:
+                continue
+            bars[symbol] = {
+                "time": [ts.timestamp() for ts in frame.index],
+                "open": frame["Open"].tolist(),
+                "high": frame["High"].tolist(),
+                "low": frame["Low"].tolist(),
+                "close": frame["Close"].tolist(),
+                "volume": frame["Volume"].tolist(),
+            }
+        return bars
+
+    @telemetry.timed("provider_request_duration_seconds", provider="yfinance", call="macro")
     def fetch_macro_stats(self) -> Dict:
         """
         Fetches Global Macro Context (SPY, VIX).
@@ -134,6 +193,7 @@ class YFinanceEngine:
             }
         except Exception as e:
             print(f"⚠️ Error fetching Macro Stats: {e}")
+            telemetry.inc("provider_errors_total", provider="yfinance", call="macro")
             return {"vix": 20.0, "spy_trend": "BULLISH"} # Default to safe/neutral
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""
+Intrabar Exit Engine
+Evaluates target/stop levels for ALL open positions against EVERY new OHLC bar
+in one vectorized pass (positions x bars), instead of one close per cycle.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+TARGET_PCT = 0.02  # 2% Gain
+STOP_PCT = 0.01    # 1% Loss
+
+
+def find_exits(positions: List[Dict], bars: Dict, target_pct: float = TARGET_PCT, stop_pct: float = STOP_PCT) -> List[Dict]:
+    """
+    positions: [{'id', 'direction', 'entry_price', 'entry_ts'}, ...]
+    bars: {'time': [epoch s], 'open': [...], 'high': [...], 'low': [...], 'close': [...]}
+
+    Returns one fill per position that exits:
+        {'id', 'bar_index', 'bar_time', 'price', 'reason': 'TARGET' | 'STOP'}
+
+    Rules:
+    - Only bars that START at/after the entry are eligible (no look-back fills).
+    - A bar touching both levels is scored as a STOP (we can't know the intrabar path).
+    - Stops fill at the worse of the stop level and the bar open (gap-through);
+      targets fill exactly at the target level (no price improvement assumed).
+    """
+    if not positions or not bars or not len(bars.get("time", [])):
+        return []
+
+    t = np.asarray(bars["time"], dtype=float)
+    o = np.asarray(bars["open"], dtype=float)
+    h = np.asarray(bars["high"], dtype=float)
+    l = np.asarray(bars["low"], dtype=float)
+
+    entry = np.array([p["entry_price"] for p in positions], dtype=float)
+    sign = np.array([1.0 if p["direction"] == "BULLISH" else -1.0 if p["direction"] == "BEARISH" else 0.0
+                     for p in positions])
+    entry_ts = np.array([p.get("entry_ts") or 0.0 for p in positions], dtype=float)
+
+    target = (entry * (1 + sign * target_pct))[:, None]
+    stop = (entry * (1 - sign * stop_pct))[:, None]
+    is_long = (sign > 0)[:, None]
+
+    # (P, B) hit matrices
+    stop_hit = np.where(is_long, l[None, :] <= stop, h[None, :] >= stop)
+    target_hit = np.where(is_long, h[None, :] >= target, l[None, :] <= target)
+    eligible = (t[None, :] >= entry_ts[:, None]) & (sign != 0)[:, None]
+    stop_hit &= eligible
+    target_hit &= eligible
+
+    hit = stop_hit | target_hit
+    has_exit = hit.any(axis=1)
+    first = hit.argmax(axis=1)
+
+    fills = []
+    for i in np.nonzero(has_exit)[0]:
+        b = first[i]
+        if stop_hit[i, b]:
+            level = stop[i, 0]
+            # Gap through the stop -> filled at the (worse) open
+            price = min(o[b], level) if sign[i] > 0 else max(o[b], level)
+            reason = "STOP"
+        else:
+            price = target[i, 0]
+            reason = "TARGET"
+        fills.append({
+            "id": positions[i]["id"],
+            "bar_index": int(b),
+            "bar_time": float(t[b]),
+            "price": float(price),
+            "reason": reason,
+        })
+    return fills
@@ -0,0 +1,131 @@
+"""
+Dashboard Exporter
+Splits the cycle payload into sections and writes each to its own JS file:
+  - fast: price, verdict, signals, portfolio   -> js/strategy_data.js    (window.STRATEGY_DATA)
+  - slow: backtest history + stats             -> js/strategy_history.js (window.STRATEGY_HISTORY)
+plus js/strategy_manifest.json with one content hash per section, so the UI
+polls the tiny manifest and only reloads the sections that changed.
+
+Writes are atomic (temp file + os.replace) and skipped when the content is unchanged.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional
+
+from strategy_lab import telemetry
+
+JS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'js')
+MANIFEST_FILE = "strategy_manifest.json"
+
+# section -> (file name, JS global, payload keys)
+SECTIONS = {
+    "fast": ("strategy_data.js", "STRATEGY_DATA",
+             ("timestamp", "symbol", "market_stats", "signals", "portfolio", "best_bet", "judge_verdict", "watchlist")),
+    "slow": ("strategy_history.js", "STRATEGY_HISTORY",
+             ("backtest_history", "backtest_stats")),
+}
+
+# Keys that change every cycle without changing what the dashboard shows
+VOLATILE_KEYS = ("timestamp",)
+
+# Bulky per-signal fields the dashboard never renders
+SIGNAL_DROP_KEYS = ("features_matched",)
+
+
+def _compact_signal(signal: Optional[Dict]) -> Optional[Dict]:
+    if not signal:
+        return signal
+    return {k: v for k, v in signal.items() if k not in SIGNAL_DROP_KEYS}
+
+
+def compact_payload(output_data: Dict) -> Dict:
+    """Shallow copy of the cycle payload with signals stripped to what the dashboard renders."""
+    data = dict(output_data)
+    if "signals" in data:
+        data["signals"] = [_compact_signal(s) for s in data["signals"] or []]
+    if "best_bet" in data:
+        data["best_bet"] = _compact_signal(data["best_bet"])
+    return data
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# What open() would have given the file. mkstemp creates 0600, which os.replace keeps,
+# and a web server running as another user could no longer read the exports.
+FILE_MODE = 0o666 & ~_umask()
+
+
+def atomic_write(path: str, content: str):
+    """Readers see either the old file or the new one, never a partial write."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class DashboardExporter:
+    """
+    The Courier.
+    Remembers the last hash per section (seeded from the manifest on disk, so a
+    restart doesn't rewrite unchanged files).
+    """
+
+    def __init__(self, js_dir: str = JS_DIR):
+        self.js_dir = js_dir
+        self.manifest_path = os.path.join(js_dir, MANIFEST_FILE)
+        self.manifest: Dict = {"sections": {}}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def export(self, output_data: Dict) -> Dict[str, bool]:
+        """Writes changed sections, then the manifest. Returns {section: written}."""
+        data = compact_payload(output_data)
+
+        written = {}
+        for section, (filename, js_global, keys) in SECTIONS.items():
+            payload = {k: data[k] for k in keys if k in data}
+            if not payload:
+                written[section] = False
+                continue
+
+            stable = _dumps({k: v for k, v in payload.items() if k not in VOLATILE_KEYS})
+            digest = hashlib.sha1(stable.encode("utf-8")).hexdigest()[:16]
+            if self.manifest["sections"].get(section, {}).get("hash") == digest:
+                telemetry.inc("export_skipped_total", section=section)
+                written[section] = False
+                continue
+
+            atomic_write(os.path.join(self.js_dir, filename), f"window.{js_global} = {_dumps(payload)};")
+            self.manifest["sections"][section] = {
+                "file": filename,
+                "hash": digest,
+                "updated": payload.get("timestamp") or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            telemetry.inc("export_writes_total", section=section)
+            written[section] = True
+
+        if any(written.values()):
+            # Last, so every hash in the manifest points at a file that is already in place
+            atomic_write(self.manifest_path, _dumps(self.manifest))
+        return written
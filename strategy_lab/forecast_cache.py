@@ -0,0 +1,165 @@
+"""
+Forecast Cache
+Two tiers in front of AlphaVantageEngine's consensus forecasts:
+  1. in-memory LRU (symbol -> forecast, fetched_at)
+  2. the consensus_forecasts table (survives restarts, shared by the bot and the web process)
+
+Per symbol:
+  age < ttl                  -> served as is
+  ttl <= age < stale_secs    -> served as is, refreshed in the background (stale-while-revalidate)
+  older / never fetched      -> fetched now (all such symbols in one concurrent batch)
+
+Forecasts scored without their data ("missing_data") are served but never stored.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from strategy_lab import storage, telemetry
+from strategy_lab.config import FORECAST_CACHE_SETTINGS
+from strategy_lab.data.request_scheduler import LOW, NORMAL
+
+# compute(symbols, priority) -> one forecast per symbol, same order
+ComputeFn = Callable[[List[str], int], List[Dict]]
+
+
+class ForecastCache:
+    """
+    The Almanac.
+    """
+
+    def __init__(self, compute: ComputeFn, db_path: str = storage.DEFAULT_DB_PATH,
+                 settings: Optional[Dict] = None, clock: Callable[[], float] = time.time):
+        self.compute = compute
+        self.db_path = db_path
+        self.settings = {**FORECAST_CACHE_SETTINGS, **(settings or {})}
+        self.clock = clock
+        self._lru: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ForecastRefresh")
+
+    # --- Tiers ---
+
+    def _from_memory(self, symbol: str) -> Optional[Tuple[float, Dict]]:
+        with self._lock:
+            entry = self._lru.get(symbol)
+            if entry is not None:
+                self._lru.move_to_end(symbol)
+            return entry
+
+    def _remember(self, symbol: str, fetched_at: float, forecast: Dict):
+        with self._lock:
+            self._lru[symbol] = (fetched_at, forecast)
+            self._lru.move_to_end(symbol)
+            while len(self._lru) > self.settings["max_entries"]:
+                self._lru.popitem(last=False)
+
+    def _from_db(self, symbol: str) -> Optional[Tuple[float, Dict]]:
+        row = storage.get_connection(self.db_path).execute('''
+            SELECT CAST(strftime('%s', timestamp) AS REAL), details
+            FROM consensus_forecasts WHERE symbol = ? ORDER BY id DESC LIMIT 1
+        ''', (symbol,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        try:
+            entry = (row[0], json.loads(row[1]))
+        except (TypeError, ValueError):
+            return None
+        self._remember(symbol, *entry)
+        return entry
+
+    def _store(self, forecasts: List[Tuple[str, Dict]], fetched_at: float):
+        # Scored without data (failed request, spent quota): returned to the caller, never cached,
+        # so a failed refresh leaves the previous entry in place
+        incomplete = [symbol for symbol, f in forecasts if f.get("missing_data")]
+        if incomplete:
+            telemetry.inc("forecast_cache_total", len(incomplete), result="incomplete")
+            forecasts = [(symbol, f) for symbol, f in forecasts if not f.get("missing_data")]
+        if not forecasts:
+            return
+        for symbol, forecast in forecasts:
+            self._remember(symbol, fetched_at, forecast)
+        try:
+            with storage.transaction(self.db_path) as conn:
+                conn.executemany('''
+                    INSERT INTO consensus_forecasts (timestamp, symbol, score, details)
+                    VALUES (datetime(?, 'unixepoch'), ?, ?, ?)
+                ''', [(int(fetched_at), symbol, f.get("consensus_score"), json.dumps(f, default=str))
+                      for symbol, f in forecasts])
+        except Exception as e:
+            print(f"⚠️  Could not persist forecasts: {e}")
+
+    def _fetch(self, symbols: List[str], priority: int) -> List[Dict]:
+        fetched_at = self.clock()
+        forecasts = self.compute(symbols, priority)
+        self._store(list(zip(symbols, forecasts)), fetched_at)
+        return forecasts
+
+    # --- Background refresh ---
+
+    def _refresh(self, symbols: List[str]):
+        try:
+            self._fetch(symbols, LOW)  # Behind anything a user is waiting for
+        except Exception as e:
+            print(f"⚠️  Forecast refresh failed for {', '.join(symbols)}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(symbols)
+
+    def _schedule_refresh(self, symbols: List[str]):
+        with self._lock:
+            symbols = [s for s in symbols if s not in self._refreshing]
+            self._refreshing.update(symbols)
+        if symbols:
+            self._refresher.submit(self._refresh, symbols)
+
+    # --- Public ---
+
+    def get_many(self, symbols: List[str], priority: int = NORMAL) -> List[Dict]:
+        """One forecast per symbol (same order)."""
+        now = self.clock()
+        found: Dict[str, Dict] = {}
+        stale, missing = [], []
+        for symbol in dict.fromkeys(symbols):
+            entry = self._from_memory(symbol)
+            tier = "memory"
+            if entry is None:
+                entry, tier = self._from_db(symbol), "db"
+            age = now - entry[0] if entry else None
+            if entry is None or age >= self.settings["stale_secs"]:
+                missing.append(symbol)
+                continue
+            found[symbol] = entry[1]
+            if age >= self.settings["ttl_secs"]:
+                stale.append(symbol)
+                telemetry.inc("forecast_cache_total", result="stale")
+            else:
+                telemetry.inc("forecast_cache_total", result=f"hit_{tier}")
+
+        if stale:
+            self._schedule_refresh(stale)
+        if missing:
+            telemetry.inc("forecast_cache_total", len(missing), result="miss")
+            found.update(zip(missing, self._fetch(missing, priority)))
+        return [found[symbol] for symbol in symbols]
+
+    def get(self, symbol: str, priority: int = NORMAL) -> Dict:
+        return self.get_many([symbol], priority)[0]
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Blocks until background refreshes have finished (tests, shutdown)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._refreshing:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
@@ -1,41 +1,92 @@
 import sqlite3
-from typing import List, Dict
+import threading
+from typing import Callable, List, Dict
+from strategy_lab import storage, aggregates, telemetry
+
+# --- RESULT CACHE ---
+# backtest_history only changes when HistoricalBacktester runs, so the live cycle and
+# the API serve it from memory. Revalidating a hit touches no table:
+#   PRAGMA data_version  -> moves when any OTHER connection commits
+#   conn.total_changes   -> moves when THIS connection writes
+# Only if one of those moved do we read data_generation (bumped by trigger on every
+# backtest_history write, see migrations v6) and recompute if the generation moved too.
+_cache: Dict[tuple, Dict] = {}
+_cache_lock = threading.Lock()
+
+def _generation(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT generation FROM data_generation WHERE name = 'backtest_history'").fetchone()
+    return row[0] if row else -1
+
+def _cached(db_path: str, key: tuple, compute: Callable[[], object]):
+    conn = storage.get_connection(db_path)
+    stamp = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+
+    with _cache_lock:
+        entry = _cache.get((db_path, key))
+    if entry is not None:
+        seen = entry["stamps"].get(id(conn))
+        if seen is not None and seen[0] is conn and seen[1] == stamp:
+            telemetry.inc("history_cache_total", result="hit")
+            return entry["value"]
+        if _generation(conn) == entry["generation"] and storage.file_identity(db_path) == entry["identity"]:
+            entry["stamps"][id(conn)] = (conn, stamp)
+            telemetry.inc("history_cache_total", result="revalidated")
+            return entry["value"]
+
+    generation = _generation(conn)  # Read BEFORE computing: a racing write just forces another miss
+    value = compute()
+    with _cache_lock:
+        _cache[(db_path, key)] = {
+            "generation": generation,
+            "identity": storage.file_identity(db_path),
+            "value": value,
+            "stamps": {id(conn): (conn, stamp)},
+        }
+    telemetry.inc("history_cache_total", result="miss")
+    return value
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
 
 def get_backtest_history(db_path="data_lake.db", limit=100) -> List[Dict]:
     """
-    Fetch backtest history for UI display
+    Fetch backtest history for UI display (cached until the next backtest write)
     """
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+    return _cached(db_path, ("history", limit), lambda: _query_backtest_history(db_path, limit))
+
+def _query_backtest_history(db_path: str, limit: int) -> List[Dict]:
+    conn = storage.get_connection(db_path)
     c = conn.cursor()
+    c.row_factory = sqlite3.Row  # Return rows as dictionaries
     
-    c.execute(f'''
-        SELECT 
-            timestamp,
-            symbol,
-            price,
-            day_high,
-            day_low,
-            volume,
-            iv,
-            vix,
-            spy_trend,
-            sector_trend,
-            verdict,
-            recommended_strategy,
-            strategy_direction,
-            confidence,
-            outcome_1d,
-            outcome_3d,
-            outcome_7d,
-            market_regime
-        FROM backtest_history
-        ORDER BY timestamp DESC
-        LIMIT {limit}
-    ''')
+    with telemetry.timer("db_duration_seconds", op="backtest_history"):
+        c.execute(f'''
+            SELECT 
+                timestamp,
+                symbol,
+                price,
+                day_high,
+                day_low,
+                volume,
+                iv,
+                vix,
+                spy_trend,
+                sector_trend,
+                verdict,
+                recommended_strategy,
+                strategy_direction,
+                confidence,
+                outcome_1d,
+                outcome_3d,
+                outcome_7d,
+                market_regime
+            FROM backtest_history
+            ORDER BY timestamp DESC
+            LIMIT {limit}
+        ''')
     
-    rows = c.fetchall()
-    conn.close()
+        rows = c.fetchall()
     
     # Convert to list of dicts
     return [dict(row) for row in rows]
@@ -43,48 +94,6 @@ def get_backtest_history(db_path="data_lake.db", limit=100) -> List[Dict]:
 def get_backtest_stats(db_path="data_lake.db") -> Dict:
     """
     Get summary statistics for backtest history
+    (running totals in strategy_lab.aggregates, cached until the next backtest write)
     """
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    stats = {}
-    
-    # Total decisions
-    c.execute("SELECT COUNT(*) FROM backtest_history")
-    stats['total_decisions'] = c.fetchone()[0]
-    
-    # Strategy performance
-    c.execute('''
-        SELECT 
-            recommended_strategy,
-            COUNT(*) as count,
-            ROUND(AVG(outcome_7d), 2) as avg_outcome,
-            ROUND(SUM(CASE WHEN outcome_7d > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 1) as win_rate
-        FROM backtest_history
-        WHERE recommended_strategy IS NOT NULL
-        GROUP BY recommended_strategy
-        ORDER BY win_rate DESC
-    ''')
-    
-    stats['strategies'] = []
-    for row in c.fetchall():
-        stats['strategies'].append({
-            'name': row[0],
-            'count': row[1],
-            'avg_outcome': row[2],
-            'win_rate': row[3]
-        })
-    
-    # Regime distribution
-    c.execute('''
-        SELECT market_regime, COUNT(*) as days
-        FROM backtest_history
-        GROUP BY market_regime
-    ''')
-    
-    stats['regimes'] = {}
-    for row in c.fetchall():
-        stats['regimes'][row[0]] = row[1]
-    
-    conn.close()
-    return stats
+    return _cached(db_path, ("stats",), lambda: aggregates.get_backtest_summary(db_path))
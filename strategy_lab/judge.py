@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 
 class TheJudge:
     """
@@ -6,6 +6,21 @@ class TheJudge:
     Translates technical feature tags into a human-readable Verdict.
     """
 
+    # Verdict label -> signed conviction (BLOCKED maps to None: never trade)
+    STRENGTH = {
+        "STRONG BUY": 2, "BUY": 1, "NEUTRAL": 0, "CAUTION": 0,
+        "SELL": -1, "STRONG SELL": -2, "BLOCKED": None
+    }
+
+    @staticmethod
+    def verdict_strength(verdict: str) -> Optional[int]:
+        """
+        Parses 'VERDICT: <LABEL> | ...' back into a number for ranking.
+        +2 (STRONG BUY) .. -2 (STRONG SELL), None if BLOCKED.
+        """
+        label = verdict.split("|")[0].replace("VERDICT:", "").strip()
+        return TheJudge.STRENGTH.get(label, 0)
+
     @staticmethod
     def delimit_verdict(features: Dict, macro: Dict = {}) -> str:
         """
@@ -79,7 +94,7 @@ class TheJudge:
         # 4. The Tide (Sector)
         sector = features.get("sector_correlation", "UNKNOWN")
         if sector == "AGAINST_SECTOR":
-            verdict.append("Note: Stock is fighting the Sector Trend (QQQ). Reduced probability.")
+            verdict.append("Note: Stock is fighting its Sector Trend. Reduced probability.")
 
         # 5. Social Hype (The Meme Factor)
         sentiment = features.get("sentiment", {})
@@ -0,0 +1,118 @@
+"""
+Live Feed
+Server-sent events for the dashboard. After every cycle the bot publishes its
+state once; only the top-level sections that changed are serialized (once) into
+a delta and kept in a bounded ring buffer. Every connected client is handed the
+same pre-encoded bytes, so N dashboards cost one serialization per cycle.
+
+Late joiners get one full snapshot, then deltas. A client reconnecting with
+Last-Event-ID is replayed from the ring if its position is still buffered.
+"""
+import json
+import threading
+from collections import deque
+from typing import Dict, Iterator, Optional
+
+from strategy_lab import telemetry
+from strategy_lab.exporter import VOLATILE_KEYS, compact_payload
+
+RING_SIZE = 64
+HEARTBEAT_SECS = 15
+
+
+def _frame(seq: int, event: str, data: str) -> bytes:
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+class LiveFeed:
+    """
+    The Broadcaster.
+    publish() is called from the bot thread; stream() generators run in web threads.
+    """
+
+    def __init__(self, ring_size: int = RING_SIZE, heartbeat_secs: float = HEARTBEAT_SECS):
+        self.heartbeat_secs = heartbeat_secs
+        self._ring: deque = deque(maxlen=ring_size)  # (seq, frame bytes) deltas
+        self._state: Dict = {}
+        self._seq = 0
+        self._snapshot: Optional[bytes] = None  # Lazily encoded, once per seq
+        self._state_json: Optional[bytes] = None
+        self._cond = threading.Condition()
+        self.clients = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, state: Dict) -> Optional[Dict]:
+        """Records a new cycle state. Returns the delta (None if nothing changed)."""
+        state = compact_payload(state)
+        delta = {k: v for k, v in state.items() if self._state.get(k) != v}
+        if not any(k not in VOLATILE_KEYS for k in delta):
+            return None
+
+        encoded = json.dumps(delta, separators=(",", ":"), default=str)
+        with self._cond:
+            self._seq += 1
+            self._state = {**self._state, **state}
+            self._ring.append((self._seq, _frame(self._seq, "delta", encoded)))
+            self._snapshot = self._state_json = None
+            self._cond.notify_all()
+        telemetry.inc("live_feed_deltas_total")
+        return delta
+
+    def state_json(self) -> bytes:
+        """Current merged state as JSON bytes (encoded once per seq)."""
+        with self._cond:
+            if self._state_json is None:
+                self._state_json = json.dumps(self._state, separators=(",", ":"), default=str).encode("utf-8")
+            return self._state_json
+
+    def _snapshot_frame(self) -> bytes:
+        # Caller holds the lock
+        if self._snapshot is None:
+            self._snapshot = _frame(self._seq, "snapshot", json.dumps(self._state, separators=(",", ":"), default=str))
+        return self._snapshot
+
+    def _catch_up(self, last_seq: Optional[int]) -> Iterator[bytes]:
+        """Frames a client at `last_seq` needs to be current. Caller holds the lock."""
+        oldest = self._ring[0][0] if self._ring else self._seq + 1
+        if last_seq is not None and oldest - 1 <= last_seq <= self._seq:
+            return [frame for seq, frame in self._ring if seq > last_seq]
+        return [self._snapshot_frame()] if self._seq else []
+
+    def stream(self, last_event_id: Optional[str] = None, stop: Optional[threading.Event] = None) -> Iterator[bytes]:
+        """SSE byte stream for one client; runs until the client disconnects (or `stop` is set)."""
+        try:
+            last_seq = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_seq = None
+
+        with self._cond:
+            self.clients += 1
+            telemetry.set_gauge("live_feed_clients", self.clients)
+        try:
+            yield f"retry: 3000\n\n".encode("utf-8")
+            with self._cond:
+                frames = self._catch_up(last_seq)
+                last_seq = self._seq
+            for frame in frames:
+                yield frame
+
+            while not (stop and stop.is_set()):
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq > last_seq, timeout=self.heartbeat_secs)
+                    frames = self._catch_up(last_seq) if self._seq > last_seq else []
+                    last_seq = self._seq
+                if frames:
+                    for frame in frames:
+                        yield frame
+                else:
+                    yield b": keepalive\n\n"  # Detects dead clients, keeps proxies from timing out
+        finally:
+            with self._cond:
+                self.clients -= 1
+                telemetry.set_gauge("live_feed_clients", self.clients)
+
+
+FEED = LiveFeed()
@@ -165,6 +165,10 @@ class MarketFeatureEngine:
         else:
             features["sector_correlation"] = "UNKNOWN"
 
+        # Numeric sector alignment (rolling return correlation / beta), None until known
+        features["sector_corr"] = snapshot.get("sector_corr")
+        features["sector_beta"] = snapshot.get("sector_beta")
+
         features["sentiment"] = snapshot.get("sentiment", {"score": 0, "direction": "NEUTRAL"})
 
         # --- Safety Net Data ---
@@ -0,0 +1,325 @@
+"""
+Schema Migrations
+Owns the one canonical schema of data_lake.db.
+Versions are tracked in PRAGMA user_version; each step runs exactly once, in order.
+"""
+import sqlite3
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from strategy_lab import storage, aggregates, bar_store
+
+# --- CANONICAL TABLES ---
+# Current shape of every table, i.e. after ALL steps have run. Migration steps never
+# read this: each one freezes its own DDL, so what "version N" means can't drift when
+# a later version adds a column. Column specs must stay addable via ALTER TABLE
+# (constant defaults only); _ensure_table patches older/partial tables with them.
+TABLES: Dict[str, List[Tuple[str, str]]] = {
+    "signals": [
+        ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        ("strategy_id", "TEXT"),
+        ("symbol", "TEXT"),
+        ("direction", "TEXT"),
+        ("features", "TEXT"),
+        ("timestamp", "TEXT"),
+        ("processed", "BOOLEAN DEFAULT 0"),
+    ],
+    "trades": [
+        ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        ("signal_id", "INTEGER"),
+        ("strategy_id", "TEXT"),
+        ("symbol", "TEXT"),
+        ("direction", "TEXT"),
+        ("status", "TEXT"),  # OPEN, CLOSED
+        ("entry_price", "REAL"),
+        ("exit_price", "REAL"),
+        ("entry_date", "TEXT"),
+        ("exit_date", "TEXT"),
+        ("pnl", "REAL"),
+        ("pnl_pct", "REAL"),
+        ("context", "TEXT"),
+        ("lesson", "TEXT"),
+        ("timestamp", "TEXT"),
+        ("exit_reason", "TEXT"),  # TARGET, STOP (v4)
+        ("fill_bar", "TEXT"),     # Start time of the bar the exit filled on (v4)
+    ],
+    "backtest_history": [
+        ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        ("timestamp", "TEXT"),
+        ("symbol", "TEXT"),
+        ("price", "REAL"),
+        ("day_high", "REAL"),
+        ("day_low", "REAL"),
+        ("volume", "INTEGER"),
+        ("iv", "REAL"),
+        ("vix", "REAL"),
+        ("spy_trend", "TEXT"),
+        ("sector_trend", "TEXT"),
+        ("verdict", "TEXT"),
+        ("recommended_strategy", "TEXT"),
+        ("strategy_direction", "TEXT"),
+        ("confidence", "REAL"),
+        ("outcome_1d", "REAL"),
+        ("outcome_3d", "REAL"),
+        ("outcome_7d", "REAL"),
+        ("market_regime", "TEXT"),
+    ],
+    "raw_market_data": [
+        ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        ("timestamp", "DATETIME"),
+        ("function_name", "TEXT"),
+        ("symbol", "TEXT"),
+        ("data", "JSON"),
+    ],
+    "consensus_forecasts": [
+        ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        ("timestamp", "DATETIME"),
+        ("symbol", "TEXT"),
+        ("score", "REAL"),
+        ("details", "JSON"),
+    ],
+    "alert_state": [
+        ("key", "TEXT PRIMARY KEY"),  # Dedupe channel, e.g. 'signal'
+        ("value", "TEXT"),            # Last thing alerted on that channel (strategy name)
+        ("sent_at", "REAL"),          # Epoch seconds
+    ],
+    "data_generation": [
+        ("name", "TEXT PRIMARY KEY"),                 # Table whose writes are counted
+        ("generation", "INTEGER NOT NULL DEFAULT 0"),  # Bumped by trigger on every write
+    ],
+}
+
+# Columns whose DEFAULT is only allowed at CREATE time
+CREATE_ONLY_DEFAULTS = {
+    ("raw_market_data", "timestamp"): "DEFAULT CURRENT_TIMESTAMP",
+    ("consensus_forecasts", "timestamp"): "DEFAULT CURRENT_TIMESTAMP",
+}
+
+
+def _existing_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _ensure_table(conn: sqlite3.Connection, table: str, columns: List[Tuple[str, str]]):
+    """CREATE the table if missing, otherwise ADD any canonical column it lacks."""
+    existing = _existing_columns(conn, table)
+    if not existing:
+        defs = []
+        for name, spec in columns:
+            extra = CREATE_ONLY_DEFAULTS.get((table, name))
+            defs.append(f"{name} {spec} {extra}" if extra else f"{name} {spec}")
+        conn.execute(f"CREATE TABLE {table} ({', '.join(defs)})")
+        return
+
+    for name, spec in columns:
+        if name not in existing and "PRIMARY KEY" not in spec:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {spec}")
+
+
+# --- MIGRATION STEPS ---
+
+def _v1_canonical_schema(conn: sqlite3.Connection):
+    """Unify the trades/signals definitions previously split across three modules."""
+    v1_tables = {
+        "signals": [
+            ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("strategy_id", "TEXT"),
+            ("symbol", "TEXT"),
+            ("direction", "TEXT"),
+            ("features", "TEXT"),
+            ("timestamp", "TEXT"),
+            ("processed", "BOOLEAN DEFAULT 0"),
+        ],
+        "trades": [
+            ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("signal_id", "INTEGER"),
+            ("strategy_id", "TEXT"),
+            ("symbol", "TEXT"),
+            ("direction", "TEXT"),
+            ("status", "TEXT"),
+            ("entry_price", "REAL"),
+            ("exit_price", "REAL"),
+            ("entry_date", "TEXT"),
+            ("exit_date", "TEXT"),
+            ("pnl", "REAL"),
+            ("pnl_pct", "REAL"),
+            ("context", "TEXT"),
+            ("lesson", "TEXT"),
+            ("timestamp", "TEXT"),
+        ],
+        "backtest_history": [
+            ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("timestamp", "TEXT"),
+            ("symbol", "TEXT"),
+            ("price", "REAL"),
+            ("day_high", "REAL"),
+            ("day_low", "REAL"),
+            ("volume", "INTEGER"),
+            ("iv", "REAL"),
+            ("vix", "REAL"),
+            ("spy_trend", "TEXT"),
+            ("sector_trend", "TEXT"),
+            ("verdict", "TEXT"),
+            ("recommended_strategy", "TEXT"),
+            ("strategy_direction", "TEXT"),
+            ("confidence", "REAL"),
+            ("outcome_1d", "REAL"),
+            ("outcome_3d", "REAL"),
+            ("outcome_7d", "REAL"),
+            ("market_regime", "TEXT"),
+        ],
+        "raw_market_data": [
+            ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("timestamp", "DATETIME"),
+            ("function_name", "TEXT"),
+            ("symbol", "TEXT"),
+            ("data", "JSON"),
+        ],
+        "consensus_forecasts": [
+            ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+            ("timestamp", "DATETIME"),
+            ("symbol", "TEXT"),
+            ("score", "REAL"),
+            ("details", "JSON"),
+        ],
+    }
+    for table, columns in v1_tables.items():
+        _ensure_table(conn, table, columns)
+
+
+def _v2_hot_query_indexes(conn: sqlite3.Connection):
+    """Covering indexes for the per-cycle and dashboard access paths."""
+    # Open positions (partial index: only the handful of OPEN rows are indexed)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trades_open
+        ON trades(signal_id, id, strategy_id, symbol, entry_price, entry_date)
+        WHERE status = 'OPEN'
+    ''')
+    # Closed history / recent losses: WHERE status='CLOSED' ORDER BY exit_date DESC
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trades_status_exit
+        ON trades(status, exit_date, pnl)
+    ''')
+    # Scoreboard: WHERE status='CLOSED' GROUP BY strategy_id -> SUM/AVG(pnl)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_trades_status_strategy
+        ON trades(status, strategy_id, pnl)
+    ''')
+    # History Lab: ORDER BY timestamp DESC LIMIT n
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_backtest_timestamp
+        ON backtest_history(timestamp)
+    ''')
+    # History stats: GROUP BY recommended_strategy -> AVG(outcome_7d)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_backtest_strategy
+        ON backtest_history(recommended_strategy, outcome_7d)
+    ''')
+    # Regime distribution: GROUP BY market_regime
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_backtest_regime
+        ON backtest_history(market_regime)
+    ''')
+
+
+def _v3_running_aggregates(conn: sqlite3.Connection):
+    """Running totals for portfolio/strategy/backtest stats, backfilled from history."""
+    for ddl in aggregates.SCHEMA:
+        conn.execute(ddl)
+    aggregates.rebuild_in_transaction(conn)
+
+
+def _v4_exit_fill_columns(conn: sqlite3.Connection):
+    """trades.exit_reason / trades.fill_bar for intrabar exit simulation."""
+    _ensure_table(conn, "trades", [("exit_reason", "TEXT"), ("fill_bar", "TEXT")])
+
+
+def _v5_alert_state(conn: sqlite3.Connection):
+    """Persisted Discord dedupe state (replaces the in-process LAST_ALERT global)."""
+    _ensure_table(conn, "alert_state", [("key", "TEXT PRIMARY KEY"), ("value", "TEXT"), ("sent_at", "REAL")])
+
+
+def _v6_backtest_generation(conn: sqlite3.Connection):
+    """Generation counter for backtest_history, bumped by triggers so every writer invalidates caches."""
+    _ensure_table(conn, "data_generation", [("name", "TEXT PRIMARY KEY"),
+                                            ("generation", "INTEGER NOT NULL DEFAULT 0")])
+    conn.execute("INSERT OR IGNORE INTO data_generation (name, generation) VALUES ('backtest_history', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_backtest_history_{event.lower()}_generation
+            AFTER {event} ON backtest_history
+            BEGIN
+                UPDATE data_generation SET generation = generation + 1 WHERE name = 'backtest_history';
+            END
+        ''')
+
+
+def _v7_consensus_forecast_lookup(conn: sqlite3.Connection):
+    """Forecast cache: latest row per symbol (WHERE symbol = ? ORDER BY id DESC LIMIT 1)."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consensus_symbol
+        ON consensus_forecasts(symbol)
+    ''')
+
+
+def _v8_market_bars(conn: sqlite3.Connection):
+    """Local OHLCV store for the universe scan (see bar_store.py)."""
+    for ddl in bar_store.SCHEMA:
+        conn.execute(ddl)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "canonical schema", _v1_canonical_schema),
+    (2, "hot query indexes", _v2_hot_query_indexes),
+    (3, "running aggregates", _v3_running_aggregates),
+    (4, "exit fill columns", _v4_exit_fill_columns),
+    (5, "alert state", _v5_alert_state),
+    (6, "backtest generation counter", _v6_backtest_generation),
+    (7, "consensus forecast lookup index", _v7_consensus_forecast_lookup),
+    (8, "market bars", _v8_market_bars),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(db_path: str = storage.DEFAULT_DB_PATH) -> int:
+    conn = storage.get_connection(db_path)
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path: str = storage.DEFAULT_DB_PATH, target: Optional[int] = None) -> int:
+    """
+    Brings db_path up to `target` (default: latest). Safe to call on every startup
+    and from several processes: BEGIN IMMEDIATE serializes concurrent migrators.
+    Returns the resulting schema version.
+    """
+    target = LATEST_VERSION if target is None else target
+    conn = storage.get_connection(db_path)
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    conn.commit()  # Close any implicit transaction before taking the write lock
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for step_version, name, step in MIGRATIONS:
+            if version < step_version <= target:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {step_version}")
+                version = step_version
+                print(f"🗄️  Schema migrated to v{step_version} ({name})")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.execute("PRAGMA optimize")
+    return version
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else storage.DEFAULT_DB_PATH
+    before = get_version(path)
+    after = migrate(path)
+    print(f"{path}: schema v{before} -> v{after} (latest v{LATEST_VERSION})")
@@ -0,0 +1,236 @@
+"""
+Discord Notifier
+The trading loop only ever enqueues; a background worker does the HTTP:
+  - bounded queue (full = drop + count, never block a cycle)
+  - one pooled requests.Session
+  - up to 10 embeds batched into a single webhook message
+  - Discord rate limits honoured: X-RateLimit-Remaining / Reset-After buckets and 429 retry_after
+  - dedupe state ("did we already alert this strategy?") persisted in alert_state
+"""
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from strategy_lab import storage, migrations, telemetry
+from strategy_lab.config import NOTIFIER_SETTINGS
+
+
+class DiscordNotifier:
+    """
+    The Messenger.
+    """
+
+    def __init__(self, webhook_url: Optional[str], db_path: str = storage.DEFAULT_DB_PATH,
+                 session: Optional[requests.Session] = None, settings: Optional[Dict] = None):
+        self.webhook_url = webhook_url
+        self.db_path = db_path
+        self.settings = {**NOTIFIER_SETTINGS, **(settings or {})}
+
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session = session
+
+        migrations.migrate(db_path)
+        # _sent: confirmed deliveries (mirrors alert_state); _dedupe: those plus alerts still in flight
+        self._sent: Dict[str, Tuple[str, float]] = {
+            key: (value, sent_at) for key, value, sent_at in
+            storage.get_connection(db_path).execute("SELECT key, value, sent_at FROM alert_state")
+        }
+        self._dedupe: Dict[str, Tuple[str, float]] = dict(self._sent)
+        self._dedupe_lock = threading.Lock()
+
+        self._queue: "queue.Queue[Optional[Tuple[Dict, str, Optional[tuple]]]]" = queue.Queue(maxsize=self.settings["max_queue"])
+        self._blocked_until = 0.0  # Rate-limit bucket exhausted until this monotonic time
+        self._worker = threading.Thread(target=self._run, name="DiscordNotifier", daemon=True)
+        self._worker.start()
+
+    # --- Hot path (called from the cycle) ---
+
+    def enqueue(self, embed: Dict, kind: str, dedupe: Optional[tuple] = None) -> bool:
+        """Never blocks. Returns False if there is no webhook or the queue is full."""
+        if not self.webhook_url:
+            return False
+        try:
+            self._queue.put_nowait((embed, kind, dedupe))
+        except queue.Full:
+            telemetry.inc("discord_dropped_total", kind=kind)
+            print(f"⚠️  Discord queue full, dropped {kind} alert")
+            return False
+        telemetry.set_gauge("discord_queue_depth", self._queue.qsize())
+        return True
+
+    def notify_once(self, key: str, value: str, embed: Dict, kind: str,
+                    cooldown_secs: Optional[float] = None) -> bool:
+        """
+        Enqueues unless `value` was already alerted on channel `key` within the cooldown.
+        The decision is made from memory: the alert holds its slot while in flight, keeps it
+        (persisted) once sent, and gives it back if it is dropped or fails to send.
+        """
+        cooldown = self.settings["signal_cooldown_secs"] if cooldown_secs is None else cooldown_secs
+        now = time.time()
+        with self._dedupe_lock:
+            last_value, last_sent = self._dedupe.get(key, (None, 0.0))
+            if value == last_value and now - last_sent <= cooldown:
+                print(f"Skipping Duplicate Alert (Last Sent: {int(now - last_sent)}s ago)")
+                return False
+            self._dedupe[key] = (value, now)
+        if self.enqueue(embed, kind, dedupe=(key, value, now)):
+            return True
+        self._release([(key, value, now)])
+        return False
+
+    def _release(self, dedupes: List[tuple]):
+        """Undelivered: back to the last confirmed alert, unless a newer one took the slot."""
+        with self._dedupe_lock:
+            for key, value, sent_at in dedupes:
+                if self._dedupe.get(key) != (value, sent_at):
+                    continue
+                if key in self._sent:
+                    self._dedupe[key] = self._sent[key]
+                else:
+                    del self._dedupe[key]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until everything queued so far has been sent (or dropped)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        self.flush(timeout)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._worker.join(timeout)
+
+    # --- Worker ---
+
+    def _next_batch(self) -> Tuple[List[tuple], bool]:
+        """Blocks for the first item, then gathers more for up to batch_window_secs."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.settings["batch_window_secs"]
+        while len(batch) < self.settings["max_embeds"]:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                kinds = ",".join(sorted({kind for _, kind, _ in batch}))
+                sent = self._send({"embeds": [embed for embed, _, _ in batch]}, kinds)
+                dedupes = [d for _, _, d in batch if d]
+                if sent:
+                    self._persist(dedupes)
+                    print(f"📤 Discord: {len(batch)} alert(s) sent ({kinds})")
+                else:
+                    self._release(dedupes)
+                for _ in batch:
+                    self._queue.task_done()
+                telemetry.set_gauge("discord_queue_depth", self._queue.qsize())
+            if stopping:
+                self._queue.task_done()
+                return
+
+    def _send(self, payload: Dict, kind: str) -> bool:
+        for attempt in range(1, self.settings["max_attempts"] + 1):
+            wait = self._blocked_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                with telemetry.timer("discord_send_duration_seconds", kind=kind):
+                    r = self.session.post(self.webhook_url, json=payload,
+                                          timeout=self.settings["request_timeout_secs"])
+            except requests.RequestException as e:
+                telemetry.inc("discord_errors_total", kind=kind)
+                print(f"⚠️  Discord send failed ({e}), attempt {attempt}")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+
+            self._track_bucket(r)
+            if r.status_code == 429:
+                telemetry.inc("discord_rate_limited_total", kind=kind)
+                try:
+                    retry_after = float(r.json().get("retry_after", 1.0))
+                except ValueError:
+                    retry_after = float(r.headers.get("Retry-After", 1.0))
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+                continue
+            if r.status_code >= 500:
+                telemetry.inc("discord_errors_total", kind=kind)
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            if r.status_code >= 400:
+                # Bad payload / revoked webhook: retrying won't help
+                telemetry.inc("discord_errors_total", kind=kind)
+                print(f"❌ Discord rejected alert ({r.status_code})")
+                return False
+            return True
+
+        telemetry.inc("discord_dropped_total", kind=kind)
+        print(f"❌ Discord: gave up after {self.settings['max_attempts']} attempts")
+        return False
+
+    def _track_bucket(self, r):
+        """Pause proactively when the webhook's bucket is exhausted."""
+        remaining = r.headers.get("X-RateLimit-Remaining")
+        reset_after = r.headers.get("X-RateLimit-Reset-After")
+        if remaining is not None and reset_after is not None:
+            try:
+                if int(remaining) <= 0:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + float(reset_after))
+            except ValueError:
+                pass
+
+    def _persist(self, dedupes: List[tuple]):
+        with self._dedupe_lock:
+            for key, value, sent_at in dedupes:
+                self._sent[key] = (value, sent_at)
+        try:
+            with storage.transaction(self.db_path) as conn:
+                conn.executemany('''
+                    INSERT INTO alert_state (key, value, sent_at) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value, sent_at = excluded.sent_at
+                ''', dedupes)
+        except Exception as e:
+            print(f"⚠️  Could not persist alert state: {e}")
+
+
+_NOTIFIER: Optional[DiscordNotifier] = None
+_NOTIFIER_LOCK = threading.Lock()
+
+
+def get_notifier(webhook_url: Optional[str], db_path: str = storage.DEFAULT_DB_PATH) -> DiscordNotifier:
+    """Process-wide notifier, started on first use."""
+    global _NOTIFIER
+    with _NOTIFIER_LOCK:
+        if _NOTIFIER is None:
+            _NOTIFIER = DiscordNotifier(webhook_url, db_path)
+        return _NOTIFIER
+
+
+def close_notifier(timeout: Optional[float] = 10.0):
+    """Drains and stops the process-wide notifier, if one was started."""
+    global _NOTIFIER
+    with _NOTIFIER_LOCK:
+        if _NOTIFIER is not None:
+            _NOTIFIER.close(timeout)
+            _NOTIFIER = None
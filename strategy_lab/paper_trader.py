@@ -1,7 +1,11 @@
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from typing import Dict, Optional
+from strategy_lab import storage, migrations, aggregates, telemetry
+from strategy_lab.position_book import PositionBook, WriteBehindQueue
+from strategy_lab import exit_engine
 
 class PaperTrader:
     """
@@ -9,13 +13,26 @@ class PaperTrader:
     Tracks Entry, Exit, and P&L.
     Now includes 'The Teacher' (Post-Mortem Analysis).
     And 'Realism' (Slippage Simulation).
+    Open positions are held in memory (PositionBook); DB writes are write-behind.
+    Keep ONE PaperTrader per DB for the life of the bot (use get_paper_trader()).
     """
     
     SLIPPAGE = 0.001 # 0.1% Friction per leg
     
-    def __init__(self, db_path: str = "data_lake.db"):
+    def __init__(self, db_path: str = storage.DEFAULT_DB_PATH):
         self.db_path = db_path
         self._migrate_db()
+        self.writer = WriteBehindQueue(db_path)   # Replays any crash journal first
+        self.book = PositionBook.load(db_path)
+        self._last_checked_bar: Dict[str, float] = {}  # symbol -> epoch s of the newest fully-checked bar
+        
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until all queued trade writes are committed."""
+        return self.writer.flush(timeout)
+
+    def close(self):
+        """Drains the write-behind queue and stops its worker."""
+        self.writer.close()
         
     def _apply_slippage(self, price: float, action: str) -> float:
         """
@@ -28,79 +45,31 @@ class PaperTrader:
             return price * (1 - self.SLIPPAGE) # Receive less
 
     def _migrate_db(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # Original Schema + New Columns
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                signal_id INTEGER,
-                strategy_id TEXT,
-                symbol TEXT,
-                direction TEXT,
-                status TEXT,
-                entry_price REAL,
-                exit_price REAL,
-                entry_date TEXT,
-                exit_date TEXT,
-                pnl REAL,
-                pnl_pct REAL,
-                context TEXT, 
-                lesson TEXT
-            )
-        ''')
-        
-        # Signal Table (Dependency)
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                strategy_id TEXT,
-                symbol TEXT,
-                direction TEXT,
-                features TEXT,
-                timestamp TEXT
-            )
-        ''')
+        """Schema is owned by strategy_lab.migrations (trades + signals)."""
+        migrations.migrate(self.db_path)
 
-        # Auto-Migration: Add context/lesson if missing
-        try:
-            c.execute("ALTER TABLE trades ADD COLUMN context TEXT")
-        except: pass
-        try:
-            c.execute("ALTER TABLE trades ADD COLUMN lesson TEXT")
-        except: pass
-        
-        conn.commit()
-        conn.close()
-
-    def record_signal(self, signal: Dict) -> int:
-        """Logs a signal to DB. Returns the signal_id."""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            INSERT INTO signals (strategy_id, symbol, direction, features, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            signal["strategy_id"], 
-            "AMD", 
-            signal["direction"], 
-            json.dumps(signal["features_matched"]),
-            datetime.now()
-        ))
-        
-        signal_id = c.lastrowid
-        conn.commit()
-        conn.close()
+    def record_signal(self, signal: Dict, symbol: Optional[str] = None) -> int:
+        """Logs a signal (write-behind). Returns the signal_id."""
+        symbol = symbol or signal.get("symbol") or "AMD"
+        signal_id = self.book.allocate_id("signals")
+        self.writer.submit({"op": "signal", "row": {
+            "id": signal_id,
+            "strategy_id": signal["strategy_id"],
+            "symbol": symbol,
+            "direction": signal["direction"],
+            "features": json.dumps(signal["features_matched"]),
+            "timestamp": str(datetime.now())
+        }})
         return signal_id
 
-    def open_trade(self, signal: Dict, current_price: float, context: Dict = {}) -> int:
+    def open_trade(self, signal: Dict, current_price: float, context: Dict = {}, symbol: Optional[str] = None) -> int:
         """
         Opens a trade and saves the Entry Context (The 'Why').
         Applies SLIPPAGE (Realism).
+        Symbol: explicit arg > context['symbol'] > signal['symbol'] > AMD (legacy default).
         """
-        signal_id = self.record_signal(signal)
+        symbol = symbol or context.get("symbol") or signal.get("symbol") or "AMD"
+        signal_id = self.record_signal(signal, symbol)
         direction = signal["direction"]
         
         # Calculate Real Entry Price (w/ Friction)
@@ -112,24 +81,29 @@ class PaperTrader:
              # Short: Sell at Bid
              entry_price = self._apply_slippage(current_price, 'SELL')
         
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute('''
-            INSERT INTO trades (signal_id, strategy_id, symbol, status, entry_price, entry_date, context)
-            VALUES (?, ?, ?, 'OPEN', ?, ?, ?)
-        ''', (
-            signal_id,
-            signal['strategy_id'],
-            "AMD",
-            entry_price, # Slippage Applied
-            datetime.now(),
-            json.dumps(context)
-        ))
-        
-        trade_id = c.lastrowid
-        conn.commit()
-        conn.close()
+        trade_id = self.book.allocate_id("trades")
+        now = datetime.now()
+        entry_date = str(now)
+        self.book.add({
+            "id": trade_id,
+            "symbol": symbol,
+            "entry_price": entry_price,
+            "strategy_id": signal['strategy_id'],
+            "direction": direction,
+            "entry_date": entry_date,
+            "entry_ts": now.timestamp(),
+            "context": context
+        })
+        self.writer.submit({"op": "open", "row": {
+            "id": trade_id,
+            "signal_id": signal_id,
+            "strategy_id": signal['strategy_id'],
+            "symbol": symbol,
+            "direction": direction,
+            "entry_price": entry_price, # Slippage Applied
+            "entry_date": entry_date,
+            "context": json.dumps(context)
+        }})
         return trade_id
 
     def generate_lesson(self, pnl_pct: float, direction: str, context: Dict) -> str:
@@ -153,21 +127,20 @@ class PaperTrader:
         # 3. Default
         return "⚠️ TIMING: Direction was right, but entry was too early."
 
-    def close_trade(self, trade_id: int, current_market_price: float):
+    def close_trade(self, trade_id: int, current_market_price: float,
+                    exit_time: Optional[datetime] = None, reason: Optional[str] = None):
         """
         Closes a trade, calculates P&L, and writes the Lesson.
         Applies SLIPPAGE on Exit.
+        exit_time/reason: the bar the exit filled on (intrabar engine), if known.
         """
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        # Get Trade Info (in memory)
+        position = self.book.remove(trade_id)
+        if not position: return
         
-        # Get Trade Info
-        c.execute("SELECT trades.entry_price, trades.strategy_id, signals.direction, trades.context FROM trades JOIN signals ON trades.signal_id = signals.id WHERE trades.id = ?", (trade_id,))
-        row = c.fetchone()
-        if not row: return
-        
-        entry_price, strat_id, direction, context_json = row
-        context = json.loads(context_json) if context_json else {}
+        entry_price = position["entry_price"]
+        direction = position["direction"]
+        context = position.get("context") or {}
         
         # Calculate Real Exit Price (Slippage)
         exit_price = current_market_price
@@ -190,56 +163,46 @@ class PaperTrader:
         # Generate Lesson
         lesson = self.generate_lesson(pnl_pct, direction, context)
 
-        c.execute('''
-            UPDATE trades 
-            SET status = 'CLOSED', exit_price = ?, exit_date = ?, pnl = ?, pnl_pct = ?, lesson = ?
-            WHERE id = ?
-        ''', (exit_price, datetime.now(), pnl, pnl_pct, lesson, trade_id))
-        
-        conn.commit()
-        conn.close()
+        self.writer.submit({"op": "close", "row": {
+            "id": trade_id,
+            "strategy_id": position["strategy_id"],
+            "exit_price": exit_price,
+            "exit_date": str(exit_time or datetime.now()),
+            "pnl": pnl,
+            "pnl_pct": pnl_pct,
+            "lesson": lesson,
+            "exit_reason": reason,
+            "fill_bar": str(exit_time) if exit_time else None
+        }})
 
     def get_portfolio_stats(self) -> Dict:
         """Returns stats including the lesson history."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = storage.get_connection(self.db_path)
         c = conn.cursor()
+        c.row_factory = sqlite3.Row
         
-        # Stats
-        c.execute("SELECT sum(pnl), count(*) FROM trades WHERE status='CLOSED'")
-        row = c.fetchone()
-        if row:
-            total_pnl, total_closed = row
-        else:
-            total_pnl, total_closed = 0, 0
-            
-        total_pnl = total_pnl if total_pnl else 0
-        
-        if total_closed and total_closed > 0:
-             c.execute("SELECT count(*) FROM trades WHERE status='CLOSED' AND pnl > 0")
-             wins = c.fetchone()[0]
-             win_rate = round((wins / total_closed * 100), 1)
-        else:
-             win_rate = 0
+        # Stats (running totals, O(1))
+        totals = aggregates.get_trade_summary(self.db_path)
+        total_pnl = totals["total_pnl"] or 0
+        total_closed = totals["trades"]
+        win_rate = round((totals["wins"] / total_closed * 100), 1) if total_closed else 0
         
-        # Open Trades
-        c.execute('''
-            SELECT t.id, t.symbol, t.entry_price, t.strategy_id, s.direction, t.entry_date
-            FROM trades t JOIN signals s ON t.signal_id = s.id
-            WHERE t.status = 'OPEN'
-        ''')
-        open_trades = [dict(row) for row in c.fetchall()]
+        # Open Trades (in memory)
+        open_trades = [
+            {k: p[k] for k in ("id", "symbol", "entry_price", "strategy_id", "direction", "entry_date")}
+            for p in self.book.open_positions()
+        ]
 
         # Closed History (For Lessons)
-        c.execute('''
-            SELECT t.id, t.strategy_id, t.pnl, t.lesson, t.exit_date
-            FROM trades t
-            WHERE t.status = 'CLOSED'
-            ORDER BY t.exit_date DESC LIMIT 5
-        ''')
-        history = [dict(row) for row in c.fetchall()]
+        with telemetry.timer("db_duration_seconds", op="recent_closed_trades"):
+            c.execute('''
+                SELECT t.id, t.strategy_id, t.pnl, t.lesson, t.exit_date
+                FROM trades t
+                WHERE t.status = 'CLOSED'
+                ORDER BY t.exit_date DESC LIMIT 5
+            ''')
+            history = [dict(row) for row in c.fetchall()]
         
-        conn.close()
         return {
             "total_pnl": round(total_pnl, 2),
             "win_rate": win_rate,
@@ -248,31 +211,73 @@ class PaperTrader:
             "history": history
         }
 
-    def update_positions(self, current_price: float):
+    def update_positions(self, current_price: Optional[float] = None, bars: Optional[Dict] = None,
+                         symbol: Optional[str] = None):
         """
         Runs the 'Reflection' loop.
         Closes trades if they hit Target (+2%) or Stop Loss (-1%).
+        bars: OHLC since the last check ({'time', 'open', 'high', 'low', 'close'});
+              every bar's high/low path is checked, not just the latest close.
+              Without bars, current_price is treated as a single flat bar.
+        symbol: only positions in this symbol are checked (the prices belong to it).
         """
-        stats = self.get_portfolio_stats()
-        open_trades = stats['open_trades']
-        
-        for trade in open_trades:
-            entry = trade['entry_price']
-            direction = trade['direction']
-            
-            # Simple MVP Exit Rules
-            target_pct = 0.02 # 2% Gain
-            stop_pct = 0.01   # 1% Loss
-            
-            should_close = False
-            
-            if direction == 'BULLISH':
-                if current_price >= entry * (1 + target_pct): should_close = True # Win
-                elif current_price <= entry * (1 - stop_pct): should_close = True # Loss
-            elif direction == 'BEARISH':
-                if current_price <= entry * (1 - target_pct): should_close = True # Win
-                elif current_price >= entry * (1 + stop_pct): should_close = True # Loss
-                
-            if should_close:
-                print(f"💰 Closing Trade #{trade['id']} ({trade['strategy_id']}) at ${current_price}")
-                self.close_trade(trade['id'], current_price)
+        positions = self.book.open_positions()
+        if symbol:
+            positions = [p for p in positions if p.get("symbol") == symbol]
+        if not positions:
+            return []
+
+        if not bars or not len(bars.get("time", [])):
+            if current_price is None:
+                return []
+            now = datetime.now().timestamp()
+            bars = {"time": [now], "open": [current_price], "high": [current_price],
+                    "low": [current_price], "close": [current_price]}
+        else:
+            bars = self._unchecked_bars(bars, symbol or "")
+
+        # Pure in-memory, vectorized over positions x bars
+        fills = exit_engine.find_exits(positions, bars)
+        for fill in fills:
+            trade = self.book.get(fill["id"])
+            fill_time = datetime.fromtimestamp(fill["bar_time"])
+            print(f"💰 Closing Trade #{trade['id']} ({trade['strategy_id']}) {fill['reason']} at ${fill['price']:.2f} (bar {fill_time:%H:%M})")
+            self.close_trade(fill["id"], fill["price"], exit_time=fill_time, reason=fill["reason"])
+        return fills
+
+    def _unchecked_bars(self, bars: Dict, symbol: str) -> Dict:
+        """
+        Drops bars already evaluated by a previous call. The newest bar is still
+        forming, so it is never marked as checked and gets re-evaluated next time.
+        """
+        times = bars["time"]
+        last_checked = self._last_checked_bar.get(symbol)
+        start = 0
+        if last_checked is not None:
+            while start < len(times) and times[start] <= last_checked:
+                start += 1
+        if len(times) >= 2:
+            self._last_checked_bar[symbol] = max(last_checked or times[-2], times[-2])
+        return {k: list(v)[start:] for k, v in bars.items()}
+
+
+_PAPER_TRADERS: Dict[str, PaperTrader] = {}
+_PAPER_TRADERS_LOCK = threading.Lock()
+
+
+def get_paper_trader(db_path: str = storage.DEFAULT_DB_PATH) -> PaperTrader:
+    """Process-wide PaperTrader for db_path: one writer thread and one id allocator per DB."""
+    with _PAPER_TRADERS_LOCK:
+        if db_path not in _PAPER_TRADERS:
+            _PAPER_TRADERS[db_path] = PaperTrader(db_path)
+        return _PAPER_TRADERS[db_path]
+
+
+def close_paper_trader(db_path: Optional[str] = None):
+    """Drains and stops the process-wide PaperTrader for db_path (all of them if None)."""
+    with _PAPER_TRADERS_LOCK:
+        paths = list(_PAPER_TRADERS) if db_path is None else [db_path]
+        for path in paths:
+            trader = _PAPER_TRADERS.pop(path, None)
+            if trader is not None:
+                trader.close()
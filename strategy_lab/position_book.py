@@ -0,0 +1,268 @@
+"""
+Position Book + Write-Behind Persistence
+Open positions live in memory; the DB is updated asynchronously.
+Every write is journaled (fsync'd) before it is queued, so a crash never loses a fill.
+Ids are reserved from sqlite_sequence in blocks, so several writers on one DB
+(another process, a CLI run) never hand out the same trade id.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from strategy_lab import storage, aggregates, telemetry
+
+
+def to_epoch(date_str: Optional[str]) -> float:
+    """'YYYY-MM-DD HH:MM:SS[.ffffff]' (local time, as stored) -> epoch seconds. 0 if unparseable."""
+    try:
+        return datetime.fromisoformat(str(date_str)).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class IdCollision(Exception):
+    """A write-behind insert found its id taken by a different row."""
+
+
+def reserve_ids(db_path: str, table: str, count: int) -> Tuple[int, int]:
+    """
+    Claims ids [first, last] of an AUTOINCREMENT table by bumping its sqlite_sequence
+    row. SQLite never hands out an id at or below seq, and every other PositionBook
+    reserves past it, so concurrent writers on one DB can't collide.
+    """
+    with storage.transaction(db_path) as conn:
+        # Write first: the UPDATE takes the DB write lock before anything is read
+        cur = conn.execute(f"UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM {table})) + ? "
+                           "WHERE name = ?", (count, table))
+        if cur.rowcount == 0:  # Nothing ever inserted into the table yet
+            conn.execute(f"INSERT INTO sqlite_sequence (name, seq) SELECT ?, COALESCE(MAX(id), 0) + ? FROM {table}",
+                         (table, count))
+        last = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()[0]
+    return last - count + 1, last
+
+
+class PositionBook:
+    """
+    The Ledger.
+    In-memory view of OPEN trades keyed by trade id, plus id allocation
+    so opens never have to wait for the DB to hand back a rowid
+    (one DB round trip per ID_BLOCK ids).
+    """
+
+    ID_BLOCK = 100
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.positions: Dict[int, Dict] = {}
+        self._next_ids = {"trades": 1, "signals": 1}
+        self._last_ids = {"trades": 0, "signals": 0}  # End of the reserved block
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, db_path: str) -> "PositionBook":
+        """One-time startup load of open positions."""
+        book = cls(db_path)
+        conn = storage.get_connection(db_path)
+        c = conn.cursor()
+
+        c.execute('''
+            SELECT t.id, t.symbol, t.entry_price, t.strategy_id,
+                   COALESCE(s.direction, t.direction) AS direction, t.entry_date, t.context
+            FROM trades t LEFT JOIN signals s ON t.signal_id = s.id
+            WHERE t.status = 'OPEN'
+        ''')
+        for trade_id, symbol, entry_price, strategy_id, direction, entry_date, context in c.fetchall():
+            book.positions[trade_id] = {
+                "id": trade_id,
+                "symbol": symbol,
+                "entry_price": entry_price,
+                "strategy_id": strategy_id,
+                "direction": direction,
+                "entry_date": entry_date,
+                "entry_ts": to_epoch(entry_date),
+                "context": json.loads(context) if context else {},
+            }
+        return book
+
+    def allocate_id(self, table: str) -> int:
+        with self._lock:
+            if self._next_ids[table] > self._last_ids[table]:
+                self._next_ids[table], self._last_ids[table] = reserve_ids(self.db_path, table, self.ID_BLOCK)
+            new_id = self._next_ids[table]
+            self._next_ids[table] += 1
+            return new_id
+
+    def add(self, position: Dict):
+        self.positions[position["id"]] = position
+
+    def remove(self, trade_id: int) -> Optional[Dict]:
+        return self.positions.pop(trade_id, None)
+
+    def get(self, trade_id: int) -> Optional[Dict]:
+        return self.positions.get(trade_id)
+
+    def open_positions(self) -> List[Dict]:
+        return list(self.positions.values())
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class WriteBehindQueue:
+    """
+    Background DB writer.
+    submit() journals the op and returns immediately; a worker thread applies
+    ops in batches, one transaction per batch. All ops are idempotent, so
+    replaying a journal that was already (partly) applied is harmless.
+    An insert whose id already belongs to a different row raises IdCollision:
+    the batch stays journaled and is retried, never silently dropped.
+    """
+
+    BATCH_SIZE = 100
+    RETRY_DELAY = 1.0  # seconds between attempts while the DB is unavailable
+
+    def __init__(self, db_path: str, journal_path: Optional[str] = None):
+        self.db_path = db_path
+        self.journal_path = journal_path or f"{db_path}.journal"
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._pending = 0
+        self._closed = False
+
+        self.replay()
+        self._worker = threading.Thread(target=self._run, name="WriteBehind", daemon=True)
+        self._worker.start()
+
+    # --- Journal ---
+
+    def replay(self) -> int:
+        """Re-applies any ops left in the journal by a previous crash. Returns op count."""
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        ops = []
+        with open(self.journal_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ops.append(json.loads(line))
+                except ValueError:
+                    break  # Torn final write from the crash - everything after it is garbage
+
+        if ops:
+            with storage.transaction(self.db_path) as conn:
+                for op in ops:
+                    self._apply(conn, op)
+            print(f"♻️  Replayed {len(ops)} journaled writes")
+
+        open(self.journal_path, "w").close()
+        return len(ops)
+
+    def submit(self, op: Dict):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue is closed")
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(op) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending += 1
+        self._queue.put(op)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every submitted op is committed. Returns False on timeout."""
+        with self._drained:
+            return self._drained.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    # --- Worker ---
+
+    def _run(self):
+        while True:
+            op = self._queue.get()
+            if op is None:
+                return
+            batch = [op]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)  # Finish this batch, then stop
+                    break
+                batch.append(nxt)
+
+            while True:
+                try:
+                    with storage.transaction(self.db_path) as conn:
+                        for item in batch:
+                            self._apply(conn, item)
+                    break
+                except IdCollision as e:
+                    telemetry.inc("write_behind_id_collisions_total")
+                    print(f"❌ Write-behind id collision ({e}): another writer owns this id. Kept in the journal, retrying...")
+                    time.sleep(self.RETRY_DELAY)
+                except Exception as e:
+                    # Ops stay journaled; keep retrying rather than dropping fills
+                    print(f"⚠️  Write-behind commit failed ({e}), retrying...")
+                    time.sleep(self.RETRY_DELAY)
+
+            with self._drained:
+                self._pending -= len(batch)
+                if self._pending == 0:
+                    # Everything journaled is now durable in the DB
+                    open(self.journal_path, "w").close()
+                    self._drained.notify_all()
+
+    @staticmethod
+    def _apply(conn, op: Dict):
+        kind = op["op"]
+        if kind == "signal":
+            cur = conn.execute('''
+                INSERT OR IGNORE INTO signals (id, strategy_id, symbol, direction, features, timestamp)
+                VALUES (:id, :strategy_id, :symbol, :direction, :features, :timestamp)
+            ''', op["row"])
+            if cur.rowcount == 0:
+                WriteBehindQueue._check_replayed(conn, "signals", op["row"], ("strategy_id", "symbol", "timestamp"))
+        elif kind == "open":
+            cur = conn.execute('''
+                INSERT OR IGNORE INTO trades (id, signal_id, strategy_id, symbol, direction, status, entry_price, entry_date, context)
+                VALUES (:id, :signal_id, :strategy_id, :symbol, :direction, 'OPEN', :entry_price, :entry_date, :context)
+            ''', op["row"])
+            if cur.rowcount == 0:
+                WriteBehindQueue._check_replayed(conn, "trades", op["row"], ("signal_id", "strategy_id", "entry_date"))
+        elif kind == "close":
+            row = {"exit_reason": None, "fill_bar": None, **op["row"]}
+            cur = conn.execute('''
+                UPDATE trades
+                SET status = 'CLOSED', exit_price = :exit_price, exit_date = :exit_date,
+                    pnl = :pnl, pnl_pct = :pnl_pct, lesson = :lesson,
+                    exit_reason = :exit_reason, fill_bar = :fill_bar
+                WHERE id = :id AND status = 'OPEN'
+            ''', row)
+            if cur.rowcount == 1:
+                # Same transaction as the close, and only once even if the journal is replayed
+                aggregates.record_trade_close(conn, op["row"].get("strategy_id"), op["row"]["pnl"])
+        else:
+            raise ValueError(f"Unknown write-behind op: {kind}")
+
+    @staticmethod
+    def _check_replayed(conn, table: str, row: Dict, key: Tuple[str, ...]):
+        """An ignored insert is only fine if it is this very row again (journal replay)."""
+        existing = conn.execute(f"SELECT {', '.join(key)} FROM {table} WHERE id = ?", (row["id"],)).fetchone()
+        if existing is None or tuple(existing) != tuple(row[k] for k in key):
+            raise IdCollision(f"{table} id {row['id']} already holds {tuple(existing) if existing else None}")
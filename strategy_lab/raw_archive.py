@@ -0,0 +1,284 @@
+"""
+Raw Response Archive
+Where AlphaVantageEngine keeps every raw API payload, instead of uncompressed
+JSON text in data_lake.db's raw_market_data:
+
+  - its own DB file (data_lake_raw.db next to the data lake), so the hot tables stay small
+  - payloads are content-addressed: sha256 of canonical JSON, stored once however often fetched
+  - compressed with zstd when `zstandard` is installed, zlib otherwise (codec kept per blob)
+  - time-based retention: prune() drops old fetches, then any blob nothing points at,
+    and hands the freed pages back to the OS (auto_vacuum=INCREMENTAL)
+  - replay() streams fetch records; a payload is only read and decompressed when .data is touched
+
+Moving old raw_market_data rows out of the lake (idempotent, ends with a VACUUM of the lake;
+also run by the live runner's off-hours maintenance):
+    python -m strategy_lab.raw_archive [--db data_lake.db]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+from strategy_lab import storage, telemetry
+from strategy_lab.config import RAW_ARCHIVE_SETTINGS
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS raw_blobs (
+        hash TEXT PRIMARY KEY,      -- sha256 of the canonical JSON
+        codec TEXT NOT NULL,        -- 'zstd' | 'zlib'
+        raw_size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS raw_fetches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fetched_at REAL NOT NULL,   -- Epoch seconds
+        function_name TEXT NOT NULL,
+        symbol TEXT,
+        hash TEXT NOT NULL,
+        source_id INTEGER           -- raw_market_data.id for rows imported from the lake
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_raw_fetches_lookup ON raw_fetches(function_name, symbol, fetched_at)",
+    "CREATE INDEX IF NOT EXISTS idx_raw_fetches_time ON raw_fetches(fetched_at)",
+    "CREATE INDEX IF NOT EXISTS idx_raw_fetches_hash ON raw_fetches(hash)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_raw_fetches_source ON raw_fetches(source_id) WHERE source_id IS NOT NULL",
+)
+
+
+def default_archive_path(db_path: str = storage.DEFAULT_DB_PATH) -> str:
+    """data_lake.db -> data_lake_raw.db (same directory)."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_raw{ext or '.db'}"
+
+
+def canonical_json(data) -> bytes:
+    """Same payload -> same bytes -> same hash, whatever the key order."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def compress(raw: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=RAW_ARCHIVE_SETTINGS["zstd_level"]).compress(raw)
+    return zlib.compress(raw, RAW_ARCHIVE_SETTINGS["zlib_level"])
+
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Archive blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+class RawRecord:
+    """One archived fetch. `.data` loads and decompresses the payload on first access."""
+
+    __slots__ = ("archive", "id", "fetched_at", "function_name", "symbol", "hash", "_data")
+
+    def __init__(self, archive: "RawArchive", row: Tuple):
+        self.archive = archive
+        self.id, self.fetched_at, self.function_name, self.symbol, self.hash = row
+        self._data = None
+
+    @property
+    def data(self) -> Dict:
+        if self._data is None:
+            self._data = self.archive.load(self.hash)
+        return self._data
+
+
+class RawArchive:
+    """
+    The Vault.
+    """
+
+    def __init__(self, path: Optional[str] = None, settings: Optional[Dict] = None):
+        self.settings = {**RAW_ARCHIVE_SETTINGS, **(settings or {})}
+        self.path = path or default_archive_path()
+        codec = self.settings["codec"]
+        self.codec = codec if codec == "zlib" or ZSTD_AVAILABLE else "zlib"
+        self._last_prune = 0.0
+        self._initialize()
+        self.prune()  # Startup pass; after that at most once per prune_interval_secs
+
+    def _initialize(self):
+        conn = storage.get_connection(self.path)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'raw_fetches'").fetchone():
+            # New file: storage already switched it to WAL, so the mode only sticks after a (free) VACUUM
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        with storage.transaction(self.path) as c:
+            for ddl in SCHEMA[:2]:
+                c.execute(ddl)
+            if "source_id" not in {row[1] for row in c.execute("PRAGMA table_info(raw_fetches)")}:
+                c.execute("ALTER TABLE raw_fetches ADD COLUMN source_id INTEGER")  # Archives created before it
+            for ddl in SCHEMA[2:]:
+                c.execute(ddl)
+
+    # --- Write ---
+
+    def store(self, function_name: str, symbol: Optional[str], data, fetched_at: Optional[float] = None,
+              source_id: Optional[int] = None) -> str:
+        """Archives one payload. Returns its content hash."""
+        raw = canonical_json(data)
+        digest = hashlib.sha256(raw).hexdigest()
+        with storage.transaction(self.path) as c:
+            if not c.execute("SELECT 1 FROM raw_blobs WHERE hash = ?", (digest,)).fetchone():
+                c.execute("INSERT OR IGNORE INTO raw_blobs (hash, codec, raw_size, data) VALUES (?, ?, ?, ?)",
+                          (digest, self.codec, len(raw), compress(raw, self.codec)))
+                telemetry.inc("raw_archive_blobs_total", result="new")
+            else:
+                telemetry.inc("raw_archive_blobs_total", result="duplicate")
+            c.execute("INSERT OR IGNORE INTO raw_fetches (fetched_at, function_name, symbol, hash, source_id) "
+                      "VALUES (?, ?, ?, ?, ?)", (fetched_at or time.time(), function_name, symbol, digest, source_id))
+        telemetry.inc("raw_archive_bytes_total", len(raw))
+
+        if time.time() - self._last_prune > self.settings["prune_interval_secs"]:
+            self.prune()
+        return digest
+
+    # --- Read ---
+
+    def load(self, digest: str) -> Optional[Dict]:
+        row = storage.get_connection(self.path).execute(
+            "SELECT codec, data FROM raw_blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(decompress(row[1], row[0]))
+
+    def replay(self, function_name: Optional[str] = None, symbol: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None) -> Iterator[RawRecord]:
+        """Fetch records oldest first. Payloads are not read until .data is used."""
+        clauses, params = [], []
+        for column, op, value in (("function_name", "=", function_name), ("symbol", "=", symbol),
+                                  ("fetched_at", ">=", since), ("fetched_at", "<", until)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = storage.get_connection(self.path).execute(
+            f"SELECT id, fetched_at, function_name, symbol, hash FROM raw_fetches {where} ORDER BY fetched_at, id",
+            params)
+        for row in cursor:
+            yield RawRecord(self, row)
+
+    def latest(self, function_name: str, symbol: Optional[str]) -> Optional[Dict]:
+        row = storage.get_connection(self.path).execute('''
+            SELECT hash FROM raw_fetches WHERE function_name = ? AND symbol IS ?
+            ORDER BY fetched_at DESC LIMIT 1
+        ''', (function_name, symbol)).fetchone()
+        return self.load(row[0]) if row else None
+
+    def stats(self) -> Dict:
+        conn = storage.get_connection(self.path)
+        fetches = conn.execute("SELECT COUNT(*) FROM raw_fetches").fetchone()[0]
+        blobs, raw_bytes, stored_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM raw_blobs").fetchone()
+        return {"fetches": fetches, "blobs": blobs, "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
+
+    # --- Retention ---
+
+    def prune(self, older_than_secs: Optional[float] = None, now: Optional[float] = None) -> Dict[str, int]:
+        """Drops fetches past retention and the blobs only they referenced, then compacts."""
+        now = now or time.time()
+        self._last_prune = time.time()
+        retention = older_than_secs if older_than_secs is not None else self.settings["retention_days"] * 86400
+        with storage.transaction(self.path) as c:
+            fetches = c.execute("DELETE FROM raw_fetches WHERE fetched_at < ?", (now - retention,)).rowcount
+            blobs = c.execute('''
+                DELETE FROM raw_blobs
+                WHERE NOT EXISTS (SELECT 1 FROM raw_fetches f WHERE f.hash = raw_blobs.hash)
+            ''').rowcount if fetches else 0
+        if blobs:
+            self.compact()
+        if fetches:
+            print(f"🧹 Raw archive: pruned {fetches} fetches, {blobs} payloads")
+        return {"fetches": fetches, "blobs": blobs}
+
+    def compact(self):
+        """Returns free pages to the OS (incremental: no full-file rewrite)."""
+        conn = storage.get_connection(self.path)
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.commit()
+
+    # --- Migration from data_lake.db ---
+
+    def import_legacy(self, source_db: str, batch_size: int = 200) -> int:
+        """
+        Moves raw_market_data rows out of the data lake into the archive (deduped,
+        compressed), deleting each batch from the source once archived, then VACUUMs the lake.
+        Idempotent: rows are keyed by their source id, so a run interrupted between the two
+        files skips what it already archived and just finishes the deletes.
+        """
+        src = storage.get_connection(source_db)
+        archive = storage.get_connection(self.path)
+        moved = 0
+        while True:
+            rows = src.execute('''
+                SELECT id, CAST(strftime('%s', timestamp) AS REAL), function_name, symbol, data
+                FROM raw_market_data ORDER BY id LIMIT ?
+            ''', (batch_size,)).fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            done = {r[0] for r in archive.execute(
+                f"SELECT source_id FROM raw_fetches WHERE source_id IN ({','.join('?' * len(ids))})", ids)}
+            for source_id, fetched_at, function_name, symbol, data in rows:
+                if source_id in done:
+                    continue
+                try:
+                    payload = json.loads(data) if data else None
+                except (TypeError, ValueError):
+                    payload = data  # Kept verbatim
+                self.store(function_name or "UNKNOWN", symbol, payload, fetched_at=fetched_at or time.time(),
+                           source_id=source_id)
+                moved += 1
+            with storage.transaction(source_db) as c:
+                c.executemany("DELETE FROM raw_market_data WHERE id = ?", [(i,) for i in ids])
+        if moved:
+            print(f"📦 Moved {moved} raw responses from {source_db} into {self.path}")
+        if src.execute("PRAGMA freelist_count").fetchone()[0]:
+            src.execute("VACUUM")  # Hand the space the payloads held back to the OS
+            print(f"🧹 Vacuumed {source_db}")
+        return moved
+
+
+def import_legacy_lake(db_path: str = storage.DEFAULT_DB_PATH) -> int:
+    """Maintenance job: no-op once the lake has no raw_market_data rows left."""
+    if not has_legacy_rows(db_path):
+        return 0
+    return RawArchive(default_archive_path(db_path)).import_legacy(db_path)
+
+
+def has_legacy_rows(db_path: str) -> bool:
+    try:
+        return storage.get_connection(db_path).execute("SELECT 1 FROM raw_market_data LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move legacy raw_market_data rows into the raw archive")
+    parser.add_argument("--db", default=storage.DEFAULT_DB_PATH, help="Data lake holding raw_market_data")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    archive = RawArchive(default_archive_path(args.db))
+    if has_legacy_rows(args.db):
+        archive.import_legacy(args.db, batch_size=args.batch_size)
+    else:
+        print(f"✅ {args.db}: no legacy raw rows left")
+    print(f"📊 {archive.path}: {archive.stats()}")
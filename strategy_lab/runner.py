@@ -3,42 +3,56 @@ import os
 import json
 import logging
 import time
+import asyncio
 import argparse
-import requests
+import signal
+import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 # Add parent dir to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from strategy_lab.data.yfinance_engine import YFinanceEngine
-from strategy_lab.paper_trader import PaperTrader
+from strategy_lab.paper_trader import get_paper_trader, close_paper_trader
 from strategy_lab.core import StrategyValidator
 from strategy_lab.scanner import StrategyScanner
 from strategy_lab.market_features import MarketFeatureEngine
 from strategy_lab.judge import TheJudge
-from strategy_lab.social_sentiment import RedditEngine
+from strategy_lab.social_sentiment import get_ingestor, close_ingestor
 from strategy_lab.history_helper import get_backtest_history, get_backtest_stats
 
 # Auto-Trading Modules
 from strategy_lab.risk_manager import RiskManager
 from strategy_lab.kill_switch import KillSwitch
-from strategy_lab.config import AUTO_TRADE_ENABLED, DRY_RUN_MODE
-try:
-    from strategy_lab.alpaca_broker import AlpacaBroker, DryRunBroker
-    ALPACA_AVAILABLE = True
-except ImportError:
-    ALPACA_AVAILABLE = False
-    print("⚠️  Alpaca SDK not available (auto-trading disabled)")
+from strategy_lab.config import AUTO_TRADE_ENABLED, DRY_RUN_MODE, WATCHLIST, SENTIMENT_SETTINGS, UNIVERSE_SETTINGS
+from strategy_lab.watchlist_runner import WatchlistRunner
+from strategy_lab.scheduler import MarketClockScheduler
+from strategy_lab import storage, telemetry, live_feed, bar_store
+from strategy_lab.exporter import DashboardExporter, compact_payload
+from strategy_lab.state_channel import StateWriter
+from strategy_lab.notifier import get_notifier, close_notifier
+
+# Heavy dependencies (yfinance -> pandas, the Alpaca SDK -> pydantic) are imported
+# inside main(), after the heartbeat is up, so `import strategy_lab.runner` stays cheap.
 
 DISCORD_WEBHOOK = 'https://discord.com/api/webhooks/1467339178701230122/MnWqFuFNUTO4HGMHfZA7eQEsZFjdGvUWIdA-WMb_jqiFVEtNkWpA85d93QaZ8FR6HkB2' 
 
 # Global State
-LAST_ALERT = {"strategy": None, "time": 0}
+EXPORTER = DashboardExporter()
+STATE_CHANNEL: Optional[StateWriter] = None    # Set when supervised: web process reads cycle state from here
+METRICS_CHANNEL: Optional[StateWriter] = None  # ...and the Prometheus text from here
 
-def send_discord_alert(bet, verdict):
-    if not DISCORD_WEBHOOK: return
+def notifier():
+    """Background Discord worker (started on first alert). Sends never block the cycle."""
+    return get_notifier(DISCORD_WEBHOOK)
 
+def sentiment_score(symbol: str) -> Dict:
+    """Rolling Reddit hype from the background ingestor (waits for its first fetch once)."""
+    ingestor = get_ingestor()
+    ingestor.wait_ready(SENTIMENT_SETTINGS["first_fetch_wait_secs"])
+    return ingestor.score(symbol)
+
+def build_signal_embed(bet, verdict) -> Dict:
     color = 5763719 # Green
     if bet['direction'] == 'BEARISH': color = 15548997 # Red
 
@@ -48,12 +62,11 @@ def send_discord_alert(bet, verdict):
         "color": color,
         "footer": {"text": "Strategy Lab Consultant"}
     }
-    
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"embeds": [embed]})
-        print(f"Sent Discord Alert for {bet['strategy_name']}")
-    except Exception as e:
-        print(f"Failed to send alert: {e}")
+    return embed
+
+def send_discord_alert(bet, verdict):
+    if not DISCORD_WEBHOOK: return
+    notifier().enqueue(build_signal_embed(bet, verdict), "signal")
 
 def send_trade_opened_alert(trade, entry_price, context):
     """Send Discord alert when a trade is opened"""
@@ -72,11 +85,7 @@ def send_trade_opened_alert(trade, entry_price, context):
         "footer": {"text": "Strategy Lab • Paper Trading"}
     }
     
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"embeds": [embed]})
-        print(f"📤 Discord: Trade opened notification sent")
-    except Exception as e:
-        print(f"Failed to send trade opened alert: {e}")
+    notifier().enqueue(embed, "trade_opened")
 
 def send_trade_closed_alert(trade, exit_price, pnl, pnl_pct):
     """Send Discord alert when a trade is closed"""
@@ -94,11 +103,7 @@ def send_trade_closed_alert(trade, exit_price, pnl, pnl_pct):
         "footer": {"text": "Strategy Lab • Paper Trading"}
     }
     
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"embeds": [embed]})
-        print(f"📤 Discord: Trade closed notification sent")
-    except Exception as e:
-        print(f"Failed to send trade closed alert: {e}")
+    notifier().enqueue(embed, "trade_closed")
 
 def send_daily_summary(portfolio_stats):
     """Send daily P&L summary to Discord"""
@@ -119,11 +124,7 @@ def send_daily_summary(portfolio_stats):
         "footer": {"text": f"Strategy Lab • {datetime.now().strftime('%Y-%m-%d')}"}
     }
     
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"embeds": [embed]})
-        print(f"📤 Discord: Daily summary sent")
-    except Exception as e:
-        print(f"Failed to send daily summary: {e}")
+    notifier().enqueue(embed, "daily_summary")
 
 def send_risk_alert(reason):
     """Send Discord alert when risk limits are hit"""
@@ -137,11 +138,7 @@ def send_risk_alert(reason):
         "footer": {"text": "Strategy Lab • Risk Manager"}
     }
     
-    try:
-        requests.post(DISCORD_WEBHOOK, json={"embeds": [embed]})
-        print(f"📤 Discord: Risk alert sent")
-    except Exception as e:
-        print(f"Failed to send risk alert: {e}")
+    notifier().enqueue(embed, "risk")
 
 def check_and_send_alert(bet, verdict):
     """
@@ -150,24 +147,16 @@ def check_and_send_alert(bet, verdict):
     if not bet or not DISCORD_WEBHOOK:
         return
     
-    global LAST_ALERT
-    now = time.time()
-    
-    # Logic: Alert if it's a NEW strategy OR it's been > 30 mins
-    is_new_strat = bet['strategy_name'] != LAST_ALERT['strategy']
-    is_timeout = (now - LAST_ALERT['time']) > 1800 # 30 mins
+    # Logic: Alert if it's a NEW strategy OR it's been > 30 mins (state survives restarts)
+    clean_verdict = verdict.replace("VERDICT: ", "")
+    notifier().notify_once("signal", bet['strategy_name'], build_signal_embed(bet, clean_verdict), "signal")
 
-    if is_new_strat or is_timeout:
-        clean_verdict = verdict.replace("VERDICT: ", "")
-        send_discord_alert(bet, clean_verdict)
-        
-        # Update State
-        LAST_ALERT['strategy'] = bet['strategy_name']
-        LAST_ALERT['time'] = now
-    else:
-        print(f"Skipping Duplicate Alert (Last Sent: {int(now - LAST_ALERT['time'])}s ago)")
+def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, risk_mgr=None, kill_switch=None, paper_trader=None, broker_state=None):
+    with telemetry.cycle("single"):
+        _run_cycle(engine, strategies, symbol, auto_trade, broker, risk_mgr, kill_switch, paper_trader, broker_state)
+    telemetry.print_cycle_report()
 
-def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, risk_mgr=None, kill_switch=None):
+def _run_cycle(engine, strategies, symbol, auto_trade, broker, risk_mgr, kill_switch, paper_trader, broker_state=None):
     print(f"\n--- ⏳ Scan Cycle: {datetime.now().strftime('%H:%M:%S')} ---")
     
     # 0. Kill Switch Check (Safety First)
@@ -179,14 +168,16 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
     
     # --- DATA PHASE (UNLIMITED FUEL) ---
     # 1. Macro Sixth Sense (Safety First)
-    macro = engine.fetch_macro_stats()
+    with telemetry.span("macro_fetch"):
+        macro = engine.fetch_macro_stats()
     vix = macro.get('vix', 0)
     spy_change = macro.get('spy_change', 0)
     print(f"🌍 Macro Check: SPY={macro['spy_trend']} | VIX={vix:.2f} ({'PANIC' if vix>30 else 'SAFE'})")
 
     print(f"⚡ Fetching Market Data (YFinance)...")
     
-    snapshot = engine.fetch_snapshot(symbol)
+    with telemetry.span("snapshot_fetch"):
+        snapshot = engine.fetch_snapshot(symbol)
     if not snapshot or not snapshot.get("closes"):
         print("❌ Data Fetch Failed. Retrying next cycle.")
         return
@@ -194,30 +185,37 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
     closes = snapshot["closes"]
     print(f"✅ Data Acquired: {len(closes)} candles. Price: ${snapshot.get('current_price', 0):.2f}")
 
-    # 4. Social Sentiment
-    print("Scraping Reddit Sentiment...")
-    hype_data = RedditEngine.fetch_hype(symbol)
+    # 4. Social Sentiment (refreshed in the background; read from memory)
+    with telemetry.span("sentiment_read"):
+        hype_data = sentiment_score(symbol)
     print(f"Reddit Hype: {hype_data['score']}/100 ({hype_data['direction']})")
     snapshot['sentiment'] = hype_data
 
     # 0. Self-Learning (Reflection)
     # Check if any open trades need closing
-    pt = PaperTrader()
+    pt = paper_trader or get_paper_trader()
     if closes:
-        pt.update_positions(closes[-1])
+        # Intrabar: every 1m high/low since the last check, not just the last close
+        with telemetry.span("position_update"):
+            pt.update_positions(closes[-1], bars=snapshot.get("bars"), symbol=symbol)
 
     # 5. Analysis
-    # 5. Analysis
-    features = MarketFeatureEngine.analyze_snapshot(snapshot)
-    verdict = TheJudge.delimit_verdict(features, macro=macro)
+    with telemetry.span("features"):
+        features = MarketFeatureEngine.analyze_snapshot(snapshot)
+    with telemetry.span("judge"):
+        verdict = TheJudge.delimit_verdict(features, macro=macro)
     
     print(f"--- 👨‍⚖️ The Judge: {verdict}")
     
-    scanner = StrategyScanner()
-    signals = scanner.scan(strategies, snapshot)
+    with telemetry.span("scan"):
+        scanner = StrategyScanner()
+        signals = scanner.scan(strategies, snapshot)
+    telemetry.count("signals", len(signals))
     
     # Get Stats
-    portfolio = pt.get_portfolio_stats()
+    with telemetry.span("portfolio_stats"):
+        portfolio = pt.get_portfolio_stats()
+    telemetry.set_gauge("open_positions", len(portfolio["open_trades"]))
 
     # 6. AI Selection & Auto-Trading Logic
     best_bet = None
@@ -242,9 +240,9 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
              if not is_open:
                  print(f"📝 Opening Paper Trade: {best_bet['strategy_name']}")
                  # Context: Signal + Macro
-                 context_lite = {k: v for k, v in snapshot.items() if k not in ['closes', 'htf_closes', 'sector_closes']}
+                 context_lite = {k: v for k, v in snapshot.items() if k not in ['closes', 'bars', 'htf_closes', 'sector_closes']}
                  context_lite.update(macro)
-                 pt.open_trade(best_bet, closes[-1], context=context_lite)
+                 pt.open_trade(best_bet, closes[-1], context=context_lite, symbol=symbol)
                  
                  # Send Discord notification for trade opened
                  send_trade_opened_alert(best_bet, closes[-1], context_lite)
@@ -253,12 +251,15 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
                  if auto_trade and broker and risk_mgr:
                      print("\n🤖 AUTO-TRADE MODE: Evaluating execution...")
                      
-                     # Get account info
-                     account = broker.get_account()
+                     # Get account info (from the broker state cache when running; no round trips)
+                     with telemetry.span("broker", call="get_account"):
+                         account = broker_state.account() if broker_state else broker.get_account()
                      if account:
                          account_value = account.get('portfolio_value', 0)
                          buying_power = account.get('buying_power', 0)
-                         current_positions = len(broker.get_open_positions())
+                         with telemetry.span("broker", call="get_open_positions"):
+                             current_positions = (broker_state.position_count() if broker_state
+                                                  else len(broker.get_open_positions()))
                          
                          # Risk Manager Check
                          can_trade, reason = risk_mgr.can_trade(
@@ -275,10 +276,13 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
                              if qty > 0:
                                  # Submit order
                                  side = "BUY" if best_bet['direction'] == 'BULLISH' else "SELL"
-                                 order_id = broker.submit_market_order(symbol, qty, side)
+                                 with telemetry.span("broker", call="submit_market_order"):
+                                     order_id = broker.submit_market_order(symbol, qty, side)
                                  
                                  if order_id:
                                      print(f"✅ TRADE EXECUTED: {side} {qty} {symbol} (Order: {order_id})")
+                                     if broker_state:
+                                         broker_state.apply_fill(symbol, qty, side, closes[-1], order_id=order_id)
                                  else:
                                      print(f"❌ Order submission failed")
                              else:
@@ -290,7 +294,28 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
 
 
     # 7. Export
-    market_stats = {
+    market_stats = build_market_stats(snapshot, macro)
+    
+    # 8. Fetch Backtest History (for History Lab UI)
+    with telemetry.span("backtest_history"):
+        backtest_history, backtest_stats = load_backtest_sections()
+    
+    output_data = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "symbol": symbol,
+        "market_stats": market_stats,
+        "signals": signals,
+        "portfolio": portfolio, 
+        "best_bet": best_bet,
+        "judge_verdict": verdict,
+        "backtest_history": backtest_history,
+        "backtest_stats": backtest_stats
+    }
+    with telemetry.span("export"):
+        export_ui(output_data)
+
+def build_market_stats(snapshot: Dict, macro: Dict) -> Dict:
+    return {
         "price": round(snapshot.get("current_price", 0), 2),
         "change_pct": round(snapshot.get("change_pct", 0), 2),
         "day_high": round(snapshot.get("day_high", 0), 2),
@@ -301,52 +326,155 @@ def run_cycle(engine, strategies, symbol="AMD", auto_trade=False, broker=None, r
         "spy_trend": macro.get('spy_trend', 'Unknown')
     }
 
-    
-    # 8. Fetch Backtest History (for History Lab UI)
+def load_backtest_sections():
     try:
         backtest_history = get_backtest_history(limit=50)  # Last 50 decisions
         backtest_stats = get_backtest_stats()
     except:
         backtest_history = []
         backtest_stats = {'total_decisions': 0, 'strategies': [], 'regimes': {}}
-    
-    output_data = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "symbol": symbol,
-        "market_stats": market_stats,
-        "signals": signals,
-        "portfolio": portfolio, 
-        "best_bet": best_bet,
-        "judge_verdict": verdict,
-        "backtest_history": backtest_history,
-        "backtest_stats": backtest_stats
-    }
-    
-    js_content = f"window.STRATEGY_DATA = {json.dumps(output_data, indent=2)};"
+    return backtest_history, backtest_stats
+
+def export_ui(output_data: Dict):
+    live_feed.FEED.publish(output_data)  # Push to connected dashboards first
+    if STATE_CHANNEL:
+        STATE_CHANNEL.publish(json.dumps(compact_payload(output_data), separators=(",", ":"), default=str).encode("utf-8"))
     try:
-        js_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'js', 'strategy_data.js')
-        with open(js_path, 'w') as f:
-            f.write(js_content)
-        print("UI Updated.")
+        written = EXPORTER.export(output_data)
+        changed = [section for section, ok in written.items() if ok]
+        print(f"UI Updated ({', '.join(changed)})." if changed else "UI Unchanged.")
     except Exception as e:
         print(f"Export Failed: {e}")
 
+def run_watchlist_cycle(wl_runner, paper_trader, kill_switch=None):
+    """
+    Multi-symbol cycle: shared macro, concurrent snapshots, pooled analysis,
+    one ranked signal list. Paper-trades the top-ranked signal (no broker execution).
+    """
+    with telemetry.cycle("watchlist"):
+        result = _run_watchlist_cycle(wl_runner, paper_trader, kill_switch)
+    telemetry.print_cycle_report()
+    return result
+
+def run_universe_cycle(scanner, paper_trader, kill_switch=None):
+    """
+    Universe cycle: hundreds of symbols ranked from the local bar store in one
+    vectorized pass, top-K enriched and analyzed. Same paper-trading flow as the watchlist.
+    """
+    with telemetry.cycle("universe"):
+        result = _run_watchlist_cycle(scanner, paper_trader, kill_switch)
+    telemetry.print_cycle_report()
+    return result
+
+def _run_watchlist_cycle(wl_runner, paper_trader, kill_switch):
+    print(f"\n--- ⏳ {wl_runner.label} Cycle: {datetime.now().strftime('%H:%M:%S')} ({len(wl_runner.watchlist)} symbols) ---")
+    with telemetry.span("watchlist_scan"):
+        result = wl_runner.run_cycle()
+    macro = result["macro"]
+    wl_runner.print_latency_report(result)
+
+    # Reflection: each symbol's bars only touch that symbol's positions
+    with telemetry.span("position_update"):
+        for sym, snap in result["snapshots"].items():
+            paper_trader.update_positions(snap["closes"][-1], bars=snap.get("bars"), symbol=sym)
+
+    with telemetry.span("portfolio_stats"):
+        portfolio = paper_trader.get_portfolio_stats()
+    telemetry.set_gauge("open_positions", len(portfolio["open_trades"]))
+    signals = result["signals"]
+    telemetry.count("signals", len(signals))
+    best_bet = signals[0] if signals and signals[0]["rank_score"] > 0 else None
+
+    if best_bet:
+        sym = best_bet["symbol"]
+        print(f"🏆 Top Pick: {sym} {best_bet['strategy_name']} (score {best_bet['rank_score']:+.0f})")
+        halted = kill_switch and kill_switch.is_trading_halted()
+        is_open = any(t['strategy_id'] == best_bet['strategy_id'] and t['symbol'] == sym for t in portfolio['open_trades'])
+        if not halted and not is_open:
+            snap = result["snapshots"][sym]
+            context_lite = {k: v for k, v in snap.items() if k not in ['closes', 'bars', 'htf_closes', 'sector_closes']}
+            context_lite.update(macro)
+            paper_trader.open_trade(best_bet, snap["closes"][-1], context=context_lite, symbol=sym)
+            send_trade_opened_alert(best_bet, snap["closes"][-1], context_lite)
+
+    top_symbol = best_bet["symbol"] if best_bet else (wl_runner.watchlist[0] if wl_runner.watchlist else None)
+    top_snapshot = result["snapshots"].get(top_symbol, {})
+    with telemetry.span("backtest_history"):
+        backtest_history, backtest_stats = load_backtest_sections()
+    with telemetry.span("export"):
+        export_ui({
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "symbol": top_symbol,
+            "market_stats": build_market_stats(top_snapshot, macro),
+            "signals": signals,
+            "portfolio": portfolio,
+            "best_bet": best_bet,
+            "judge_verdict": result["verdicts"].get(top_symbol, "VERDICT: NEUTRAL | No data"),
+            "watchlist": result["latency"],
+            "backtest_history": backtest_history,
+            "backtest_stats": backtest_stats
+        })
+    return result
+
+def load_universe(path: str) -> Optional[List[str]]:
+    """Symbols file (one per line, '#' comments) -> list; '' = whatever the bar store holds."""
+    if not path:
+        return None
+    with open(path) as f:
+        return [line.split("#")[0].strip().upper() for line in f if line.split("#")[0].strip()]
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+def _heartbeat_loop(interval: float = 5.0):
+    """Liveness for the supervisor + fresh metrics for the web process's /metrics."""
+    while True:
+        if STATE_CHANNEL:
+            STATE_CHANNEL.heartbeat()
+        if METRICS_CHANNEL:
+            METRICS_CHANNEL.publish(telemetry.render_prometheus().encode("utf-8"))
+        time.sleep(interval)
+
+def _import_legacy_raw():
+    from strategy_lab.raw_archive import import_legacy_lake  # Only when the job runs: keeps startup lean
+    import_legacy_lake(storage.DEFAULT_DB_PATH)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--live", action="store_true", help="Run in continuous loop")
     parser.add_argument("--auto-trade", action="store_true", help="Enable auto-trading (requires Alpaca keys)")
     parser.add_argument("--dry-run", action="store_true", help="Dry-run mode (log orders without executing)")
+    parser.add_argument("--watchlist", nargs="*", metavar="SYMBOL",
+                        help="Scan a watchlist instead of AMD only (no symbols = config.WATCHLIST). Paper trades only.")
+    parser.add_argument("--universe", nargs="?", const="", metavar="FILE",
+                        help="Rank a universe from the local bar store (FILE: one symbol per line; "
+                             "omitted = every stored symbol, seeded from config.WATCHLIST). Paper trades only.")
+    parser.add_argument("--state-channel", metavar="PATH", help="Publish cycle state to this memory-mapped file (supervised mode)")
+    parser.add_argument("--metrics-channel", metavar="PATH", help="Publish Prometheus metrics to this memory-mapped file")
     args = parser.parse_args()
 
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _terminate)  # Supervisor restarts: shut down like Ctrl+C
+
+    global STATE_CHANNEL, METRICS_CHANNEL
+    if args.state_channel:
+        STATE_CHANNEL = StateWriter(args.state_channel)
+    if args.metrics_channel:
+        METRICS_CHANNEL = StateWriter(args.metrics_channel, capacity=1024 * 1024)
+    if STATE_CHANNEL or METRICS_CHANNEL:
+        threading.Thread(target=_heartbeat_loop, name="Heartbeat", daemon=True).start()
+
     print("--- Strategy Lab: Learning Layer ---")
     library_path = os.path.join(os.path.dirname(__file__), 'library')
     strategies = StrategyValidator.load_library(library_path)
     print(f"Loaded {len(strategies)} strategies.")
 
+    from strategy_lab.data.yfinance_engine import YFinanceEngine
     engine = YFinanceEngine()
     
     # Initialize Auto-Trading Components (if enabled)
     broker = None
+    broker_state = None
     risk_mgr = None
     kill_switch = KillSwitch()
     auto_trade = False
@@ -354,6 +482,12 @@ def main():
     if args.auto_trade or args.dry_run:
         print("\n🤖 AUTO-TRADING MODE")
         risk_mgr = RiskManager()
+        try:
+            from strategy_lab.alpaca_broker import AlpacaBroker, DryRunBroker
+            ALPACA_AVAILABLE = True
+        except ImportError:
+            ALPACA_AVAILABLE = False
+            print("⚠️  Alpaca SDK not available (auto-trading disabled)")
         
         if args.dry_run:
             broker = DryRunBroker()
@@ -385,27 +519,67 @@ def main():
                 print("   Check your .env file and API keys")
                 return
         
+        if broker:
+            from strategy_lab.broker_state import BrokerState
+            broker_state = BrokerState(broker)
+            broker_state.start()
+        
         # Show kill switch status
         if kill_switch.is_trading_halted():
             print(f"🛑 Kill Switch Active: {kill_switch.get_halt_reason()}")
         else:
             print("✅ Kill Switch: Ready (create STOP_TRADING.txt to halt)")
     
+    paper_trader = get_paper_trader()  # Loads the position book once
+    
+    wl_runner = None
+    if args.watchlist is not None:
+        wl_runner = WatchlistRunner(engine, strategies, watchlist=args.watchlist or WATCHLIST,
+                                    sentiment_fn=sentiment_score)
+        print(f"📋 Watchlist Mode: {', '.join(wl_runner.watchlist)}")
+    elif args.universe is not None:
+        from strategy_lab.universe_scanner import UniverseScanner
+        wl_runner = UniverseScanner(engine, strategies, symbols=load_universe(args.universe),
+                                    sentiment_fn=sentiment_score,
+                                    held_fn=lambda: {p["symbol"] for p in paper_trader.book.open_positions()})
+        print(f"🔭 Universe Mode: {args.universe or 'every stored symbol'} (top {UNIVERSE_SETTINGS['top_k']} enriched)")
+    
+    def cycle():
+        if STATE_CHANNEL:
+            STATE_CHANNEL.cycle_started()
+        try:
+            if args.universe is not None:
+                run_universe_cycle(wl_runner, paper_trader, kill_switch=kill_switch)
+            elif wl_runner:
+                run_watchlist_cycle(wl_runner, paper_trader, kill_switch=kill_switch)
+            else:
+                run_cycle(engine, strategies, auto_trade=auto_trade, broker=broker, risk_mgr=risk_mgr, kill_switch=kill_switch, paper_trader=paper_trader, broker_state=broker_state)
+        finally:
+            if STATE_CHANNEL:
+                STATE_CHANNEL.cycle_finished()
+    
     if args.live:
         print("🚀 LIVE MODE ACTIVATED. Auto-Pilot engaged.")
-        while True:
-            try:
-                run_cycle(engine, strategies, auto_trade=auto_trade, broker=broker, risk_mgr=risk_mgr, kill_switch=kill_switch)
-                print("Waiting 60s for next scan...")
-                time.sleep(60)
-            except KeyboardInterrupt:
-                print("\nStopping Live Mode.")
-                break
-            except Exception as e:
-                print(f"Cycle Error: {e}")
-                time.sleep(60)
+        scheduler = MarketClockScheduler(cycle, maintenance_jobs=[
+            ("flush write-behind", paper_trader.flush),
+            ("optimize db", lambda: storage.get_connection(storage.DEFAULT_DB_PATH).execute("PRAGMA optimize")),
+            ("prune bars", lambda: bar_store.prune(UNIVERSE_SETTINGS["retention_days"] * 86400)),
+            ("archive legacy raw data", _import_legacy_raw),
+        ])
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            print("\nStopping Live Mode.")
     else:
-        run_cycle(engine, strategies, auto_trade=auto_trade, broker=broker, risk_mgr=risk_mgr, kill_switch=kill_switch)
+        cycle()
+    
+    if wl_runner:
+        wl_runner.close()
+    if broker_state:
+        broker_state.close()
+    close_paper_trader()
+    close_ingestor()
+    close_notifier()  # Deliver whatever is still queued
 
 if __name__ == "__main__":
     main()
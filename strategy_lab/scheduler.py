@@ -0,0 +1,235 @@
+"""
+Market Clock Scheduler
+Replaces the fixed `sleep(60)` loop:
+  1. Cycles fire on bar boundaries (session open + k * bar), so the period never drifts
+  2. Only during NYSE sessions (weekends, holidays and half days come from the calendar)
+  3. Off hours: low-frequency maintenance jobs instead of hammering the data providers
+  4. A cycle that overruns skips the boundaries it missed (coalesced into the next one)
+"""
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from strategy_lab.config import SCHEDULER_SETTINGS
+
+NY = ZoneInfo("America/New_York")
+
+REGULAR_OPEN = (9, 30)
+REGULAR_CLOSE = (16, 0)
+EARLY_CLOSE = (13, 0)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` (Mon=0) of the month; n = -1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed Friday, Sunday holidays Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+class MarketCalendar:
+    """
+    The Timekeeper.
+    NYSE regular sessions computed by rule (no calendar file to keep updated).
+    """
+
+    def __init__(self, tz: ZoneInfo = NY):
+        self.tz = tz
+        self._holiday_cache: Dict[int, Dict[date, str]] = {}
+
+    def holidays(self, year: int) -> Dict[date, str]:
+        if year in self._holiday_cache:
+            return self._holiday_cache[year]
+
+        days = {
+            _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+            _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+            _easter(year) - timedelta(days=2): "Good Friday",
+            _nth_weekday(year, 5, 0, -1): "Memorial Day",
+            _observed(date(year, 7, 4)): "Independence Day",
+            _nth_weekday(year, 9, 0, 1): "Labor Day",
+            _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+            _observed(date(year, 12, 25)): "Christmas Day",
+        }
+        # NYSE does not close the preceding Dec 31 when Jan 1 falls on a Saturday
+        new_year = date(year, 1, 1)
+        if new_year.weekday() != 5:
+            days[_observed(new_year)] = "New Year's Day"
+        if year >= 2022:
+            days[_observed(date(year, 6, 19))] = "Juneteenth"
+
+        self._holiday_cache[year] = days
+        return days
+
+    def half_days(self, year: int) -> Set[date]:
+        """1pm closes: July 3, the day after Thanksgiving, Christmas Eve (when they are trading days)."""
+        candidates = [
+            date(year, 7, 3),
+            _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+            date(year, 12, 24),
+        ]
+        return {d for d in candidates if self.is_trading_day(d)}
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays(day.year)
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """(open, close) as tz-aware datetimes, or None if the market is closed all day."""
+        if not self.is_trading_day(day):
+            return None
+        close = EARLY_CLOSE if day in self.half_days(day.year) else REGULAR_CLOSE
+        return (datetime(day.year, day.month, day.day, *REGULAR_OPEN, tzinfo=self.tz),
+                datetime(day.year, day.month, day.day, *close, tzinfo=self.tz))
+
+    def is_open(self, now: datetime) -> bool:
+        now = now.astimezone(self.tz)
+        session = self.session(now.date())
+        return bool(session) and session[0] <= now < session[1]
+
+    def next_session(self, now: datetime) -> Tuple[datetime, datetime]:
+        """The session in progress, or the next one to start."""
+        now = now.astimezone(self.tz)
+        day = now.date()
+        for _ in range(15):  # Longest NYSE closure stretch is far shorter than this
+            session = self.session(day)
+            if session and now < session[1]:
+                return session
+            day += timedelta(days=1)
+        raise RuntimeError(f"No NYSE session found within 15 days of {now}")
+
+
+class MarketClockScheduler:
+    """
+    The Metronome.
+    Runs `cycle_fn` on bar boundaries during market hours and `maintenance_jobs`
+    off hours. Both are plain (blocking) callables executed in a worker thread,
+    so the event loop stays responsive for stop() and timing.
+    """
+
+    def __init__(self, cycle_fn: Callable[[], None], calendar: Optional[MarketCalendar] = None,
+                 bar_secs: Optional[int] = None, settle_secs: Optional[float] = None,
+                 maintenance_jobs: Optional[List[Tuple[str, Callable[[], None]]]] = None,
+                 maintenance_interval_secs: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        self.cycle_fn = cycle_fn
+        self.calendar = calendar or MarketCalendar()
+        self.bar_secs = bar_secs or SCHEDULER_SETTINGS["bar_secs"]
+        self.settle_secs = SCHEDULER_SETTINGS["settle_secs"] if settle_secs is None else settle_secs
+        self.maintenance_jobs = maintenance_jobs or []
+        self.maintenance_interval_secs = maintenance_interval_secs or SCHEDULER_SETTINGS["maintenance_interval_secs"]
+        self.clock = clock
+
+        self.cycles = 0
+        self.skipped = 0
+        self._last_maintenance = 0.0
+        self._stop: Optional[asyncio.Event] = None
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self.clock(), tz=self.calendar.tz)
+
+    def next_boundary(self, now: datetime) -> datetime:
+        """
+        Next bar-close wake-up: session open + k * bar (+ settle), k >= 1,
+        up to and including the close. Rolls over to the next session after the last bar.
+        """
+        bar = timedelta(seconds=self.bar_secs)
+        settle = timedelta(seconds=self.settle_secs)
+        shifted = now - settle
+        open_, close = self.calendar.next_session(shifted)
+        k = max(1, int((shifted - open_).total_seconds() // self.bar_secs) + 1)
+        boundary = open_ + k * bar
+        if boundary > close:
+            open_, _ = self.calendar.next_session(close)
+            boundary = open_ + bar
+        return boundary + settle
+
+    def stop(self):
+        if self._stop:
+            self._stop.set()
+
+    async def _sleep_until(self, when: datetime) -> bool:
+        """Returns False if stop() was called while waiting."""
+        delay = max(0.0, (when - self._now()).total_seconds())
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    async def _run_maintenance(self):
+        for name, job in self.maintenance_jobs:
+            try:
+                await asyncio.to_thread(job)
+            except Exception as e:
+                print(f"⚠️  Maintenance job '{name}' failed: {e}")
+        self._last_maintenance = self.clock()
+
+    async def run(self, max_cycles: Optional[int] = None):
+        self._stop = asyncio.Event()
+        print(f"🕰️  Scheduler armed: {self.bar_secs}s bars, NYSE hours only")
+
+        announced = None
+        while not self._stop.is_set():
+            now = self._now()
+            wake = self.next_boundary(now)
+
+            if (wake - now).total_seconds() > self.bar_secs + self.settle_secs:
+                # Off hours: maintenance on a slow cadence until the first bar of the next session
+                if self.maintenance_jobs and self.clock() - self._last_maintenance >= self.maintenance_interval_secs:
+                    await self._run_maintenance()
+                if announced != wake:
+                    print(f"🌙 Market closed. Next cycle {wake:%a %Y-%m-%d %H:%M %Z}")
+                    announced = wake
+                target = wake
+                if self.maintenance_jobs:
+                    target = min(wake, self._now() + timedelta(seconds=self.maintenance_interval_secs))
+                if not await self._sleep_until(target):
+                    break
+                if target < wake:
+                    continue
+            elif not await self._sleep_until(wake):
+                break
+
+            started = self.clock()
+            try:
+                await asyncio.to_thread(self.cycle_fn)
+            except Exception as e:
+                print(f"Cycle Error: {e}")
+            self.cycles += 1
+
+            # Any boundary that passed while we were busy is dropped, not queued
+            elapsed = self.clock() - started
+            missed = int(elapsed // self.bar_secs)
+            if missed:
+                self.skipped += missed
+                print(f"⏭️  Cycle took {elapsed:.1f}s; skipped {missed} bar(s)")
+
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
@@ -1,36 +1,22 @@
-import sqlite3
 from typing import List, Dict
+from strategy_lab import migrations, aggregates
 
 class ScoreKeeper:
     """
     Computes performance metrics for strategies based on closed trades.
+    Reads the running per-strategy totals (strategy_lab.aggregates).
     """
     
     def __init__(self, db_path: str = "data_lake.db"):
         self.db_path = db_path
+        migrations.migrate(self.db_path)
 
     def get_strategy_stats(self) -> List[Dict]:
         """
         Returns a list of stats per strategy.
         """
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # Aggregate Stats
-        c.execute('''
-            SELECT 
-                strategy_id,
-                COUNT(*) as total_trades,
-                SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) as wins,
-                AVG(pnl) as avg_pnl,
-                SUM(pnl) as total_pnl
-            FROM trades
-            WHERE status = 'CLOSED'
-            GROUP BY strategy_id
-        ''')
-        
         stats = []
-        for row in c.fetchall():
+        for row in aggregates.get_strategy_rows(self.db_path):
             strat_id, total, wins, avg_pnl, total_pnl = row
             win_rate = (wins / total) * 100 if total > 0 else 0
             
@@ -43,5 +29,4 @@ class ScoreKeeper:
                 "status": "ACTIVE" if win_rate >= 50 else "REVIEW" # Self-Improvement Logic
             })
             
-        conn.close()
         return stats
@@ -1,67 +1,325 @@
-import requests
+"""
+Social Sentiment
+RedditEngine: one-shot scrape (four subreddits, one after another).
+SentimentIngestor: what the live bot uses. A background worker fetches every
+subreddit concurrently over one pooled session, with ETag / If-Modified-Since,
+processes only posts it hasn't seen, and keeps rolling per-symbol counters.
+The cycle reads the current score from memory.
+"""
 import re
-from typing import Dict, List
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from strategy_lab import telemetry
+from strategy_lab.config import SENTIMENT_SETTINGS
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)'}
+BULLISH_WORDS = ["MOON", "CALLS", "YOLO", "BUY", "ROCKET", "💎"]
+BEARISH_WORDS = ["PUTS", "CRASH", "RIP", "SELL", "DUMP", "🔻"]
+
+_WORD = re.compile(r"\w+")
+
+
+def _post_content(post: Dict) -> str:
+    return (post.get('title', '') + " " + post.get('selftext', '')).upper()
+
+
+def _tone(content: str) -> Tuple[int, int]:
+    """(bullish, bearish) hit for one post, each 0 or 1."""
+    # Substring checks on purpose: measured ~2x faster than one keyword alternation
+    return (int(any(x in content for x in BULLISH_WORDS)),
+            int(any(x in content for x in BEARISH_WORDS)))
+
+
+class MentionScanner:
+    """
+    The Spotter.
+    Attributes every watched ticker mentioned in a post in one pass, however long the watchlist:
+    the post is split into words once and each word is a set lookup (same matches as \\bSYMBOL\\b).
+    Tickers with punctuation (BRK.B) fall back to one compiled alternation, run only when
+    a post contains one of their leading words. Keyword tone is scanned once per mentioning
+    post and shared by every ticker it mentions.
+    """
+
+    def __init__(self, symbols: Iterable[str] = ()):
+        self._plain: set = set()
+        self._dotted: set = set()
+        self._dotted_heads: set = set()
+        self._dotted_re: Optional["re.Pattern"] = None
+        self.add(*symbols)
+
+    @property
+    def symbols(self) -> set:
+        return self._plain | self._dotted
+
+    def add(self, *symbols: str):
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if _WORD.fullmatch(symbol):
+                self._plain.add(symbol)
+            else:
+                self._dotted.add(symbol)
+                self._dotted_heads.update(_WORD.findall(symbol)[:1])
+        if self._dotted:
+            alternation = "|".join(re.escape(s) for s in sorted(self._dotted, key=len, reverse=True))
+            self._dotted_re = re.compile(fr"\b(?:{alternation})\b")
+
+    def mentioned(self, content: str) -> set:
+        """Watched tickers mentioned in an upper-cased post."""
+        words = set(_WORD.findall(content))
+        found = self._plain & words
+        if self._dotted_re is not None and not self._dotted_heads.isdisjoint(words):
+            found.update(self._dotted_re.findall(content))
+        return found
+
+    def scan(self, content: str) -> Dict[str, Tuple[int, int]]:
+        """{ticker: (bullish, bearish)} for every watched ticker the post mentions."""
+        found = self.mentioned(content)
+        if not found:
+            return {}
+        tone = _tone(content)
+        return {symbol: tone for symbol in found}
+
+    def count(self, contents: Iterable[str]) -> Dict[str, List[int]]:
+        """{ticker: [mentions, bullish, bearish]} over many upper-cased posts."""
+        counts = {symbol: [0, 0, 0] for symbol in self.symbols}
+        for content in contents:
+            for symbol, (bullish, bearish) in self.scan(content).items():
+                c = counts[symbol]
+                c[0] += 1
+                c[1] += bullish
+                c[2] += bearish
+        return counts
+
+
+def hype_from_counts(mentions: int, bullish: int, bearish: int) -> Dict:
+    # Hype Score = Scaling factor based on mentions (cap at 10 mentions = 100 hype for small scale)
+    # In prod: Normalize against average volume
+    sentiment = "NEUTRAL"
+    if bullish > bearish: sentiment = "BULLISH"
+    elif bearish > bullish: sentiment = "BEARISH"
+    return {"score": min(100, mentions * 10), "mentions": mentions, "direction": sentiment}
+
 
 class RedditEngine:
     """
     Scrapes 'Alternative Data' from Reddit to gauge retail sentiment.
     Method: Uses public .json feed (respectful scraping).
     """
-    
+
     SUBREDDITS = ["wallstreetbets", "stocks", "options", "investing"]
-    
+
     @staticmethod
     def fetch_hype(symbol: str) -> Dict:
         """
         Scans subreddits for symbol mentions.
         Returns: { 'score': 0-100, 'mentions': int, 'sentiment': 'BULLISH'/'BEARISH' }
         """
-        total_mentions = 0
-        bullish_hits = 0
-        bearish_hits = 0
-        
-        headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)'}
-        
+        symbol = symbol.upper()
+        scanner = MentionScanner([symbol])
+        contents = []
+
         for sub in RedditEngine.SUBREDDITS:
             try:
                 url = f"https://www.reddit.com/r/{sub}/new.json?limit=50"
-                r = requests.get(url, headers=headers, timeout=5)
-                
+                with telemetry.timer("provider_request_duration_seconds", errors="provider_errors_total",
+                                     provider="reddit", call="new_posts"):
+                    r = requests.get(url, headers=HEADERS, timeout=5)
+
                 if r.status_code != 200:
+                    telemetry.inc("provider_errors_total", provider="reddit", call="new_posts")
                     continue
-                    
-                data = r.json()
-                children = data['data']['children']
-                
-                for post in children:
-                    title = post['data']['title'].upper()
-                    selftext = post['data']['selftext'].upper()
-                    content = title + " " + selftext
-                    
-                    # Check for Symbol Mention
-                    if re.search(fr'\b{symbol}\b', content):
-                        total_mentions += 1
-                        
-                        # Sentiment Keyword Check
-                        if any(x in content for x in ["MOON", "CALLS", "YOLO", "BUY", "ROCKET", "💎"]):
-                            bullish_hits += 1
-                        if any(x in content for x in ["PUTS", "CRASH", "RIP", "SELL", "DUMP", "🔻"]):
-                            bearish_hits += 1
-                            
+
+                contents.extend(_post_content(post['data']) for post in r.json()['data']['children'])
+
             except Exception as e:
                 print(f"Skipping r/{sub}: {e}")
-                
-        # Calculate Score
-        # Hype Score = Scaling factor based on mentions (cap at 10 mentions = 100 hype for small scale)
-        # In prod: Normalize against average volume
-        hype_score = min(100, total_mentions * 10) 
-        
-        sentiment = "NEUTRAL"
-        if bullish_hits > bearish_hits: sentiment = "BULLISH"
-        elif bearish_hits > bullish_hits: sentiment = "BEARISH"
-        
-        return {
-            "score": hype_score,
-            "mentions": total_mentions,
-            "direction": sentiment
-        }
+
+        return hype_from_counts(*scanner.count(contents)[symbol])
+
+
+class SentimentIngestor:
+    """
+    The Listener.
+    refresh() runs on the background worker; score() is what the cycle calls.
+    """
+
+    def __init__(self, subreddits: Optional[List[str]] = None, symbols: Iterable[str] = (),
+                 session: Optional[requests.Session] = None, settings: Optional[Dict] = None):
+        self.subreddits = list(subreddits or RedditEngine.SUBREDDITS)
+        self.settings = {**SENTIMENT_SETTINGS, **(settings or {})}
+
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=len(self.subreddits)))
+        session.headers.update(HEADERS)
+        self.session = session
+        self._pool = ThreadPoolExecutor(max_workers=len(self.subreddits), thread_name_prefix="RedditFetch")
+
+        self._lock = threading.Lock()
+        self._validators: Dict[str, Dict[str, str]] = {}        # sub -> conditional request headers
+        self._seen: "OrderedDict[str, None]" = OrderedDict()    # post ids, oldest first
+        self._posts: deque = deque()                            # (ingested_at, content, {symbol: tone}) inside the window
+        self._counts: Dict[str, List[int]] = {}                 # symbol -> [mentions, bullish, bearish]
+        self._scanner = MentionScanner()
+        for symbol in symbols:
+            self._track(symbol.upper())
+
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    # --- Cycle side ---
+
+    def score(self, symbol: str) -> Dict:
+        """Current hype for `symbol` from the rolling window. No network."""
+        symbol = symbol.upper()
+        with self._lock:
+            self._expire(time.time())
+            if symbol not in self._counts:
+                self._track(symbol)
+            return hype_from_counts(*self._counts[symbol])
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the first refresh has finished (instant afterwards)."""
+        return self._ready.wait(timeout)
+
+    # --- Ingestion ---
+
+    def _track(self, symbol: str):
+        # Caller holds the lock. A new symbol is back-filled from the posts still in the window.
+        self._counts[symbol] = [0, 0, 0]
+        self._scanner.add(symbol)
+        single = MentionScanner([symbol])
+        for _, content, hits in self._posts:
+            hits.update(single.scan(content))
+            self._apply({symbol: hits[symbol]} if symbol in hits else {}, +1)
+
+    def _apply(self, hits: Dict[str, Tuple[int, int]], sign: int):
+        # Caller holds the lock
+        for symbol, (bullish, bearish) in hits.items():
+            counts = self._counts[symbol]
+            counts[0] += sign
+            counts[1] += sign * bullish
+            counts[2] += sign * bearish
+
+    def _expire(self, now: float):
+        # Caller holds the lock
+        cutoff = now - self.settings["window_secs"]
+        while self._posts and self._posts[0][0] < cutoff:
+            _, _, hits = self._posts.popleft()
+            self._apply(hits, -1)
+
+    def _fetch(self, sub: str) -> Optional[List[Dict]]:
+        """New posts of one subreddit; None when unchanged (304) or failed."""
+        url = f"https://www.reddit.com/r/{sub}/new.json?limit={self.settings['posts_per_fetch']}"
+        try:
+            with telemetry.timer("provider_request_duration_seconds", errors="provider_errors_total",
+                                 provider="reddit", call="new_posts"):
+                r = self.session.get(url, headers=self._validators.get(sub, {}),
+                                     timeout=self.settings["request_timeout_secs"])
+        except requests.RequestException as e:
+            print(f"Skipping r/{sub}: {e}")
+            return None
+
+        if r.status_code == 304:
+            telemetry.inc("reddit_not_modified_total")
+            return None
+        if r.status_code != 200:
+            telemetry.inc("provider_errors_total", provider="reddit", call="new_posts")
+            print(f"Skipping r/{sub}: HTTP {r.status_code}")
+            return None
+
+        validators = {}
+        if r.headers.get("ETag"):
+            validators["If-None-Match"] = r.headers["ETag"]
+        if r.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = r.headers["Last-Modified"]
+        self._validators[sub] = validators
+        try:
+            return [child['data'] for child in r.json()['data']['children']]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Skipping r/{sub}: {e}")
+            return None
+
+    def ingest(self, posts: Iterable[Dict], now: Optional[float] = None) -> int:
+        """Adds posts not seen before to the rolling counters. Returns how many were new."""
+        now = now or time.time()
+        new = 0
+        with self._lock:
+            for post in posts:
+                post_id = post.get('name') or post.get('id')
+                if post_id in self._seen:
+                    continue
+                if post_id:
+                    self._seen[post_id] = None
+                content = _post_content(post)
+                hits = self._scanner.scan(content)  # One pass attributes every tracked symbol
+                self._posts.append((now, content, hits))
+                self._apply(hits, +1)
+                new += 1
+            while len(self._seen) > self.settings["max_seen_ids"]:
+                self._seen.popitem(last=False)
+            self._expire(now)
+        telemetry.inc("reddit_posts_ingested_total", new)
+        return new
+
+    def refresh(self) -> int:
+        """One concurrent pass over every subreddit. Returns the number of new posts."""
+        new = 0
+        with telemetry.span("reddit_refresh"):
+            for posts in self._pool.map(self._fetch, self.subreddits):
+                if posts:
+                    new += self.ingest(posts)
+        self._ready.set()
+        return new
+
+    # --- Worker ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️  Reddit refresh failed: {e}")
+                self._ready.set()  # Don't leave cycles waiting on a broken feed
+            self._stop.wait(self.settings["refresh_secs"])
+
+    def start(self) -> "SentimentIngestor":
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="SentimentIngestor", daemon=True)
+            self._worker.start()
+        return self
+
+    def close(self, timeout: Optional[float] = 5.0):
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_INGESTOR: Optional[SentimentIngestor] = None
+_INGESTOR_LOCK = threading.Lock()
+
+
+def get_ingestor() -> SentimentIngestor:
+    """Process-wide ingestor, started on first use."""
+    global _INGESTOR
+    with _INGESTOR_LOCK:
+        if _INGESTOR is None:
+            _INGESTOR = SentimentIngestor().start()
+        return _INGESTOR
+
+
+def close_ingestor():
+    global _INGESTOR
+    with _INGESTOR_LOCK:
+        if _INGESTOR is not None:
+            _INGESTOR.close()
+            _INGESTOR = None
@@ -0,0 +1,166 @@
+"""
+State Channel
+A memory-mapped file the bot process writes its latest cycle state into and the
+web process reads from. No sockets, no DB round trip, no re-serialization:
+
+    [ header (64 bytes) | payload (JSON bytes, up to `capacity`) ]
+
+The header holds a seqlock counter (odd while a write is in progress), the
+payload length, the writer's pid, a heartbeat timestamp and "cycle busy since".
+Readers copy the payload once per new sequence number and hand the same bytes
+object to every request until the bot publishes again.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+MAGIC = b"SLSC"
+LAYOUT_VERSION = 1
+HEADER = struct.Struct("<4sIQIIdd")  # magic, layout, seq, length, pid, heartbeat, busy_since
+HEADER_SIZE = 64
+SEQ_OFFSET = 8
+DEFAULT_CAPACITY = 4 * 1024 * 1024  # 4MB: the full dashboard payload is ~35KB
+
+
+def default_path(name: str = "state") -> str:
+    """Shared by both processes; /dev/shm keeps it in RAM where available."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.environ.get(f"STRATEGY_LAB_{name.upper()}_CHANNEL", os.path.join(base, f"strategy_lab_{name}"))
+
+
+class StateWriter:
+    """
+    The Broadcaster's Pen (bot process).
+    Single writer per channel file.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+
+        # Write to a fresh file then swap it in, so readers never map a half-sized region
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.truncate(HEADER_SIZE + capacity)
+        os.replace(tmp, path)
+
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), HEADER_SIZE + capacity)
+        self._seq = 0
+        self._length = 0
+        self._busy_since = 0.0
+        self._write_header()
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, LAYOUT_VERSION, self._seq, self._length,
+                         os.getpid(), time.time(), self._busy_since)
+
+    def publish(self, payload: bytes) -> bool:
+        if len(payload) > self.capacity:
+            print(f"⚠️  State channel: payload {len(payload)}B exceeds {self.capacity}B, not published")
+            return False
+        with self._lock:
+            self._seq += 1  # Odd: readers back off
+            struct.pack_into("<Q", self._mm, SEQ_OFFSET, self._seq)
+            self._mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+            self._length = len(payload)
+            self._seq += 1  # Even: consistent again
+            self._write_header()
+        return True
+
+    def heartbeat(self):
+        with self._lock:
+            self._write_header()
+
+    def cycle_started(self):
+        with self._lock:
+            self._busy_since = time.time()
+            self._write_header()
+
+    def cycle_finished(self):
+        with self._lock:
+            self._busy_since = 0.0
+            self._write_header()
+
+    def close(self):
+        with self._lock:
+            self._mm.close()
+            self._file.close()
+
+
+class StateReader:
+    """
+    The Broadcaster's Ear (web process).
+    Re-maps automatically when the bot restarts and recreates the file.
+    """
+
+    MAX_RETRIES = 100
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._identity: Optional[Tuple[int, int]] = None
+        self._cached_seq = -1
+        self._cached: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def _mapping(self) -> Optional[mmap.mmap]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        identity = (st.st_dev, st.st_ino)
+        if self._mm is None or identity != self._identity:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if st.st_size < HEADER_SIZE:
+                return None
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), st.st_size, access=mmap.ACCESS_READ)
+            self._identity = identity
+            self._cached_seq, self._cached = -1, None
+        return self._mm
+
+    def status(self) -> Optional[Dict]:
+        """Header only: {'seq', 'pid', 'heartbeat', 'busy_since', 'length'}"""
+        with self._lock:
+            mm = self._mapping()
+            if mm is None:
+                return None
+            magic, _, seq, length, pid, heartbeat, busy_since = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            return None
+        return {"seq": seq, "length": length, "pid": pid, "heartbeat": heartbeat, "busy_since": busy_since}
+
+    def read(self) -> Tuple[int, Optional[bytes]]:
+        """(seq, payload). The same bytes object is returned until the writer publishes again."""
+        with self._lock:
+            mm = self._mapping()
+            if mm is None:
+                return 0, None
+            for _ in range(self.MAX_RETRIES):
+                magic, _, seq, length, *_ = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or seq == 0:
+                    return 0, None
+                if seq == self._cached_seq:
+                    return seq, self._cached
+                if seq % 2:
+                    time.sleep(0.0005)  # Writer mid-publish
+                    continue
+                data = mm[HEADER_SIZE:HEADER_SIZE + length]
+                if struct.unpack_from("<Q", mm, SEQ_OFFSET)[0] == seq:
+                    self._cached_seq, self._cached = seq, data
+                    return seq, data
+            return self._cached_seq, self._cached  # Writer is hammering; serve the last good copy
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
@@ -0,0 +1,131 @@
+"""
+Shared Storage Layer
+One long-lived SQLite connection per (thread, database) with WAL enabled.
+Every module goes through here instead of calling sqlite3.connect() per method.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from strategy_lab import telemetry
+
+DEFAULT_DB_PATH = "data_lake.db"
+
+# Tuning
+BUSY_TIMEOUT_MS = 5000        # Wait up to 5s for a competing writer instead of failing
+CACHED_STATEMENTS = 256       # Prepared statement cache per connection
+CACHE_SIZE_KB = 16384         # 16MB page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024 # Memory-map up to 256MB of the DB file
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",          # Readers never block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",        # Safe with WAL, far fewer fsyncs
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_live: Dict[int, Tuple[str, sqlite3.Connection]] = {}  # id(conn) -> (key, conn), across all threads
+
+
+def _key(db_path: str) -> str:
+    return db_path if db_path == ":memory:" else os.path.abspath(db_path)
+
+
+def file_identity(db_path: str) -> Optional[Tuple[int, int]]:
+    """(device, inode) of the DB file, used to detect a deleted/replaced file."""
+    if db_path == ":memory:":
+        return None
+    try:
+        st = os.stat(db_path)
+        return (st.st_dev, st.st_ino)
+    except OSError:
+        return None
+
+
+def _open(db_path: str) -> sqlite3.Connection:
+    # check_same_thread=False only so close_connections() can close from any thread;
+    # each connection is still handed out to exactly one thread.
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=False,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _discard(conn: sqlite3.Connection):
+    with _registry_lock:
+        _live.pop(id(conn), None)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def get_connection(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """
+    Returns this thread's long-lived connection to db_path.
+    Opened lazily on first use and re-opened if the file was removed/replaced.
+    Callers must NOT close it; use transaction() for writes.
+    """
+    key = _key(db_path)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    cached = conns.get(key)
+    if cached is not None:
+        conn, identity = cached
+        if id(conn) in _live and (identity is None or file_identity(db_path) == identity):
+            return conn
+        # Closed elsewhere, or the file was deleted/swapped underneath us
+        _discard(conn)
+
+    conn = _open(db_path)
+    conns[key] = (conn, file_identity(db_path))
+    with _registry_lock:
+        _live[id(conn)] = (key, conn)
+    return conn
+
+
+@contextmanager
+def transaction(db_path: str = DEFAULT_DB_PATH) -> Iterator[sqlite3.Connection]:
+    """
+    Atomic unit of work on the thread's pooled connection.
+    Commits on success, rolls back on any exception.
+    """
+    conn = get_connection(db_path)
+    with telemetry.timer("db_duration_seconds", op="transaction"):
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def close_connections(db_path: Optional[str] = None):
+    """
+    Closes pooled connections (all threads) for db_path, or for every DB if None.
+    Intended for shutdown and for tests that delete the DB file.
+    """
+    key = _key(db_path) if db_path is not None else None
+    with _registry_lock:
+        doomed = [conn for conn_key, conn in _live.values() if key is None or conn_key == key]
+        for conn in doomed:
+            _live.pop(id(conn), None)
+
+    for conn in doomed:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
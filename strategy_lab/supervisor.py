@@ -0,0 +1,210 @@
+"""
+Bot Supervisor
+Runs strategy_lab.runner as a child process (its own interpreter and GIL) and
+restarts it when it exits, or when its state channel shows it is wedged:
+  - heartbeat older than HEARTBEAT_TIMEOUT_SECS  -> process frozen
+  - one cycle busy for longer than CYCLE_TIMEOUT_SECS -> cycle hung (provider never answered, etc.)
+Restarts back off exponentially, resetting once the bot has stayed up for a while.
+
+The bot never outlives the web process: it runs in its own process group, which
+is killed on atexit/SIGTERM, and on Linux the kernel SIGTERMs it (PR_SET_PDEATHSIG)
+even if the web process is SIGKILLed. A second supervisor refuses to spawn while
+the state channel shows another live bot, so two bots never share data_lake.db.
+
+Standalone:
+    python -m strategy_lab.supervisor [runner args...]
+"""
+import atexit
+import ctypes
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from strategy_lab import telemetry
+from strategy_lab.state_channel import StateReader, default_path
+
+HEARTBEAT_TIMEOUT_SECS = 120
+CYCLE_TIMEOUT_SECS = 600
+CHECK_INTERVAL_SECS = 5
+BACKOFF_INITIAL_SECS = 1
+BACKOFF_MAX_SECS = 60
+STABLE_AFTER_SECS = 300  # Uptime that resets the backoff
+STARTUP_GRACE_SECS = 60  # Imports + migrations before the first heartbeat is expected
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PR_SET_PDEATHSIG = 1
+
+
+def _pdeathsig_hook():
+    """preexec_fn for Linux: SIGTERM the child when the thread that spawned it dies. None elsewhere."""
+    if not sys.platform.startswith("linux"):
+        return None
+    prctl = ctypes.CDLL(None, use_errno=True).prctl  # Resolved before fork: the child only makes the call
+    parent = os.getpid()
+
+    def hook():
+        prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+        if os.getppid() != parent:  # Parent already gone before prctl took effect
+            os._exit(1)
+    return hook
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class BotSupervisor:
+    """
+    The Warden.
+    """
+
+    def __init__(self, runner_args: Optional[List[str]] = None, state_path: Optional[str] = None,
+                 metrics_path: Optional[str] = None):
+        self.state_path = state_path or default_path("state")
+        self.metrics_path = metrics_path or default_path("metrics")
+        self.runner_args = list(runner_args or ["--live"])
+        self.reader = StateReader(self.state_path)
+        self.proc: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self._started_at = 0.0
+        self._backoff = BACKOFF_INITIAL_SECS
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def command(self) -> List[str]:
+        return [sys.executable, "-m", "strategy_lab.runner", *self.runner_args,
+                "--state-channel", self.state_path, "--metrics-channel", self.metrics_path]
+
+    def live_bot_pid(self, now: Optional[float] = None) -> Optional[int]:
+        """Pid of a bot we did not start that is still heartbeating on the state channel, if any."""
+        now = now or time.time()
+        status = self.reader.status()
+        if status is None or not status["pid"]:
+            return None
+        pid = status["pid"]
+        if self.proc is not None and pid == self.proc.pid:
+            return None
+        if now - status["heartbeat"] > HEARTBEAT_TIMEOUT_SECS or not pid_alive(pid):
+            return None
+        return pid
+
+    def _spawn(self) -> bool:
+        """Starts the bot unless another one is still live on the same state channel."""
+        other = self.live_bot_pid()
+        if other is not None:
+            print(f"⛔ Bot pid {other} is still heartbeating on {self.state_path}; not starting a second bot")
+            telemetry.inc("bot_spawns_refused_total")
+            return False
+        self.proc = subprocess.Popen(self.command(), cwd=PROJECT_ROOT, start_new_session=True,
+                                     preexec_fn=_pdeathsig_hook())
+        self._started_at = time.time()
+        print(f"🧬 Bot process started (pid {self.proc.pid})")
+        return True
+
+    def _spawn_when_clear(self) -> bool:
+        """Spawns as soon as no other bot is live. False if asked to stop first."""
+        while not self._spawn():
+            if self._stop.wait(CHECK_INTERVAL_SECS):
+                return False
+        return True
+
+    def _signal_group(self, sig: int):
+        try:
+            os.killpg(self.proc.pid, sig)  # Own session: the runner and any workers it forked
+        except ProcessLookupError:
+            pass
+
+    def _kill(self, reason: str):
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        print(f"🔪 Stopping bot (pid {self.proc.pid}): {reason}")
+        self._signal_group(signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._signal_group(signal.SIGKILL)
+            self.proc.wait()
+
+    def wedged_reason(self, now: Optional[float] = None) -> Optional[str]:
+        """Why the running bot should be restarted, judging by its state channel."""
+        now = now or time.time()
+        if now - self._started_at < STARTUP_GRACE_SECS:
+            return None
+        status = self.reader.status()
+        if status is None or (self.proc is not None and status["pid"] != self.proc.pid):
+            return "no heartbeat since start"
+        if now - status["heartbeat"] > HEARTBEAT_TIMEOUT_SECS:
+            return f"heartbeat {now - status['heartbeat']:.0f}s old"
+        if status["busy_since"] and now - status["busy_since"] > CYCLE_TIMEOUT_SECS:
+            return f"cycle running for {now - status['busy_since']:.0f}s"
+        return None
+
+    def run(self):
+        if not self._spawn_when_clear():
+            return
+        while not self._stop.wait(CHECK_INTERVAL_SECS):
+            code = self.proc.poll()
+            if code is None:
+                reason = self.wedged_reason()
+                if not reason:
+                    continue
+                self._kill(reason)
+                code = self.proc.poll()
+            else:
+                print(f"💥 Bot exited with code {code}")
+
+            uptime = time.time() - self._started_at
+            self._backoff = BACKOFF_INITIAL_SECS if uptime > STABLE_AFTER_SECS else min(self._backoff * 2, BACKOFF_MAX_SECS)
+            self.restarts += 1
+            telemetry.inc("bot_restarts_total")
+            print(f"🔁 Restarting bot in {self._backoff}s (restart #{self.restarts})")
+            if self._stop.wait(self._backoff) or not self._spawn_when_clear():
+                break
+        self._kill("supervisor stopping")
+
+    def start(self) -> threading.Thread:
+        """Supervises from a daemon thread (used by app.py)."""
+        self.install_exit_hooks()
+        self._thread = threading.Thread(target=self.run, name="BotSupervisor", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def install_exit_hooks(self):
+        """Stop the bot on interpreter exit and on SIGTERM (chaining to any existing handler)."""
+        atexit.register(self.stop)
+        if threading.current_thread() is not threading.main_thread():
+            return  # signal.signal only works from the main thread; atexit + PDEATHSIG still apply
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def on_sigterm(signum, frame):
+            self.stop()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                raise SystemExit(128 + signum)
+        signal.signal(signal.SIGTERM, on_sigterm)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(15)
+        self._kill("supervisor stopping")
+
+
+if __name__ == "__main__":
+    supervisor = BotSupervisor(sys.argv[1:] or None)
+    supervisor.install_exit_hooks()
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        supervisor.stop()
@@ -0,0 +1,306 @@
+"""
+Telemetry
+In-process latency histograms, counters and gauges, plus a structured record per cycle.
+
+    with telemetry.cycle("single"):
+        with telemetry.span("macro_fetch"):
+            macro = engine.fetch_macro_stats()
+        telemetry.count("signals", len(signals))
+
+A span costs two perf_counter() calls, one bisect and a lock; nothing touches disk or the network.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds. Covers sub-ms in-memory stages up to a provider that hangs for a minute.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+RECENT_CYCLES = 100
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics: value <= bound)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        out, running = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            out.append((bound, running))
+        return out
+
+
+class CycleRecord:
+    """Everything measured during one pipeline cycle."""
+
+    def __init__(self, number: int, mode: str):
+        self.number = number
+        self.mode = mode
+        self.started_at = datetime.now()
+        self.duration_ms: Optional[float] = None
+        self.stages: Dict[str, Dict] = {}
+        self.counts: Dict[str, float] = {}
+
+    def add_stage(self, stage: str, seconds: float, ok: bool):
+        row = self.stages.setdefault(stage, {"ms": 0.0, "calls": 0, "errors": 0})
+        row["ms"] += seconds * 1000
+        row["calls"] += 1
+        row["errors"] += 0 if ok else 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "cycle": self.number,
+            "mode": self.mode,
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "stages": {k: {**v, "ms": round(v["ms"], 1)} for k, v in self.stages.items()},
+            "counts": dict(self.counts),
+        }
+
+
+class Registry:
+    """
+    The Stopwatch.
+    Process-wide metric store. One cycle is "current" at a time (the bot runs
+    cycles sequentially); spans from worker threads attach to it too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.gauges: Dict[Tuple[str, LabelKey], float] = {}
+        self.recent: deque = deque(maxlen=RECENT_CYCLES)
+        self._current: Optional[CycleRecord] = None
+        self._cycles = 0
+
+    # --- Primitives ---
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _key(labels))] = value
+
+    # --- Spans / cycles ---
+
+    @contextmanager
+    def timer(self, name: str, errors: Optional[str] = None, **labels) -> Iterator[None]:
+        """Times the block into histogram `name`; exceptions also bump counter `errors`."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            if errors:
+                self.inc(errors, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, errors: Optional[str] = None, **labels):
+        """Decorator form of timer()."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, errors, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe("stage_duration_seconds", elapsed, stage=stage, **labels)
+            if not ok:
+                self.inc("stage_errors_total", stage=stage, **labels)
+            record = self._current
+            if record is not None:
+                with self._lock:
+                    record.add_stage(stage, elapsed, ok)
+
+    def count(self, name: str, amount: float = 1):
+        """Per-cycle count (e.g. signals); also feeds the `{name}_total` counter."""
+        self.inc(f"{name}_total", amount)
+        record = self._current
+        if record is not None:
+            with self._lock:
+                record.counts[name] = record.counts.get(name, 0) + amount
+
+    @contextmanager
+    def cycle(self, mode: str = "single") -> Iterator[CycleRecord]:
+        with self._lock:
+            self._cycles += 1
+            record = CycleRecord(self._cycles, mode)
+        self._current = record
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            self.inc("cycle_errors_total", mode=mode)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            record.duration_ms = elapsed * 1000
+            self.observe("cycle_duration_seconds", elapsed, mode=mode)
+            self.set_gauge("last_cycle_timestamp_seconds", time.time(), mode=mode)
+            for name, value in record.counts.items():
+                self.set_gauge(f"{name}_last_cycle", value, mode=mode)
+            self._current = None
+            with self._lock:
+                self.recent.append(record.to_dict())
+
+    # --- Read side ---
+
+    def last_cycle(self) -> Optional[Dict]:
+        with self._lock:
+            return self.recent[-1] if self.recent else None
+
+    def recent_cycles(self) -> List[Dict]:
+        with self._lock:
+            return list(self.recent)
+
+    def families(self) -> Dict[str, Tuple[str, List]]:
+        """{name: (type, [(labels, value), ...])} - a consistent copy for exporters."""
+        with self._lock:
+            out: Dict[str, Tuple[str, List]] = {}
+            for (name, labels), hist in self.histograms.items():
+                out.setdefault(name, ("histogram", []))[1].append(
+                    (labels, {"buckets": hist.cumulative(), "sum": hist.sum, "count": hist.count}))
+            for (name, labels), value in self.counters.items():
+                out.setdefault(name, ("counter", []))[1].append((labels, value))
+            for (name, labels), value in self.gauges.items():
+                out.setdefault(name, ("gauge", []))[1].append((labels, value))
+            return out
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.recent.clear()
+            self._current = None
+            self._cycles = 0
+
+
+REGISTRY = Registry()
+
+# Module-level shortcuts onto the process-wide registry
+span = REGISTRY.span
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+cycle = REGISTRY.cycle
+count = REGISTRY.count
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set_gauge
+last_cycle = REGISTRY.last_cycle
+
+
+def print_cycle_report(record: Optional[Dict] = None):
+    record = record or last_cycle()
+    if not record:
+        return
+    stages = sorted(record["stages"].items(), key=lambda kv: -kv[1]["ms"])
+    breakdown = " | ".join(f"{name}={row['ms']:.0f}ms" + ("!" if row["errors"] else "") for name, row in stages)
+    print(f"⏱️  Cycle #{record['cycle']} {record['duration_ms']:.0f}ms :: {breakdown}")
+
+
+# --- PROMETHEUS TEXT EXPOSITION ---
+
+PREFIX = "strategy_lab_"
+
+HELP = {
+    "cycle_duration_seconds": "Wall time of one bot cycle",
+    "cycle_errors_total": "Cycles that raised",
+    "stage_duration_seconds": "Wall time of one pipeline stage",
+    "stage_errors_total": "Pipeline stages that raised",
+    "provider_request_duration_seconds": "Latency of one market/social data provider call",
+    "provider_errors_total": "Failed data provider calls",
+    "provider_queue_depth": "Requests waiting for a rate-limit token",
+    "provider_requests_coalesced_total": "Requests served by an identical request already queued or in flight",
+    "db_duration_seconds": "SQLite transaction/query time",
+    "discord_send_duration_seconds": "Latency of one Discord webhook post",
+    "discord_errors_total": "Failed Discord webhook posts",
+    "signals_total": "Strategy signals produced",
+    "signals_last_cycle": "Strategy signals produced by the most recent cycle",
+    "open_positions": "Open paper positions",
+    "last_cycle_timestamp_seconds": "Unix time the most recent cycle finished",
+    "bot_restarts_total": "Times the supervisor restarted the bot process",
+    "bot_spawns_refused_total": "Spawns skipped because another bot was still live on the state channel",
+    "write_behind_id_collisions_total": "Write-behind inserts whose id already held a different row",
+}
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus(registry: Registry = REGISTRY, prefix: str = PREFIX) -> str:
+    """Prometheus text format (v0.0.4) straight from memory."""
+    lines = []
+    for name, (kind, series) in sorted(registry.families().items()):
+        full = prefix + name
+        lines.append(f"# HELP {full} {HELP.get(name, name.replace('_', ' '))}")
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in sorted(series, key=lambda s: s[0]):
+            if kind == "histogram":
+                for bound, n in value["buckets"]:
+                    lines.append(f"{full}_bucket{_labels(labels, (('le', _fmt(bound)),))} {n}")
+                lines.append(f"{full}_sum{_labels(labels)} {_fmt(value['sum'])}")
+                lines.append(f"{full}_count{_labels(labels)} {value['count']}")
+            else:
+                lines.append(f"{full}{_labels(labels)} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
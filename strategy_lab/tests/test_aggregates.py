@@ -0,0 +1,59 @@
+import unittest
+import os
+from strategy_lab import storage, migrations, aggregates
+from strategy_lab.paper_trader import PaperTrader
+
+class TestAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_aggregates.db"
+        self.trader = PaperTrader(db_path=self.test_db)
+
+    def tearDown(self):
+        self.trader.close()
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm", self.test_db + ".journal"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _store_decision(self, strategy, outcome_7d, regime):
+        with storage.transaction(self.test_db) as conn:
+            conn.execute("INSERT INTO backtest_history (recommended_strategy, outcome_7d, market_regime) VALUES (?, ?, ?)",
+                         (strategy, outcome_7d, regime))
+            aggregates.record_decision(conn, strategy, outcome_7d, regime)
+
+    def test_trade_closes_update_totals(self):
+        win = {"strategy_id": "strat_a", "direction": "BULLISH", "features_matched": {}}
+        loss = {"strategy_id": "strat_b", "direction": "BULLISH", "features_matched": {}}
+        self.trader.close_trade(self.trader.open_trade(win, 100.0), 110.0)
+        self.trader.close_trade(self.trader.open_trade(loss, 100.0), 90.0)
+        self.trader.flush()
+
+        stats = self.trader.get_portfolio_stats()
+        self.assertEqual(stats["total_trades"], 2)
+        self.assertEqual(stats["win_rate"], 50.0)
+        self.assertEqual(aggregates.verify(self.test_db), [])
+
+    def test_backtest_summary_matches_recompute(self):
+        self._store_decision("bull", 4.0, "BULL_RUN")
+        self._store_decision("bull", -1.0, "SIDEWAYS")
+        self._store_decision("bear", -5.0, "BEAR_CRASH")
+        self._store_decision(None, 0.5, "SIDEWAYS")
+
+        summary = aggregates.get_backtest_summary(self.test_db)
+        self.assertEqual(summary["total_decisions"], 4)
+        self.assertEqual(summary["regimes"], {"BULL_RUN": 1, "SIDEWAYS": 2, "BEAR_CRASH": 1})
+        self.assertEqual(summary["strategies"][0], {"name": "bull", "count": 2, "avg_outcome": 1.5, "win_rate": 50.0})
+        self.assertEqual(aggregates.verify(self.test_db), [])
+
+    def test_rebuild_repairs_drift(self):
+        self._store_decision("bull", 4.0, "BULL_RUN")
+        storage.get_connection(self.test_db).execute("UPDATE backtest_stats SET decisions = 99")
+        storage.get_connection(self.test_db).commit()
+
+        self.assertNotEqual(aggregates.verify(self.test_db), [])
+        aggregates.rebuild(self.test_db)
+        self.assertEqual(aggregates.verify(self.test_db), [])
+
+if __name__ == '__main__':
+    unittest.main()
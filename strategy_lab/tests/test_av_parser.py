@@ -0,0 +1,64 @@
+import random
+import unittest
+import numpy as np
+from strategy_lab.data import av_parser
+from strategy_lab.data.av_parser import ParsedCache, parse_news_sentiment, parse_time_series
+
+def intraday(closes, shuffle=False):
+    """Newest first, like the API (closes[0] is the latest bar)."""
+    latest = np.datetime64("2026-01-02T15:59")
+    rows = [(str(latest - i).replace("T", " ") + ":00",
+             {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": str(c), "5. volume": "100"})
+            for i, c in enumerate(closes)]
+    if shuffle:
+        random.Random(7).shuffle(rows)
+    return {"Meta Data": {"2. Symbol": "AMD"}, "Time Series (1min)": dict(rows)}
+
+def news(scores):
+    return {"feed": [{"time_published": f"2026010{i + 1}T093000", "overall_sentiment_score": s,
+                      "ticker_sentiment": [{"ticker": "AMD", "ticker_sentiment_score": "0.2",
+                                            "relevance_score": "0.9"}]}
+                     for i, s in enumerate(scores)]}
+
+class TestAVParser(unittest.TestCase):
+
+    def test_time_series_sorted_oldest_first_whatever_the_dict_order(self):
+        closes = [110.0] + [100.0] * 59
+        columns = parse_time_series(intraday(closes, shuffle=True))
+        self.assertTrue(np.all(np.diff(columns["time"]) > 0))
+        self.assertEqual(columns["close"][-1], 110.0)
+        self.assertEqual(columns["close"].dtype, np.float64)
+        self.assertEqual(av_parser.technical_scores([columns])[0], 75.0)
+
+    def test_news_sentiment_columns(self):
+        columns = parse_news_sentiment(news([0.3, -0.1]), "AMD")
+        self.assertEqual(list(columns["overall"]), [0.3, -0.1])
+        self.assertEqual(columns["time"][1] - columns["time"][0], 86400)
+        self.assertEqual(list(columns["relevance"]), [0.9, 0.9])
+        self.assertTrue(np.isnan(parse_news_sentiment(news([0.3]), "NVDA")["ticker"][0]))
+
+    def test_no_articles_is_not_a_failed_response(self):
+        columns = parse_news_sentiment({"items": "0", "feed": []}, "SPY")
+        self.assertEqual(len(columns["overall"]), 0)
+        self.assertEqual(av_parser.sentiment_scores([columns])[0], 50.0)
+        self.assertIsNone(parse_news_sentiment({"Information": "quota"}, "SPY"))
+        self.assertIsNone(parse_news_sentiment(None, "SPY"))
+
+    def test_batch_matches_one_at_a_time(self):
+        series = [parse_time_series(intraday([90.0] + [100.0] * 10)), None,
+                  parse_time_series(intraday([100.0] * 80))]
+        feeds = [parse_news_sentiment(news([0.1, 0.3])), None, parse_news_sentiment(news([-0.9]))]
+        self.assertEqual(list(av_parser.technical_scores(series)), [25.0, 50.0, 50.0])
+        self.assertEqual([av_parser.technical_scores([s])[0] for s in series], [25.0, 50.0, 50.0])
+        np.testing.assert_allclose(av_parser.sentiment_scores(feeds), [70.0, 50.0, 0.0])
+
+    def test_parsed_once_per_content_hash(self):
+        cache = ParsedCache(size=2)
+        payload = intraday([100.0] * 5)
+        first = cache.get_or_parse("abc", "TIME_SERIES_INTRADAY", payload, "AMD")
+        self.assertIs(cache.get_or_parse("abc", "TIME_SERIES_INTRADAY", {}, "AMD"), first)
+        self.assertFalse(first["close"].flags.writeable)
+        self.assertIsNone(cache.get_or_parse("def", "EARNINGS", {"quarterlyEarnings": []}, "AMD"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import os
 import sqlite3
+from strategy_lab import storage
 from strategy_lab.paper_trader import PaperTrader
 
 class TestPaperTrader(unittest.TestCase):
@@ -18,8 +19,11 @@ class TestPaperTrader(unittest.TestCase):
         self.trader = PaperTrader(db_path=self.test_db)
 
     def tearDown(self):
-        if os.path.exists(self.test_db):
-            os.remove(self.test_db)
+        self.trader.close()
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm", self.test_db + ".journal"):
+            if os.path.exists(path):
+                os.remove(path)
 
     def test_trade_lifecycle(self):
         signal = { 
@@ -34,6 +38,7 @@ class TestPaperTrader(unittest.TestCase):
         
         # Close Trade at $110 (10% Gain)
         self.trader.close_trade(trade_id, 110.0)
+        self.trader.flush()
         
         # Verify DB
         conn = sqlite3.connect(self.test_db)
@@ -41,9 +46,13 @@ class TestPaperTrader(unittest.TestCase):
         c.execute("SELECT pnl, pnl_pct, status FROM trades WHERE id=?", (trade_id,))
         pnl, pct, status = c.fetchone()
         
+        # Slippage: buy at ask on entry, sell at bid on exit
+        entry = 100.0 * (1 + PaperTrader.SLIPPAGE)
+        exit_price = 110.0 * (1 - PaperTrader.SLIPPAGE)
+        
         self.assertEqual(status, 'CLOSED')
-        self.assertAlmostEqual(pnl, 10.0)
-        self.assertAlmostEqual(pct, 10.0)
+        self.assertAlmostEqual(pnl, exit_price - entry)
+        self.assertAlmostEqual(pct, (exit_price - entry) / entry * 100)
 
 if __name__ == '__main__':
     unittest.main()
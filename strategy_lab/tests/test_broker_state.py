@@ -0,0 +1,152 @@
+import threading
+import time
+import unittest
+from strategy_lab.alpaca_broker import DryRunBroker
+from strategy_lab.broker_state import BrokerState, LocalTradeStream
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class FakeBroker:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.account = {"cash": 10000.0, "portfolio_value": 10000.0, "buying_power": 10000.0, "equity": 10000.0}
+        self.positions = [{"symbol": "AMD", "qty": 5, "avg_entry_price": 100.0, "current_price": 100.0,
+                           "unrealized_pl": 0.0, "unrealized_plpc": 0.0}]
+        self.calls = []
+        self.during_poll = None
+        self.stream = LocalTradeStream()
+
+    def get_account(self):
+        self.calls.append("get_account")
+        time.sleep(self.delay)
+        return dict(self.account)
+
+    def get_open_positions(self):
+        self.calls.append("get_open_positions")
+        time.sleep(self.delay)
+        positions = [dict(p) for p in self.positions]
+        if self.during_poll:
+            self.during_poll()
+        return positions
+
+    def trade_stream(self, handler):
+        return self.stream.subscribe(handler)
+
+class TestBrokerState(unittest.TestCase):
+
+    def setUp(self):
+        self.broker = FakeBroker()
+        self.clock = FakeClock()
+        self.state = BrokerState(self.broker, settings={"refresh_secs": 3600}, clock=self.clock)
+        self.addCleanup(self.state.close)
+
+    def qty(self, symbol):
+        return {p["symbol"]: p["qty"] for p in self.state.positions()}.get(symbol)
+
+    def test_reads_do_not_touch_the_broker(self):
+        self.state.refresh()
+        self.broker.calls.clear()
+        for _ in range(100):
+            self.state.account()
+            self.state.position_count()
+        self.assertEqual(self.broker.calls, [])
+        self.assertEqual(self.state.position_count(), 1)
+
+    def test_stale_read_polls_first(self):
+        self.assertEqual(self.state.account()["cash"], 10000.0)  # Never polled: synchronous refresh
+        self.broker.account["cash"] = 500.0
+        self.clock.now += 61
+        self.assertEqual(self.state.account()["cash"], 500.0)
+
+    def test_polls_run_concurrently(self):
+        self.broker.delay = 0.2
+        started = time.perf_counter()
+        self.state.refresh()
+        self.assertLess(time.perf_counter() - started, 0.35)
+
+    def test_optimistic_fill_survives_an_older_poll(self):
+        self.state.refresh()
+        self.clock.now += 1
+        self.state.apply_fill("NVDA", 2, "BUY", 50.0)
+        self.assertEqual(self.state.position_count(), 2)
+        self.assertEqual(self.state.account()["cash"], 9900.0)
+
+        def fill_mid_poll():
+            self.clock.now += 1
+            self.state.apply_fill("TSLA", 1, "BUY", 200.0)
+        self.broker.during_poll = fill_mid_poll
+        self.clock.now += 1
+        self.state.refresh()  # Neither fill is in the broker's answer; only TSLA happened after it began
+        self.broker.during_poll = None
+        self.assertEqual({p["symbol"]: p["qty"] for p in self.state.positions()}, {"AMD": 5, "TSLA": 1})
+        self.assertEqual(self.state.account()["cash"], 9800.0)
+
+        self.broker.positions.append({**self.broker.positions[0], "symbol": "TSLA", "qty": 1})
+        self.clock.now += 1
+        self.state.refresh()  # Poll started after the fill: broker is authoritative again
+        self.assertEqual({p["symbol"]: p["qty"] for p in self.state.positions()}, {"AMD": 5, "TSLA": 1})
+        self.assertEqual(self.state._pending, [])
+
+    def test_stream_fill_sets_position_and_wakes_poller(self):
+        self.state.start()
+        self.assertTrue(self.state.wait_ready(2))
+        polls = self.broker.calls.count("get_account")
+
+        self.state.apply_fill("AMD", 5, "SELL", 100.0)
+        self.assertEqual(self.state.position_count(), 0)
+        self.broker.stream.publish({"event": "fill", "symbol": "AMD", "side": "SELL", "qty": 3.0,
+                                    "price": 100.0, "position_qty": 2.0})  # Only partly filled
+        self.assertEqual(self.state.positions()[0]["qty"], 2.0)
+
+        deadline = time.time() + 2
+        while self.broker.calls.count("get_account") == polls and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(self.broker.calls.count("get_account"), polls)
+
+    def test_fill_streamed_before_submit_returns_counts_once(self):
+        broker = DryRunBroker()  # Publishes the fill on its LocalTradeStream inside submit_market_order
+        state = BrokerState(broker, settings={"refresh_secs": 3600}, clock=self.clock)
+        self.addCleanup(state.close)
+        state.start()
+        self.assertTrue(state.wait_ready(2))
+        cash = state.account()["cash"]
+
+        order_id = broker.submit_market_order("AMD", 1, "BUY")
+        state.apply_fill("AMD", 1, "BUY", 100.0, order_id=order_id)
+        self.assertEqual(state.positions()[0]["qty"], 1.0)
+        self.assertEqual(state.account()["cash"], cash)
+        self.assertEqual(state._pending, [])
+
+        self.clock.now += 1
+        state.refresh()
+        self.assertEqual({p["symbol"]: p["qty"] for p in state.positions()}, {"AMD": 1})
+
+    def test_stream_retires_its_own_pending_order(self):
+        self.broker.stream.subscribe(self.state.on_trade_update)
+        self.state.refresh()
+        self.state.apply_fill("NVDA", 3, "BUY", 50.0, order_id="A")
+        self.state.apply_fill("NVDA", 2, "BUY", 50.0, order_id="B")
+        self.broker.stream.publish({"event": "partial_fill", "order_id": "A", "symbol": "NVDA", "side": "BUY",
+                                    "qty": 1.0, "price": 50.0, "position_qty": 1.0})
+        self.assertEqual(self.qty("NVDA"), 5.0)  # 1 filled + 2 of A + 2 of B outstanding
+        self.broker.stream.publish({"event": "fill", "order_id": "A", "symbol": "NVDA", "side": "BUY",
+                                    "qty": 2.0, "price": 50.0, "position_qty": 3.0})
+        self.assertEqual([f.order_id for f in self.state._pending], ["B"])
+        self.assertEqual(self.qty("NVDA"), 5.0)
+
+    def test_concurrent_fills(self):
+        self.state.refresh()
+        threads = [threading.Thread(target=self.state.apply_fill, args=("TSLA", 1, "BUY")) for _ in range(50)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual({p["symbol"]: p["qty"] for p in self.state.positions()}["TSLA"], 50)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import unittest
+import numpy as np
+from strategy_lab.correlation import RollingCorrelation, SectorCorrelations
+
+START = 1_800_000_000
+
+def bars(closes, start=START):
+    return {"time": [float(start + 60 * i) for i in range(len(closes))], "close": list(closes)}
+
+class FakeClock:
+    def __init__(self, now=float(START)):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestRollingCorrelation(unittest.TestCase):
+
+    def test_matches_numpy_over_the_window(self):
+        rng = np.random.default_rng(3)
+        y = rng.normal(0, 0.001, 1000)
+        x = 1.5 * y + rng.normal(0, 0.0005, 1000)
+        stats = RollingCorrelation(window=60)
+        for xi, yi in zip(x, y):
+            stats.push(xi, yi)
+        wx, wy = x[-60:], y[-60:]
+        self.assertAlmostEqual(stats.corr(), np.corrcoef(wx, wy)[0, 1], places=9)
+        self.assertAlmostEqual(stats.beta(), np.polyfit(wy, wx, 1)[0], places=9)
+        self.assertEqual(stats.n, 60)
+
+    def test_undefined_without_variance(self):
+        stats = RollingCorrelation(window=10)
+        self.assertIsNone(stats.corr())
+        for _ in range(5):
+            stats.push(0.01, 0.0)
+        self.assertIsNone(stats.corr())
+        self.assertIsNone(stats.beta())
+
+class TestSectorCorrelations(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.etf = 100 * np.cumprod(1 + rng.normal(0, 0.001, 200))
+        self.calls = []
+        self.clock = FakeClock()
+
+    def fetch_bars(self, symbols, interval, period):
+        self.calls.append((tuple(symbols), interval, period))
+        return {s: bars(self.etf) for s in symbols}
+
+    def make(self):
+        return SectorCorrelations(self.fetch_bars, sector_map={"AMD": "SMH"}, clock=self.clock,
+                                  settings={"window_bars": 50, "min_samples": 20})
+
+    def test_one_download_per_cycle_for_all_symbols(self):
+        engine = self.make()
+        threads = [threading.Thread(target=engine.update, args=(s, bars(self.etf))) for s in ("AMD", "NVDA", "TSLA")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, [(("QQQ", "SMH"), "1m", "5d")])
+
+        self.clock.now += 60
+        engine.update("AMD", bars(self.etf))
+        self.assertEqual(self.calls[-1], (("QQQ", "SMH"), "1m", "1d"))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_beta_and_corr_of_a_levered_copy(self):
+        returns = np.diff(self.etf) / self.etf[:-1]
+        levered = 50 * np.concatenate(([1.0], np.cumprod(1 + 2 * returns)))
+        fields = self.make().update("AMD", bars(levered))
+        self.assertEqual(fields["sector_etf"], "SMH")
+        self.assertAlmostEqual(fields["sector_corr"], 1.0, places=3)
+        self.assertAlmostEqual(fields["sector_beta"], 2.0, places=3)
+        self.assertEqual(len(fields["sector_closes"]), 200)
+
+    def test_incremental_equals_one_shot(self):
+        rng = np.random.default_rng(9)
+        stock = 100 * np.cumprod(1 + rng.normal(0, 0.002, 200))
+        split = self.make()
+        split.update("NVDA", bars(stock[:120]))
+        self.clock.now += 60
+        incremental = split.update("NVDA", bars(stock))
+        one_shot = self.make().update("NVDA", bars(stock))
+        self.assertEqual(incremental["sector_corr"], one_shot["sector_corr"])
+        self.assertEqual(incremental["sector_samples"], one_shot["sector_samples"])
+
+    def test_not_enough_samples(self):
+        fields = self.make().update("AMD", bars(self.etf[:10]))
+        self.assertIsNone(fields["sector_corr"])
+        self.assertIsNone(fields["sector_beta"])
+
+if __name__ == '__main__':
+    unittest.main()
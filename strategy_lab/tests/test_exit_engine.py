@@ -0,0 +1,57 @@
+import unittest
+from strategy_lab.exit_engine import find_exits
+
+def make_bars(rows, start=1000.0):
+    """rows: [(open, high, low, close), ...] one minute apart"""
+    return {
+        "time": [start + 60 * i for i in range(len(rows))],
+        "open": [r[0] for r in rows],
+        "high": [r[1] for r in rows],
+        "low": [r[2] for r in rows],
+        "close": [r[3] for r in rows],
+    }
+
+class TestExitEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.long = {"id": 1, "direction": "BULLISH", "entry_price": 100.0, "entry_ts": 1000.0}
+        self.short = {"id": 2, "direction": "BEARISH", "entry_price": 100.0, "entry_ts": 1000.0}
+
+    def test_stop_touched_and_recovered(self):
+        # Dips through the -1% stop intrabar, closes back above it
+        bars = make_bars([(100, 100.5, 98.8, 100.2), (100.2, 100.4, 100.0, 100.3)])
+        fills = find_exits([self.long], bars)
+        self.assertEqual(len(fills), 1)
+        self.assertEqual(fills[0]["reason"], "STOP")
+        self.assertEqual(fills[0]["bar_index"], 0)
+        self.assertAlmostEqual(fills[0]["price"], 99.0)
+
+    def test_same_bar_tie_break_is_stop(self):
+        bars = make_bars([(100, 102.5, 98.5, 101)])
+        fills = find_exits([self.long, self.short], bars)
+        self.assertEqual([f["reason"] for f in fills], ["STOP", "STOP"])
+
+    def test_gap_through_stop_fills_at_open(self):
+        bars = make_bars([(100, 100.2, 99.5, 100), (97, 97.5, 96.8, 97.2)])
+        fills = find_exits([self.long], bars)
+        self.assertEqual(fills[0]["bar_index"], 1)
+        self.assertAlmostEqual(fills[0]["price"], 97.0)
+
+    def test_target_and_bars_before_entry_ignored(self):
+        late = dict(self.short, entry_ts=1060.0)
+        # Bar 0 (before entry) would have stopped the short out; only bar 1 counts
+        bars = make_bars([(100, 101.5, 100, 101), (99, 99, 97.5, 98)])
+        fills = find_exits([late], bars)
+        self.assertEqual(fills[0]["reason"], "TARGET")
+        self.assertEqual(fills[0]["bar_index"], 1)
+        self.assertAlmostEqual(fills[0]["price"], 98.0)
+
+    def test_backlog_many_positions(self):
+        positions = [dict(self.long, id=i, entry_price=100.0 + i * 0.001) for i in range(300)]
+        rows = [(100, 100.3, 99.9, 100.1)] * 500 + [(100, 110, 100, 109)]
+        fills = find_exits(positions, make_bars(rows))
+        self.assertEqual(len(fills), 300)
+        self.assertTrue(all(f["bar_index"] == 500 and f["reason"] == "TARGET" for f in fills))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from strategy_lab.exporter import DashboardExporter
+
+def payload(price=100.0, ts="2026-01-01 10:00:00", history=None):
+    signal = {"strategy_id": "s1", "strategy_name": "Bull Call", "direction": "BULLISH",
+              "features_matched": {"rsi": 40}, "legs": []}
+    return {
+        "timestamp": ts,
+        "symbol": "AMD",
+        "market_stats": {"price": price},
+        "signals": [signal],
+        "portfolio": {"total_pnl": 0, "open_trades": []},
+        "best_bet": signal,
+        "judge_verdict": "VERDICT: NEUTRAL",
+        "backtest_history": history or [{"symbol": "AMD", "outcome_7d": 1.5}],
+        "backtest_stats": {"total_decisions": 1, "strategies": [], "regimes": {}},
+    }
+
+def read_js(path):
+    with open(path) as f:
+        text = f.read()
+    return json.loads(text[text.index("=") + 1:].rstrip().rstrip(";"))
+
+class TestDashboardExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.exporter = DashboardExporter(js_dir=self.dir)
+
+    def test_exports_keep_the_umask_mode(self):
+        self.exporter.export(payload())
+        reference = os.path.join(self.dir, "reference")
+        open(reference, "w").close()
+        for name in ("strategy_data.js", "strategy_history.js", "strategy_manifest.json"):
+            mode = os.stat(os.path.join(self.dir, name)).st_mode & 0o777
+            self.assertEqual(mode, os.stat(reference).st_mode & 0o777, name)
+
+    def test_sections_split_and_signals_compacted(self):
+        self.assertEqual(self.exporter.export(payload()), {"fast": True, "slow": True})
+        fast = read_js(os.path.join(self.dir, "strategy_data.js"))
+        slow = read_js(os.path.join(self.dir, "strategy_history.js"))
+        self.assertNotIn("backtest_history", fast)
+        self.assertNotIn("features_matched", fast["signals"][0])
+        self.assertEqual(fast["best_bet"]["strategy_name"], "Bull Call")
+        self.assertEqual(slow["backtest_stats"]["total_decisions"], 1)
+        # No temp files left behind
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ["strategy_data.js", "strategy_history.js", "strategy_manifest.json"])
+
+    def test_unchanged_content_is_not_rewritten(self):
+        self.exporter.export(payload())
+        # Only the timestamp moved -> nothing to write
+        self.assertEqual(self.exporter.export(payload(ts="2026-01-01 10:01:00")), {"fast": False, "slow": False})
+        # Price moved, history didn't
+        self.assertEqual(self.exporter.export(payload(price=101.0)), {"fast": True, "slow": False})
+
+    def test_manifest_survives_restart(self):
+        self.exporter.export(payload())
+        with open(os.path.join(self.dir, "strategy_manifest.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual(set(manifest["sections"]), {"fast", "slow"})
+
+        restarted = DashboardExporter(js_dir=self.dir)
+        self.assertEqual(restarted.export(payload()), {"fast": False, "slow": False})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import time
+import unittest
+from types import SimpleNamespace
+from strategy_lab.alpaca_broker import AlpacaBroker, flatten_positions
+
+class FakeClient:
+    def __init__(self, symbols, latency=0.0, bulk_misses=(), bulk_error=None):
+        self.open = set(symbols)
+        self.latency = latency
+        self.bulk_misses = set(bulk_misses)
+        self.bulk_error = bulk_error
+        self.calls = []
+
+    def get_all_positions(self):
+        self.calls.append("get_all_positions")
+        return [SimpleNamespace(symbol=s, qty="1", avg_entry_price="1", current_price="1",
+                                unrealized_pl="0", unrealized_plpc="0") for s in sorted(self.open)]
+
+    def close_position(self, symbol):
+        self.calls.append(("close_position", symbol))
+        time.sleep(self.latency)
+        self.open.discard(symbol)
+
+    def close_all_positions(self, cancel_orders=None):
+        self.calls.append("close_all_positions")
+        if self.bulk_error:
+            raise self.bulk_error
+        responses = [SimpleNamespace(symbol=s, status=500 if s in self.bulk_misses else 200) for s in sorted(self.open)]
+        self.open &= self.bulk_misses
+        return responses
+
+class TestFlatten(unittest.TestCase):
+
+    def setUp(self):
+        self.symbols = [f"S{i:02d}" for i in range(20)]
+
+    def test_bulk_then_retry_what_it_missed(self):
+        client = FakeClient(self.symbols, bulk_misses=["S03"])
+        broker = AlpacaBroker(client=client)
+        self.assertEqual(broker.close_all_positions(), 20)
+        self.assertEqual(client.open, set())
+        self.assertEqual(client.calls.count("close_all_positions"), 1)
+        self.assertNotIn("get_all_positions", client.calls)
+        self.assertEqual([c for c in client.calls if c != "close_all_positions"], [("close_position", "S03")])
+        self.assertTrue(broker.last_flatten["bulk"])
+        self.assertEqual(set(broker.last_flatten["timings"]), set(self.symbols))
+
+    def test_falls_back_to_concurrent_closes(self):
+        client = FakeClient(self.symbols, latency=0.1, bulk_error=RuntimeError("404"))
+        broker = AlpacaBroker(client=client)
+        started = time.perf_counter()
+        self.assertEqual(broker.close_all_positions(), 20)
+        self.assertLess(time.perf_counter() - started, 0.5)  # 2s one at a time
+        self.assertFalse(broker.last_flatten["bulk"])
+        self.assertEqual(client.open, set())
+
+    def test_bounded_backoff_then_give_up(self):
+        waits = []
+        report = flatten_positions(["AMD", "NVDA"], lambda s: s == "AMD", sleep=waits.append,
+                                   settings={"max_attempts": 5, "backoff_secs": 0.5, "max_backoff_secs": 2.0})
+        self.assertEqual(report["closed"], ["AMD"])
+        self.assertEqual(report["failed"], ["NVDA"])
+        self.assertEqual(report["attempts"], {"AMD": 1, "NVDA": 5})
+        self.assertEqual(waits, [0.5, 1.0, 2.0, 2.0])
+
+if __name__ == '__main__':
+    unittest.main()
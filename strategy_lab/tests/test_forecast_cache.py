@@ -0,0 +1,121 @@
+import os
+import threading
+import unittest
+from strategy_lab import storage, migrations
+from strategy_lab.forecast_cache import ForecastCache
+
+class FakeClock:
+    def __init__(self, now=1_800_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class FakeEngine:
+    """compute(symbols, priority) that records batches and can be held open."""
+
+    def __init__(self):
+        self.batches = []
+        self.version = 1
+        self.missing_data = None  # e.g. ["intraday"]: the quota ran out
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def compute(self, symbols, priority):
+        self.gate.wait(5)
+        self.batches.append((list(symbols), priority))
+        if self.missing_data:
+            return [{"symbol": s, "consensus_score": 51.0, "decision": "HOLD", "version": self.version,
+                     "missing_data": self.missing_data} for s in symbols]
+        return [{"symbol": s, "consensus_score": 70.0, "decision": "BUY", "version": self.version} for s in symbols]
+
+class TestForecastCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_forecast_cache.db"
+        migrations.migrate(self.test_db)
+        self.engine = FakeEngine()
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def make(self):
+        return ForecastCache(self.engine.compute, self.test_db, clock=self.clock,
+                             settings={"ttl_secs": 300, "stale_secs": 3600, "max_entries": 2})
+
+    def test_misses_fetched_in_one_batch_then_cached(self):
+        cache = self.make()
+        first = cache.get_many(["AMD", "NVDA"], priority=0)
+        self.assertEqual([f["symbol"] for f in first], ["AMD", "NVDA"])
+        self.assertEqual(self.engine.batches, [(["AMD", "NVDA"], 0)])
+
+        self.clock.now += 60
+        self.assertEqual(cache.get_many(["NVDA", "AMD"]), first[::-1])
+        self.assertEqual(len(self.engine.batches), 1)
+
+    def test_persisted_tier_survives_restart(self):
+        self.make().get("AMD")
+        rows = storage.get_connection(self.test_db).execute(
+            "SELECT symbol, score FROM consensus_forecasts").fetchall()
+        self.assertEqual(rows, [("AMD", 70.0)])
+
+        self.clock.now += 60
+        self.assertEqual(self.make().get("AMD")["version"], 1)  # Fresh process, no API call
+        self.assertEqual(len(self.engine.batches), 1)
+
+    def test_stale_served_while_revalidating(self):
+        cache = self.make()
+        cache.get("AMD")
+        self.engine.version = 2
+        self.engine.gate.clear()
+        self.clock.now += 600  # Past ttl, inside stale window
+
+        self.assertEqual(cache.get("AMD")["version"], 1)  # Served immediately
+        cache.get("AMD")  # Refresh already running: not queued twice
+        self.engine.gate.set()
+        self.assertTrue(cache.wait_idle())
+        self.assertEqual(len(self.engine.batches), 2)
+        self.assertEqual(self.engine.batches[1][1], 10)  # Background refresh runs at LOW priority
+        self.assertEqual(cache.get("AMD")["version"], 2)
+
+    def test_too_old_fetched_synchronously(self):
+        cache = self.make()
+        cache.get("AMD")
+        self.engine.version = 2
+        self.clock.now += 7200
+        self.assertEqual(cache.get("AMD")["version"], 2)
+
+    def test_failed_refresh_keeps_previous_forecast(self):
+        cache = self.make()
+        cache.get("AMD")
+        self.engine.version = 2
+        self.engine.missing_data = ["intraday", "news"]
+        self.clock.now += 600
+        cache.get("AMD")  # Stale: background refresh comes back empty
+        self.assertTrue(cache.wait_idle())
+        self.assertEqual(cache.get("AMD")["decision"], "BUY")
+        self.assertEqual(self.make().get("AMD")["version"], 1)
+        self.assertEqual(storage.get_connection(self.test_db).execute(
+            "SELECT COUNT(*) FROM consensus_forecasts").fetchone()[0], 1)
+
+    def test_incomplete_forecast_served_but_not_cached(self):
+        cache = self.make()
+        self.engine.missing_data = ["news"]
+        self.assertEqual(cache.get("AMD")["missing_data"], ["news"])
+        self.engine.missing_data = None
+        self.assertEqual(cache.get("AMD")["decision"], "BUY")
+        self.assertEqual(len(self.engine.batches), 2)
+
+    def test_lru_bound_falls_back_to_db(self):
+        cache = self.make()
+        cache.get_many(["AMD", "NVDA", "TSLA"])
+        self.assertEqual(list(cache._lru), ["NVDA", "TSLA"])
+        self.assertEqual(cache.get("AMD")["symbol"], "AMD")
+        self.assertEqual(len(self.engine.batches), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import threading
+import unittest
+from strategy_lab import storage, migrations, history_helper, telemetry
+
+class TestHistoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_history_cache.db"
+        history_helper.clear_cache()
+        telemetry.REGISTRY.reset()
+        migrations.migrate(self.test_db)
+        self.insert(1)
+
+    def tearDown(self):
+        history_helper.clear_cache()
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def insert(self, n, conn=None):
+        own = conn is None
+        conn = conn or sqlite3.connect(self.test_db)  # Separate connection, like the backtester process
+        conn.execute("INSERT INTO backtest_history (timestamp, symbol, outcome_7d) VALUES (?, 'AMD', 1.0)",
+                     (f"2026-01-{n:02d} 00:00:00",))
+        conn.commit()
+        if own:
+            conn.close()
+
+    def cache_counts(self):
+        return {dict(labels)["result"]: v for (name, labels), v in telemetry.REGISTRY.counters.items()
+                if name == "history_cache_total"}
+
+    def test_repeat_reads_are_served_from_memory(self):
+        first = history_helper.get_backtest_history(self.test_db, limit=50)
+        second = history_helper.get_backtest_history(self.test_db, limit=50)
+        self.assertIs(first, second)
+        self.assertEqual(self.cache_counts(), {"miss": 1, "hit": 1})
+
+    def test_write_from_another_connection_invalidates(self):
+        self.assertEqual(len(history_helper.get_backtest_history(self.test_db)), 1)
+        self.insert(2)
+        self.assertEqual(len(history_helper.get_backtest_history(self.test_db)), 2)
+
+    def test_write_on_the_same_connection_invalidates(self):
+        history_helper.get_backtest_history(self.test_db)
+        self.insert(3, conn=storage.get_connection(self.test_db))
+        self.assertEqual(len(history_helper.get_backtest_history(self.test_db)), 2)
+
+    def test_unrelated_writes_only_revalidate(self):
+        history_helper.get_backtest_history(self.test_db)
+        conn = sqlite3.connect(self.test_db)
+        conn.execute("INSERT INTO trades (strategy_id, status) VALUES ('x', 'OPEN')")
+        conn.commit()
+        conn.close()
+        history_helper.get_backtest_history(self.test_db)
+        self.assertEqual(self.cache_counts(), {"miss": 1, "revalidated": 1})
+
+    def test_other_threads_share_the_cache(self):
+        history_helper.get_backtest_history(self.test_db)
+        t = threading.Thread(target=history_helper.get_backtest_history, args=(self.test_db,))
+        t.start()
+        t.join()
+        self.assertEqual(self.cache_counts(), {"miss": 1, "revalidated": 1})
+
+if __name__ == '__main__':
+    unittest.main()
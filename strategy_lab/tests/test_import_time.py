@@ -0,0 +1,46 @@
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Only needed once a cycle/route actually runs, never to answer /health
+HEAVY = ("yfinance", "pandas", "alpaca", "trading_architect", "dotenv")
+
+# Cumulative import budget (seconds). Generous for slow CI; a regression
+# that drags yfinance/pandas back in costs well over half a second on its own.
+BUDGET = {"app": 0.6, "strategy_lab.runner": 0.6}
+
+def import_profile(module):
+    """{top-level module: cumulative seconds} from `python -X importtime`."""
+    env = {**os.environ, "BOT_MODE": "off"}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr[-2000:])
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$", line)
+        if match:
+            profile[match.group(2)] = int(match.group(1)) / 1e6
+    return profile
+
+class TestImportTime(unittest.TestCase):
+
+    def check(self, module):
+        profile = import_profile(module)
+        loaded = sorted(name for name in profile if name.split(".")[0] in HEAVY)
+        self.assertEqual(loaded, [], f"{module} eagerly imports heavy dependencies")
+        self.assertLess(profile[module], BUDGET[module],
+                        f"import {module} took {profile[module]:.3f}s")
+
+    def test_app_cold_start(self):
+        self.check("app")
+
+    def test_runner_defers_engines(self):
+        self.check("strategy_lab.runner")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import threading
+import unittest
+from strategy_lab.live_feed import LiveFeed
+
+def parse(frame):
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+class TestLiveFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.feed = LiveFeed(ring_size=3, heartbeat_secs=0.05)
+
+    def state(self, price, ts="10:00"):
+        return {"timestamp": ts, "market_stats": {"price": price},
+                "signals": [{"strategy_name": "X", "features_matched": {"rsi": 1}}],
+                "backtest_stats": {"total_decisions": 5}}
+
+    def test_delta_holds_only_changed_sections(self):
+        self.feed.publish(self.state(100))
+        delta = self.feed.publish(self.state(101, ts="10:01"))
+        self.assertEqual(set(delta), {"timestamp", "market_stats"})
+        # Timestamp-only change is not worth a push
+        self.assertIsNone(self.feed.publish(self.state(101, ts="10:02")))
+        self.assertEqual(self.feed.seq, 2)
+
+    def test_late_joiner_gets_snapshot_then_deltas(self):
+        self.feed.publish(self.state(100))
+        stop = threading.Event()
+        stream = self.feed.stream(stop=stop)
+        next(stream)  # retry hint
+        seq, event, data = parse(next(stream))
+        self.assertEqual((seq, event), (1, "snapshot"))
+        self.assertNotIn("features_matched", data["signals"][0])
+        self.assertEqual(self.feed.clients, 1)
+
+        self.feed.publish(self.state(102, ts="10:01"))
+        seq, event, data = parse(next(stream))
+        self.assertEqual((seq, event, data["market_stats"]["price"]), (2, "delta", 102))
+
+        self.assertEqual(next(stream), b": keepalive\n\n")
+        stop.set()
+        self.assertEqual(list(stream), [])
+        self.assertEqual(self.feed.clients, 0)
+
+    def test_reconnect_replays_from_ring_or_falls_back_to_snapshot(self):
+        for i in range(5):
+            self.feed.publish(self.state(100 + i, ts=str(i)))
+        stop = threading.Event()
+        stop.set()
+
+        recent = [parse(f) for f in list(self.feed.stream(last_event_id="3", stop=stop))[1:]]
+        self.assertEqual([(s, e) for s, e, _ in recent], [(4, "delta"), (5, "delta")])
+
+        # Seq 1 has fallen out of the 3-slot ring
+        stale = [parse(f) for f in list(self.feed.stream(last_event_id="1", stop=stop))[1:]]
+        self.assertEqual([(s, e) for s, e, _ in stale], [(5, "snapshot")])
+        self.assertEqual(stale[0][2]["market_stats"]["price"], 104)
+
+if __name__ == '__main__':
+    unittest.main()
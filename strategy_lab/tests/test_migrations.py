@@ -0,0 +1,69 @@
+import unittest
+import os
+import sqlite3
+from strategy_lab import storage, migrations
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_migrations.db"
+
+    def tearDown(self):
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_fresh_db_reaches_latest(self):
+        version = migrations.migrate(self.test_db)
+        self.assertEqual(version, migrations.LATEST_VERSION)
+        self.assertEqual(migrations.get_version(self.test_db), migrations.LATEST_VERSION)
+
+        # Idempotent
+        self.assertEqual(migrations.migrate(self.test_db), migrations.LATEST_VERSION)
+
+    def test_fresh_db_matches_canonical_tables(self):
+        migrations.migrate(self.test_db)
+        conn = storage.get_connection(self.test_db)
+        for table, columns in migrations.TABLES.items():
+            self.assertEqual([row[1] for row in conn.execute(f"PRAGMA table_info({table})")],
+                             [name for name, _ in columns], table)
+
+    def test_each_version_is_frozen(self):
+        migrations.migrate(self.test_db, target=1)
+        conn = storage.get_connection(self.test_db)
+        self.assertNotIn("exit_reason", [row[1] for row in conn.execute("PRAGMA table_info(trades)")])
+        self.assertEqual(conn.execute("PRAGMA table_info(alert_state)").fetchall(), [])
+        self.assertEqual(conn.execute("PRAGMA table_info(data_generation)").fetchall(), [])
+        self.assertEqual(migrations.migrate(self.test_db), migrations.LATEST_VERSION)
+
+    def test_legacy_tables_are_reconciled(self):
+        # The old AlphaVantageEngine flavour: no direction/context/lesson on trades, no timestamp default
+        conn = sqlite3.connect(self.test_db)
+        conn.execute('CREATE TABLE trades (id INTEGER PRIMARY KEY, timestamp DATETIME, signal_id INTEGER, strategy_id TEXT, symbol TEXT, status TEXT, entry_price REAL, exit_price REAL, pnl REAL, pnl_pct REAL, entry_date DATETIME, exit_date DATETIME)')
+        conn.execute("INSERT INTO trades (strategy_id, status, pnl) VALUES ('legacy', 'CLOSED', 5)")
+        conn.commit()
+        conn.close()
+
+        migrations.migrate(self.test_db)
+
+        conn = storage.get_connection(self.test_db)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(trades)")]
+        for name, _ in migrations.TABLES["trades"]:
+            self.assertIn(name, columns)
+        self.assertEqual(conn.execute("SELECT pnl FROM trades").fetchone()[0], 5)
+
+    def test_hot_queries_use_indexes(self):
+        migrations.migrate(self.test_db)
+        conn = storage.get_connection(self.test_db)
+
+        plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT strategy_id, pnl, exit_date FROM trades WHERE status='CLOSED' ORDER BY exit_date DESC LIMIT 5"))
+        self.assertIn("idx_trades_status_exit", plan)
+
+        plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM backtest_history ORDER BY timestamp DESC LIMIT 50"))
+        self.assertIn("idx_backtest_timestamp", plan)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+import unittest
+from strategy_lab import storage
+from strategy_lab.notifier import DiscordNotifier
+
+class FakeResponse:
+    def __init__(self, status_code=204, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+class FakeSession:
+    """Records posts; pops scripted responses (default 204)."""
+
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.posts = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def post(self, url, json=None, timeout=None):
+        self.gate.wait(5)
+        self.posts.append((time.monotonic(), json))
+        return self.responses.pop(0) if self.responses else FakeResponse()
+
+class TestDiscordNotifier(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_notifier.db"
+        self.notifiers = []
+
+    def tearDown(self):
+        for n in self.notifiers:
+            n.close(timeout=2)
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def make(self, session, **settings):
+        n = DiscordNotifier("https://discord.test/webhook", db_path=self.test_db, session=session,
+                            settings={"batch_window_secs": 0.05, **settings})
+        self.notifiers.append(n)
+        return n
+
+    def test_burst_is_batched_into_one_message(self):
+        session = FakeSession()
+        n = self.make(session)
+        for i in range(12):
+            self.assertTrue(n.enqueue({"title": f"alert {i}"}, "signal"))
+        self.assertTrue(n.flush(timeout=2))
+        self.assertEqual([len(p["embeds"]) for _, p in session.posts], [10, 2])
+
+    def test_429_waits_retry_after_then_resends(self):
+        session = FakeSession([FakeResponse(429, body={"retry_after": 0.2})])
+        n = self.make(session)
+        n.enqueue({"title": "x"}, "risk")
+        self.assertTrue(n.flush(timeout=3))
+        self.assertEqual(len(session.posts), 2)
+        self.assertGreaterEqual(session.posts[1][0] - session.posts[0][0], 0.2)
+
+    def test_exhausted_bucket_delays_next_send(self):
+        session = FakeSession([FakeResponse(204, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.2"})])
+        n = self.make(session)
+        n.enqueue({"title": "a"}, "signal")
+        n.flush(timeout=2)
+        n.enqueue({"title": "b"}, "signal")
+        n.flush(timeout=2)
+        self.assertGreaterEqual(session.posts[1][0] - session.posts[0][0], 0.2)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        session = FakeSession()
+        session.gate.clear()  # Webhook "hangs"
+        n = self.make(session, max_queue=2, max_embeds=1, batch_window_secs=0)
+        n.enqueue({"title": "in flight"}, "signal")
+        time.sleep(0.05)  # Worker picks it up and blocks in post()
+        results = [n.enqueue({"title": str(i)}, "signal") for i in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        session.gate.set()
+
+    def test_dedupe_state_survives_restart(self):
+        session = FakeSession()
+        n = self.make(session)
+        self.assertTrue(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))
+        self.assertFalse(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))
+        n.flush(timeout=2)
+
+        restarted = self.make(FakeSession())
+        self.assertFalse(restarted.notify_once("signal", "Bull Call", {"title": "again"}, "signal"))
+        self.assertTrue(restarted.notify_once("signal", "Iron Condor", {"title": "new"}, "signal"))
+        self.assertTrue(restarted.notify_once("signal", "Bull Call", {"title": "t"}, "signal", cooldown_secs=0))
+
+    def test_undelivered_alert_is_not_suppressed(self):
+        session = FakeSession([FakeResponse(400)])  # Rejected: never delivered
+        n = self.make(session)
+        self.assertTrue(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))
+        n.flush(timeout=2)
+        self.assertTrue(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))
+        n.flush(timeout=2)
+        self.assertEqual(len(session.posts), 2)
+        self.assertFalse(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))
+
+    def test_dropped_alert_is_not_suppressed(self):
+        session = FakeSession()
+        session.gate.clear()
+        n = self.make(session, max_queue=1, max_embeds=1, batch_window_secs=0)
+        n.enqueue({"title": "in flight"}, "risk")
+        time.sleep(0.05)
+        n.enqueue({"title": "queued"}, "risk")
+        self.assertFalse(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))  # Queue full
+        session.gate.set()
+        n.flush(timeout=2)
+        self.assertTrue(n.notify_once("signal", "Bull Call", {"title": "Bull Call"}, "signal"))
+
+if __name__ == '__main__':
+    unittest.main()
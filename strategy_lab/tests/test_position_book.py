@@ -0,0 +1,96 @@
+import unittest
+import os
+import json
+from strategy_lab import storage
+from strategy_lab.position_book import IdCollision, WriteBehindQueue
+from strategy_lab.paper_trader import PaperTrader, get_paper_trader, close_paper_trader
+
+class TestPositionBook(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_position_book.db"
+        self.signal = {"strategy_id": "bull_test", "direction": "BULLISH", "features_matched": {}}
+
+    def tearDown(self):
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm", self.test_db + ".journal"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_book_survives_restart(self):
+        trader = PaperTrader(db_path=self.test_db)
+        first = trader.open_trade(self.signal, 100.0)
+        second = trader.open_trade(self.signal, 100.0)
+        trader.close_trade(first, 105.0)
+        trader.close()
+
+        # Fresh process: book is rebuilt from the DB, ids keep counting up
+        trader = PaperTrader(db_path=self.test_db)
+        self.assertEqual([p["id"] for p in trader.book.open_positions()], [second])
+        self.assertGreater(trader.open_trade(self.signal, 100.0), second)
+        trader.close()
+
+    def test_one_shared_trader_per_db(self):
+        trader = get_paper_trader(self.test_db)
+        self.addCleanup(close_paper_trader, self.test_db)
+        self.assertIs(get_paper_trader(self.test_db), trader)
+        ids = [get_paper_trader(self.test_db).open_trade(self.signal, 100.0) for _ in range(3)]
+        self.assertEqual(len(set(ids)), 3)  # One id allocator: no INSERT OR IGNORE collisions
+
+        close_paper_trader(self.test_db)
+        count = storage.get_connection(self.test_db).execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+        self.assertEqual(count, 3)
+        self.assertIsNot(get_paper_trader(self.test_db), trader)  # Closed: the next call starts afresh
+
+    def test_two_writers_on_one_db_never_share_ids(self):
+        first, second = PaperTrader(db_path=self.test_db), PaperTrader(db_path=self.test_db)  # e.g. bot + CLI run
+        ids = [trader.open_trade(self.signal, 100.0) for _ in range(3) for trader in (first, second)]
+        self.assertEqual(len(set(ids)), 6)
+        first.close()
+        second.close()
+        count = storage.get_connection(self.test_db).execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+        self.assertEqual(count, 6)
+
+    def test_taken_id_fails_loudly(self):
+        trader = PaperTrader(db_path=self.test_db)
+        trade_id = trader.open_trade(self.signal, 100.0)
+        trader.close()
+        row = {"id": trade_id, "signal_id": None, "strategy_id": "other", "symbol": "AMD", "direction": "BULLISH",
+               "entry_price": 1.0, "entry_date": "t", "context": "{}"}
+        with storage.transaction(self.test_db) as conn:
+            with self.assertRaises(IdCollision):
+                WriteBehindQueue._apply(conn, {"op": "open", "row": row})
+
+    def test_exit_loop_is_in_memory(self):
+        trader = PaperTrader(db_path=self.test_db)
+        trade_id = trader.open_trade(self.signal, 100.0)
+
+        trader.update_positions(103.0)  # > +2% target
+        self.assertEqual(len(trader.book), 0)
+
+        trader.flush()
+        status = storage.get_connection(self.test_db).execute(
+            "SELECT status FROM trades WHERE id = ?", (trade_id,)).fetchone()[0]
+        self.assertEqual(status, "CLOSED")
+        trader.close()
+
+    def test_journal_replay_after_crash(self):
+        trader = PaperTrader(db_path=self.test_db)
+        trader.close()
+
+        # Simulate a crash: ops journaled but never committed (last line torn)
+        with open(self.test_db + ".journal", "w") as f:
+            f.write(json.dumps({"op": "signal", "row": {"id": 7, "strategy_id": "s", "symbol": "AMD",
+                                                        "direction": "BULLISH", "features": "{}", "timestamp": "t"}}) + "\n")
+            f.write(json.dumps({"op": "open", "row": {"id": 9, "signal_id": 7, "strategy_id": "s", "symbol": "AMD",
+                                                      "direction": "BULLISH", "entry_price": 100.0,
+                                                      "entry_date": "t", "context": "{}"}}) + "\n")
+            f.write('{"op": "clo')
+
+        trader = PaperTrader(db_path=self.test_db)
+        self.assertIsNotNone(trader.book.get(9))
+        self.assertEqual(os.path.getsize(self.test_db + ".journal"), 0)
+        trader.close()
+
+if __name__ == '__main__':
+    unittest.main()
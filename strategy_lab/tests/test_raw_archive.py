@@ -0,0 +1,97 @@
+import json
+import os
+import unittest
+from strategy_lab import storage, migrations
+from strategy_lab.raw_archive import RawArchive, default_archive_path, has_legacy_rows
+
+def intraday(n, close=100.0):
+    return {"Meta Data": {"2. Symbol": "AMD"},
+            "Time Series (1min)": {f"2026-01-02 10:{i:02d}:00": {"4. close": str(close + i)} for i in range(n)}}
+
+class TestRawArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.lake = "test_raw_lake.db"
+        self.path = default_archive_path(self.lake)
+        self.archive = RawArchive(self.path)
+
+    def tearDown(self):
+        for db in (self.lake, self.path):
+            storage.close_connections(db)
+            for path in (db, db + "-wal", db + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_separate_file_next_to_the_lake(self):
+        self.assertEqual(self.path, "test_raw_lake_raw.db")
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_dedupe_and_compression(self):
+        payload = intraday(60)
+        first = self.archive.store("TIME_SERIES_INTRADAY", "AMD", payload, fetched_at=1000)
+        # Same content, different key order: same blob
+        reordered = json.loads(json.dumps(payload, sort_keys=True))
+        reordered = dict(reversed(list(reordered.items())))
+        self.assertEqual(self.archive.store("TIME_SERIES_INTRADAY", "AMD", reordered, fetched_at=1060), first)
+
+        stats = self.archive.stats()
+        self.assertEqual((stats["fetches"], stats["blobs"]), (2, 1))
+        self.assertLess(stats["stored_bytes"], stats["raw_bytes"] / 3)
+        self.assertEqual(self.archive.latest("TIME_SERIES_INTRADAY", "AMD"), payload)
+
+    def test_replay_is_lazy_and_filtered(self):
+        self.archive.store("TIME_SERIES_INTRADAY", "AMD", intraday(5), fetched_at=1000)
+        self.archive.store("NEWS_SENTIMENT", "AMD", {"feed": []}, fetched_at=1010)
+        self.archive.store("TIME_SERIES_INTRADAY", "AMD", intraday(6), fetched_at=1020)
+
+        records = list(self.archive.replay("TIME_SERIES_INTRADAY", "AMD", since=1000))
+        self.assertEqual([r.fetched_at for r in records], [1000, 1020])
+        self.assertIsNone(records[0]._data)  # Nothing decompressed yet
+        self.assertEqual(len(records[1].data["Time Series (1min)"]), 6)
+
+    def test_retention_drops_unreferenced_blobs_only(self):
+        shared, old_only = intraday(3), intraday(4)
+        self.archive.store("TIME_SERIES_INTRADAY", "AMD", shared, fetched_at=1000)
+        self.archive.store("TIME_SERIES_INTRADAY", "AMD", old_only, fetched_at=1000)
+        self.archive.store("TIME_SERIES_INTRADAY", "AMD", shared, fetched_at=5000)
+
+        self.assertEqual(self.archive.prune(older_than_secs=3600, now=5000), {"fetches": 2, "blobs": 1})
+        self.assertEqual([r.data for r in self.archive.replay()], [shared])
+        auto_vacuum = storage.get_connection(self.path).execute("PRAGMA auto_vacuum").fetchone()[0]
+        self.assertEqual(auto_vacuum, 2)  # INCREMENTAL
+
+    def test_import_legacy_rows_from_the_lake(self):
+        migrations.migrate(self.lake)
+        with storage.transaction(self.lake) as conn:
+            for _ in range(3):
+                conn.execute("INSERT INTO raw_market_data (function_name, symbol, data) VALUES (?, ?, ?)",
+                             ("TIME_SERIES_INTRADAY", "AMD", json.dumps(intraday(10))))
+        self.assertTrue(has_legacy_rows(self.lake))
+
+        self.assertEqual(self.archive.import_legacy(self.lake, batch_size=2), 3)
+        self.assertFalse(has_legacy_rows(self.lake))
+        stats = self.archive.stats()
+        self.assertEqual((stats["fetches"], stats["blobs"]), (3, 1))
+
+    def test_interrupted_import_resumes_without_duplicates_and_shrinks_the_lake(self):
+        migrations.migrate(self.lake)
+        with storage.transaction(self.lake) as conn:
+            for i in range(40):
+                conn.execute("INSERT INTO raw_market_data (function_name, symbol, data) VALUES (?, ?, ?)",
+                             ("TIME_SERIES_INTRADAY", "AMD", json.dumps(intraday(50, close=i))))
+        # Crash after archiving the first rows but before deleting them from the lake
+        first = storage.get_connection(self.lake).execute(
+            "SELECT id, function_name, symbol, data FROM raw_market_data ORDER BY id LIMIT 5").fetchall()
+        for source_id, function_name, symbol, data in first:
+            self.archive.store(function_name, symbol, json.loads(data), fetched_at=1000, source_id=source_id)
+        storage.get_connection(self.lake).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = os.path.getsize(self.lake)
+
+        self.assertEqual(self.archive.import_legacy(self.lake, batch_size=8), 35)
+        self.assertEqual(self.archive.stats()["fetches"], 40)
+        self.assertEqual(self.archive.import_legacy(self.lake), 0)
+        storage.get_connection(self.lake).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.assertLess(os.path.getsize(self.lake), size_before)
+
+if __name__ == '__main__':
+    unittest.main()
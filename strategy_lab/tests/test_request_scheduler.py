@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+import unittest
+from strategy_lab import storage
+from strategy_lab.data.request_scheduler import HIGH, LOW, RequestScheduler, RetryLater, TokenBucket
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(per_minute=5, clock=clock)
+        self.assertEqual([bucket.try_acquire() for _ in range(5)], [0.0] * 5)
+        self.assertAlmostEqual(bucket.try_acquire(), 12.0)
+        clock.now += 12
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+    def test_daily_quota_resets_at_utc_midnight(self):
+        clock = FakeClock()
+        wall = FakeClock(86400 * 20000 + 3600)
+        bucket = TokenBucket(per_minute=60, per_day=2, clock=clock, wall=wall)
+        bucket.try_acquire(), bucket.try_acquire()
+        self.assertEqual(bucket.try_acquire(), float("inf"))
+        wall.now += 86400
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+    def test_exhaust_until_utc_midnight(self):
+        wall = FakeClock(86400 * 20000 + 3600)
+        bucket = TokenBucket(per_minute=60, clock=FakeClock(), wall=wall)
+        bucket.exhaust()
+        self.assertEqual(bucket.try_acquire(), float("inf"))
+        wall.now += 86400
+        self.assertEqual(bucket.try_acquire(), 0.0)
+
+    def test_drain(self):
+        bucket = TokenBucket(per_minute=5, clock=FakeClock())
+        bucket.drain()
+        self.assertGreater(bucket.try_acquire(), 0)
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.schedulers = []
+
+    def tearDown(self):
+        for s in self.schedulers:
+            s.close()
+
+    def make(self, per_minute=6000, per_day=None, **kwargs):
+        s = RequestScheduler(TokenBucket(per_minute, per_day), **kwargs)
+        self.schedulers.append(s)
+        return s
+
+    def test_concurrent_dispatch(self):
+        s = self.make(max_workers=4)
+        started = time.perf_counter()
+        futures = [s.submit(i, lambda attempt, i=i: time.sleep(0.2) or i) for i in range(4)]
+        self.assertEqual([f.result(2) for f in futures], [0, 1, 2, 3])
+        self.assertLess(time.perf_counter() - started, 0.35)
+
+    def test_duplicate_requests_coalesce(self):
+        s = self.make()
+        gate, calls = threading.Event(), []
+
+        def fetch(attempt):
+            calls.append(attempt)
+            gate.wait(2)
+            return {"ok": True}
+
+        first = s.submit(("INTRADAY", "AMD"), fetch)
+        second = s.submit(("INTRADAY", "AMD"), fetch)
+        self.assertIs(first, second)
+        gate.set()
+        self.assertEqual(first.result(2), {"ok": True})
+        self.assertEqual(len(calls), 1)
+        # Once finished, the next identical request goes out again
+        self.assertEqual(s.submit(("INTRADAY", "AMD"), fetch).result(2), {"ok": True})
+        self.assertEqual(len(calls), 2)
+
+    def test_priority_order_when_throttled(self):
+        clock = FakeClock()
+        s = RequestScheduler(TokenBucket(per_minute=2, clock=clock), max_workers=1)
+        self.schedulers.append(s)
+        s.bucket.drain()
+        order = []
+        s.submit("low", lambda a: order.append("low"), priority=LOW)
+        s.submit("high", lambda a: order.append("high"), priority=HIGH)
+        clock.now += 60  # Both tokens come back
+        with s._cond:
+            s._cond.notify()
+        deadline = time.time() + 2
+        while len(order) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(order, ["high", "low"])
+
+    def test_retry_then_give_up(self):
+        s = self.make(max_attempts=2)
+        attempts = []
+
+        def flaky(attempt):
+            attempts.append(attempt)
+            raise RetryLater(0.01)
+
+        self.assertIsNone(s.submit("x", flaky).result(2))
+        self.assertEqual(attempts, [1, 2])
+
+    def test_close_during_retry_resolves_the_future(self):
+        s = self.make()
+        calls = []
+
+        def rate_limited(attempt):
+            calls.append(attempt)
+            raise RetryLater(0.2)
+
+        future = s.submit("x", rate_limited)
+        deadline = time.time() + 2
+        while not calls and time.time() < deadline:
+            time.sleep(0.01)
+        s.close()  # Retry timer still pending
+        self.assertIsNone(future.result(2))
+        self.assertEqual(s._inflight, {})
+
+    def test_daily_quota_spent_resolves_none(self):
+        s = self.make(per_day=1)
+        self.assertEqual(s.submit("a", lambda a: 1).result(2), 1)
+        self.assertIsNone(s.submit("b", lambda a: 2).result(2))
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url, params=None, timeout=None):
+        return FakeResponse(self.body)
+
+class TestAlphaVantageLimitNotes(unittest.TestCase):
+
+    def setUp(self):
+        from trading_architect import AlphaVantageEngine
+        self.test_db = "test_av_limits.db"
+        self.engine = AlphaVantageEngine("test-key", db_path=self.test_db)
+        self.engine.scheduler.bucket = TokenBucket(per_minute=5)
+
+    def tearDown(self):
+        for db in (self.test_db, self.engine.archive.path):
+            storage.close_connections(db)
+            for path in (db, db + "-wal", db + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def fetch(self, body):
+        self.engine.session = FakeSession(body)
+        return self.engine._fetch({"function": "NEWS_SENTIMENT", "symbol": "SPY"}, 1)
+
+    def test_per_minute_note_is_retried(self):
+        with self.assertRaises(RetryLater):
+            self.fetch({"Note": "Our standard API call frequency is 5 calls per minute and 500 calls per day."})
+
+    def test_daily_quota_and_premium_notes_are_not_retried(self):
+        self.assertIsNone(self.fetch({"Information": "This is a premium endpoint."}))
+        self.assertEqual(self.engine.scheduler.bucket.try_acquire(), 0.0)
+        self.assertIsNone(self.fetch({"Information": "Our standard API rate limit is 25 requests per day."}))
+        self.assertEqual(self.engine.scheduler.bucket.try_acquire(), float("inf"))
+
+if __name__ == '__main__':
+    unittest.main()
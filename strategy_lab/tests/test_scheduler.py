@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+from datetime import date, datetime
+from strategy_lab.scheduler import MarketCalendar, MarketClockScheduler, NY
+
+class TestMarketCalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.cal = MarketCalendar()
+
+    def test_holidays_2025(self):
+        expected = {date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+                    date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1),
+                    date(2025, 11, 27), date(2025, 12, 25)}
+        self.assertEqual(set(self.cal.holidays(2025)), expected)
+
+    def test_observed_rules(self):
+        # July 4th 2026 is a Saturday -> observed Friday the 3rd (and no half day that week)
+        self.assertIn(date(2026, 7, 3), self.cal.holidays(2026))
+        self.assertNotIn(date(2026, 7, 2), self.cal.half_days(2026))
+        # New Year's 2022 fell on a Saturday: Dec 31 2021 was a normal session
+        self.assertTrue(self.cal.is_trading_day(date(2021, 12, 31)))
+
+    def test_half_days(self):
+        self.assertEqual(self.cal.half_days(2025), {date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)})
+        _, close = self.cal.session(date(2025, 11, 28))
+        self.assertEqual((close.hour, close.minute), (13, 0))
+
+    def test_next_session_over_long_weekend(self):
+        # Thursday before Good Friday, after the close -> Monday
+        open_, _ = self.cal.next_session(datetime(2025, 4, 17, 16, 30, tzinfo=NY))
+        self.assertEqual(open_, datetime(2025, 4, 21, 9, 30, tzinfo=NY))
+
+class TestMarketClockScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.sched = MarketClockScheduler(lambda: None, bar_secs=60, settle_secs=2)
+
+    def test_boundaries_align_to_bars(self):
+        wake = self.sched.next_boundary(datetime(2025, 3, 3, 10, 15, 40, tzinfo=NY))
+        self.assertEqual(wake, datetime(2025, 3, 3, 10, 16, 2, tzinfo=NY))
+        # Exactly on a boundary -> the following one
+        wake = self.sched.next_boundary(datetime(2025, 3, 3, 10, 16, 2, tzinfo=NY))
+        self.assertEqual(wake, datetime(2025, 3, 3, 10, 17, 2, tzinfo=NY))
+
+    def test_first_and_last_bar_of_session(self):
+        wake = self.sched.next_boundary(datetime(2025, 3, 3, 6, 0, tzinfo=NY))
+        self.assertEqual(wake, datetime(2025, 3, 3, 9, 31, 2, tzinfo=NY))
+        # The bar ending at the close still runs, even on a half day
+        wake = self.sched.next_boundary(datetime(2025, 12, 24, 12, 59, 30, tzinfo=NY))
+        self.assertEqual(wake, datetime(2025, 12, 24, 13, 0, 2, tzinfo=NY))
+        wake = self.sched.next_boundary(datetime(2025, 12, 24, 13, 0, 5, tzinfo=NY))
+        self.assertEqual(wake, datetime(2025, 12, 26, 9, 31, 2, tzinfo=NY))
+
+    def test_overrun_skips_missed_bars(self):
+        # Always-open session so the loop runs right away
+        class AlwaysOpen(MarketCalendar):
+            def next_session(self, now):
+                now = now.astimezone(self.tz)
+                return now.replace(hour=0, minute=0, second=0, microsecond=0), now.replace(hour=23, minute=59, second=59)
+
+        clock = {"t": datetime(2025, 3, 3, 12, 0, 0, tzinfo=NY).timestamp()}
+        calls = []
+
+        def slow_cycle():
+            calls.append(clock["t"])
+            clock["t"] += 150  # Overruns 2 bars
+
+        class FastForward(MarketClockScheduler):
+            async def _sleep_until(self, when):
+                clock["t"] = max(clock["t"], when.timestamp())
+                return True
+
+        sched = FastForward(slow_cycle, calendar=AlwaysOpen(), bar_secs=60, settle_secs=0,
+                            clock=lambda: clock["t"])
+        asyncio.run(sched.run(max_cycles=2))
+        self.assertEqual(sched.cycles, 2)
+        self.assertEqual(sched.skipped, 4)
+        # Second cycle lands on the next boundary after the overrun, not the missed ones
+        self.assertEqual(calls[1] - calls[0], 180)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import os
 import sqlite3
+from strategy_lab import storage
 from strategy_lab.scoreboard import ScoreKeeper
 
 class TestScoreboard(unittest.TestCase):
@@ -26,8 +27,10 @@ class TestScoreboard(unittest.TestCase):
         self.keeper = ScoreKeeper(db_path=self.test_db)
 
     def tearDown(self):
-        if os.path.exists(self.test_db):
-            os.remove(self.test_db)
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
 
     def test_stats_aggregation(self):
         stats = self.keeper.get_strategy_stats()
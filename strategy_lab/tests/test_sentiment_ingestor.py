@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+from strategy_lab.social_sentiment import MentionScanner, SentimentIngestor
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+def listing(*posts):
+    return {"data": {"children": [{"data": {"name": name, "title": title, "selftext": ""}} for name, title in posts]}}
+
+class FakeSession:
+    """Serves one listing per subreddit; answers 304 when the client sends back the ETag."""
+
+    def __init__(self, listings, delay=0.0):
+        self.listings = listings
+        self.delay = delay
+        self.headers = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        sub = url.split("/r/")[1].split("/")[0]
+        with self.lock:
+            self.requests.append((sub, dict(headers or {})))
+        time.sleep(self.delay)
+        etag = f'"{sub}-{len(self.listings[sub]["data"]["children"])}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.listings[sub], {"ETag": etag})
+
+class TestSentimentIngestor(unittest.TestCase):
+
+    def setUp(self):
+        self.session = FakeSession({
+            "wallstreetbets": listing(("t3_a", "AMD to the MOON"), ("t3_b", "AMD puts printing"), ("t3_c", "NVDA calls")),
+            "stocks": listing(("t3_d", "Thoughts on AMD? buy")),
+        })
+        self.ingestor = SentimentIngestor(["wallstreetbets", "stocks"], symbols=["AMD"], session=self.session)
+
+    def tearDown(self):
+        self.ingestor.close()
+
+    def test_score_from_memory(self):
+        self.assertEqual(self.ingestor.refresh(), 4)
+        self.assertEqual(self.ingestor.score("AMD"), {"score": 30, "mentions": 3, "direction": "BULLISH"})
+        requests_made = len(self.session.requests)
+        self.ingestor.score("AMD")
+        self.assertEqual(len(self.session.requests), requests_made)  # Reading never scrapes
+
+    def test_conditional_requests_and_seen_ids(self):
+        self.ingestor.refresh()
+        self.assertEqual(self.ingestor.refresh(), 0)  # 304s
+        self.assertTrue(all("If-None-Match" in h for _, h in self.session.requests[2:]))
+
+        # A listing that overlaps the previous one only adds the new post
+        self.session.listings["stocks"] = listing(("t3_e", "AMD SELL everything"), ("t3_d", "Thoughts on AMD? buy"))
+        self.assertEqual(self.ingestor.refresh(), 1)
+        self.assertEqual(self.ingestor.score("AMD")["mentions"], 4)
+
+    def test_new_symbol_backfilled_from_window(self):
+        self.ingestor.refresh()
+        self.assertEqual(self.ingestor.score("nvda"), {"score": 10, "mentions": 1, "direction": "BULLISH"})
+
+    def test_rolling_window_expires(self):
+        self.ingestor.settings["window_secs"] = 60
+        now = time.time()
+        self.ingestor.ingest([{"name": "old", "title": "AMD crash", "selftext": ""}], now=now - 120)
+        self.ingestor.ingest([{"name": "new", "title": "AMD rocket", "selftext": ""}], now=now)
+        self.assertEqual(self.ingestor.score("AMD"), {"score": 10, "mentions": 1, "direction": "BULLISH"})
+
+    def test_subreddits_fetched_concurrently(self):
+        self.session.delay = 0.2
+        started = time.perf_counter()
+        self.ingestor.refresh()
+        self.assertLess(time.perf_counter() - started, 0.35)
+
+class TestMentionScanner(unittest.TestCase):
+
+    def test_word_boundaries_match_per_symbol_regex(self):
+        scanner = MentionScanner(["amd", "SPY", "BRK.B"])
+        self.assertEqual(scanner.mentioned("$AMD AND AMD'S CALLS, SPY."), {"AMD", "SPY"})
+        self.assertEqual(scanner.mentioned("AMDX SPYDER BRK"), set())
+        self.assertEqual(scanner.mentioned("LOADING BRK.B TODAY"), {"BRK.B"})
+
+    def test_one_pass_attributes_every_ticker(self):
+        scanner = MentionScanner(["AMD", "NVDA", "TSLA"])
+        self.assertEqual(scanner.scan("AMD AND NVDA CALLS, SELL TSLX"), {"AMD": (1, 1), "NVDA": (1, 1)})
+        counts = scanner.count(["AMD MOON", "NVDA DUMP", "AMD PUTS", "NOTHING HERE"])
+        self.assertEqual(counts, {"AMD": [2, 1, 1], "NVDA": [1, 0, 1], "TSLA": [0, 0, 0]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from strategy_lab.state_channel import StateReader, StateWriter
+from strategy_lab.supervisor import BotSupervisor, CYCLE_TIMEOUT_SECS, HEARTBEAT_TIMEOUT_SECS, STARTUP_GRACE_SECS
+
+class TestStateChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "state")
+        self.writer = StateWriter(self.path, capacity=1024)
+        self.reader = StateReader(self.path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_nothing_published_yet(self):
+        self.assertEqual(self.reader.read(), (0, None))
+        self.assertEqual(self.reader.status()["pid"], os.getpid())
+
+    def test_roundtrip_copies_once_per_publish(self):
+        self.writer.publish(b'{"price": 100}')
+        seq, first = self.reader.read()
+        self.assertEqual(first, b'{"price": 100}')
+        self.assertIs(self.reader.read()[1], first)  # Same object until the bot publishes again
+
+        self.writer.publish(b'{"price": 101}')
+        seq2, second = self.reader.read()
+        self.assertGreater(seq2, seq)
+        self.assertEqual(second, b'{"price": 101}')
+
+    def test_oversized_payload_is_refused(self):
+        self.writer.publish(b"ok")
+        self.assertFalse(self.writer.publish(b"x" * 2048))
+        self.assertEqual(self.reader.read()[1], b"ok")
+
+    def test_busy_flag(self):
+        self.writer.cycle_started()
+        self.assertGreater(self.reader.status()["busy_since"], 0)
+        self.writer.cycle_finished()
+        self.assertEqual(self.reader.status()["busy_since"], 0)
+
+    def test_reader_follows_restarted_writer(self):
+        self.writer.publish(b"old")
+        self.assertEqual(self.reader.read()[1], b"old")
+        self.writer.close()
+
+        self.writer = StateWriter(self.path, capacity=1024)  # Bot restart: fresh file, seq starts over
+        self.assertEqual(self.reader.read(), (0, None))
+        self.writer.publish(b"new")
+        self.assertEqual(self.reader.read()[1], b"new")
+
+class FakeReader:
+    def __init__(self, status):
+        self._status = status
+
+    def status(self):
+        return self._status
+
+class TestSupervisorWatchdog(unittest.TestCase):
+
+    def supervisor(self, status, started_ago=STARTUP_GRACE_SECS + 1):
+        sup = BotSupervisor(state_path="/nonexistent/state", metrics_path="/nonexistent/metrics")
+        sup.reader = FakeReader(status)
+        sup._started_at = time.time() - started_ago
+        return sup
+
+    def status(self, heartbeat_ago=1, busy_for=None):
+        now = time.time()
+        return {"seq": 2, "length": 10, "pid": os.getpid(), "heartbeat": now - heartbeat_ago,
+                "busy_since": now - busy_for if busy_for is not None else 0.0}
+
+    def test_healthy(self):
+        self.assertIsNone(self.supervisor(self.status(busy_for=30)).wedged_reason())
+
+    def test_startup_grace(self):
+        self.assertIsNone(self.supervisor(None, started_ago=1).wedged_reason())
+        self.assertIn("no heartbeat", self.supervisor(None).wedged_reason())
+
+    def test_stale_heartbeat(self):
+        sup = self.supervisor(self.status(heartbeat_ago=HEARTBEAT_TIMEOUT_SECS + 5))
+        self.assertIn("heartbeat", sup.wedged_reason())
+
+    def test_hung_cycle(self):
+        sup = self.supervisor(self.status(busy_for=CYCLE_TIMEOUT_SECS + 5))
+        self.assertIn("cycle running", sup.wedged_reason())
+
+    def test_refuses_to_spawn_next_to_a_live_bot(self):
+        sup = self.supervisor(self.status())  # Heartbeating pid (this one) we did not start
+        self.assertEqual(sup.live_bot_pid(), os.getpid())
+        self.assertFalse(sup._spawn())
+        self.assertIsNone(sup.proc)
+
+        self.assertIsNone(self.supervisor(self.status(heartbeat_ago=HEARTBEAT_TIMEOUT_SECS + 5)).live_bot_pid())
+        self.assertIsNone(self.supervisor(None).live_bot_pid())
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "reads /proc")
+    def test_stop_kills_the_whole_bot_group(self):
+        pidfile = os.path.join(tempfile.mkdtemp(), "worker.pid")
+        self.addCleanup(shutil.rmtree, os.path.dirname(pidfile))
+        sup = self.supervisor(None)
+        sup.command = lambda: [sys.executable, "-c",
+                               "import subprocess, sys, time; "
+                               "w = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+                               f"open({pidfile!r}, 'w').write(str(w.pid)); time.sleep(60)"]
+        self.assertTrue(sup._spawn())
+        self.assertEqual(os.getpgid(sup.proc.pid), sup.proc.pid)  # Own group: killpg reaches its workers
+        deadline = time.time() + 5
+        while not os.path.exists(pidfile) and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.1)
+        worker = int(open(pidfile).read())
+        sup.stop()
+        self.assertIsNotNone(sup.proc.poll())
+        self.assertFalse(running(worker))
+
+def running(pid, wait=2.0):
+    """True if pid is still alive (zombies awaiting their reaper count as dead)."""
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                state = f.read().rsplit(")", 1)[1].split()[0]
+        except OSError:
+            return False
+        if state in ("Z", "X"):
+            return False
+        time.sleep(0.05)
+    return True
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import threading
+from strategy_lab import storage
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_storage.db"
+
+    def tearDown(self):
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_connection_is_reused_per_thread(self):
+        conn = storage.get_connection(self.test_db)
+        self.assertIs(conn, storage.get_connection(self.test_db))
+
+        # Another thread gets its own connection
+        other = []
+        t = threading.Thread(target=lambda: other.append(storage.get_connection(self.test_db)))
+        t.start()
+        t.join()
+        self.assertIsNot(conn, other[0])
+
+    def test_wal_and_busy_timeout(self):
+        conn = storage.get_connection(self.test_db)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], storage.BUSY_TIMEOUT_MS)
+
+    def test_transaction_rolls_back_on_error(self):
+        with storage.transaction(self.test_db) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+
+        with self.assertRaises(RuntimeError):
+            with storage.transaction(self.test_db) as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+                raise RuntimeError("boom")
+
+        count = storage.get_connection(self.test_db).execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_reopens_after_file_removed(self):
+        conn = storage.get_connection(self.test_db)
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+
+        storage.close_connections(self.test_db)
+        os.remove(self.test_db)
+
+        fresh = storage.get_connection(self.test_db)
+        self.assertIsNot(conn, fresh)
+        tables = fresh.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        self.assertEqual(tables, [])
+
+if __name__ == '__main__':
+    unittest.main()
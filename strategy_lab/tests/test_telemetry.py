@@ -0,0 +1,69 @@
+import unittest
+from strategy_lab.telemetry import Histogram, Registry, render_prometheus
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.reg = Registry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram(buckets=(0.1, 1.0))
+        for v in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(v)
+        self.assertEqual(hist.cumulative(), [(0.1, 2), (1.0, 3), (float("inf"), 4)])
+        self.assertAlmostEqual(hist.sum, 3.65)
+
+    def test_cycle_record_collects_stages_and_counts(self):
+        with self.reg.cycle("single"):
+            with self.reg.span("macro_fetch"):
+                pass
+            with self.reg.span("broker", call="get_account"):
+                pass
+            with self.reg.span("broker", call="submit_market_order"):
+                pass
+            self.reg.count("signals", 3)
+
+        record = self.reg.last_cycle()
+        self.assertEqual(record["cycle"], 1)
+        self.assertEqual(record["stages"]["broker"]["calls"], 2)
+        self.assertEqual(record["counts"], {"signals": 3})
+        self.assertIsNotNone(record["duration_ms"])
+        self.assertEqual(self.reg.counters[("signals_total", ())], 3)
+        self.assertIn(("stage_duration_seconds", (("call", "get_account"), ("stage", "broker"))), self.reg.histograms)
+
+    def test_span_errors_are_counted_and_reraised(self):
+        with self.assertRaises(ValueError):
+            with self.reg.cycle():
+                with self.reg.span("snapshot_fetch"):
+                    raise ValueError("provider down")
+
+        record = self.reg.last_cycle()
+        self.assertEqual(record["stages"]["snapshot_fetch"]["errors"], 1)
+        self.assertEqual(self.reg.counters[("stage_errors_total", (("stage", "snapshot_fetch"),))], 1)
+        self.assertEqual(self.reg.counters[("cycle_errors_total", (("mode", "single"),))], 1)
+
+    def test_spans_outside_a_cycle_still_record(self):
+        with self.reg.span("export"):
+            pass
+        self.assertIsNone(self.reg.last_cycle())
+        self.assertEqual(len(self.reg.histograms), 1)
+
+    def test_prometheus_exposition(self):
+        with self.reg.cycle("single"):
+            with self.reg.timer("provider_request_duration_seconds", provider="yfinance", call="snapshot"):
+                pass
+            self.reg.count("signals", 2)
+        self.reg.set_gauge("open_positions", 3)
+        self.reg.inc("discord_errors_total", kind='sig"nal')
+
+        text = render_prometheus(self.reg)
+        self.assertIn("# TYPE strategy_lab_cycle_duration_seconds histogram", text)
+        self.assertIn('strategy_lab_cycle_duration_seconds_bucket{mode="single",le="+Inf"} 1', text)
+        self.assertIn('strategy_lab_provider_request_duration_seconds_count{call="snapshot",provider="yfinance"} 1', text)
+        self.assertIn('strategy_lab_signals_last_cycle{mode="single"} 2', text)
+        self.assertIn("strategy_lab_open_positions 3", text)
+        self.assertIn('strategy_lab_discord_errors_total{kind="sig\\"nal"} 1', text)
+        self.assertTrue(text.endswith("\n"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import time
+import unittest
+import numpy as np
+from strategy_lab import bar_store, migrations, storage
+from strategy_lab.config import WATCHLIST
+from strategy_lab.core import StrategyValidator
+from strategy_lab.judge import TheJudge
+from strategy_lab.market_features import MarketFeatureEngine
+from strategy_lab.scanner import StrategyScanner
+from strategy_lab.universe_scanner import (UniverseScanner, feature_matrix, features_at, judge_points,
+                                           rank, right_aligned, strategy_matches, strengths)
+
+LIBRARY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "library")
+TAGS = ("trend", "htf_trend", "key_level", "divergence", "sector_correlation")
+
+def random_walks(n, rng, min_len=30, max_len=200):
+    return [list(100 + np.cumsum(rng.normal(0, 1, rng.integers(min_len, max_len + 1)))) for _ in range(n)]
+
+def as_bars(closes, start=1_800_000_000, step=300):
+    return {"time": [start + i * step for i in range(len(closes))], "open": closes, "high": [c + 1 for c in closes],
+            "low": [c - 1 for c in closes], "close": closes, "volume": [1000] * len(closes)}
+
+class FakeEngine:
+    def __init__(self, series):
+        self.series = series
+        self.bulk_calls = []
+        self.iv_calls = []
+
+    def fetch_macro_stats(self):
+        return {"vix": 15.0, "spy_trend": "BULLISH"}
+
+    def fetch_bars(self, symbols, interval, period):
+        self.bulk_calls.append((interval, period, len(symbols)))
+        return {s: as_bars(self.series[s], step=300 if interval == "5m" else 3600) for s in symbols if s in self.series}
+
+    def fetch_current_iv(self, symbol, price):
+        self.iv_calls.append(symbol)
+        return 0.3
+
+class TestVectorizedFeatures(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.closes = random_walks(60, rng)
+        self.htf = random_walks(60, rng, min_len=0, max_len=120)
+        self.sector = random_walks(1, rng, min_len=200)[0]
+        self.matrix = feature_matrix(right_aligned(self.closes, 200), right_aligned(self.htf, 200),
+                                     np.array(self.sector))
+        self.macro = {"vix": 15.0, "spy_trend": "BULLISH"}
+
+    def snapshot_features(self, i):
+        return MarketFeatureEngine.analyze_snapshot({"closes": self.closes[i], "htf_closes": self.htf[i],
+                                                     "sector_closes": self.sector, "current_iv": 0})
+
+    def test_matches_per_symbol_feature_engine(self):
+        for i in range(len(self.closes)):
+            expected, got = self.snapshot_features(i), features_at(self.matrix, i)
+            self.assertEqual({k: got[k] for k in TAGS}, {k: expected[k] for k in TAGS}, f"row {i}")
+            self.assertAlmostEqual(got["sma_200"], expected["sma_200"])
+            self.assertAlmostEqual(got["current_price"], expected["current_price"])
+
+    def test_each_symbol_against_its_own_sector(self):
+        rng = np.random.default_rng(5)
+        etfs = random_walks(3, rng, min_len=0, max_len=200)
+        sector_of = np.arange(len(self.closes)) % len(etfs)
+        matrix = feature_matrix(right_aligned(self.closes, 200), right_aligned(self.htf, 200),
+                                right_aligned(etfs, 200), sector_of)
+        for i in range(len(self.closes)):
+            expected = MarketFeatureEngine.analyze_snapshot({"closes": self.closes[i], "htf_closes": self.htf[i],
+                                                             "sector_closes": etfs[sector_of[i]], "current_iv": 0})
+            self.assertEqual(features_at(matrix, i)["sector_correlation"], expected["sector_correlation"], f"row {i}")
+
+    def test_judge_and_scanner_agree(self):
+        strategies = StrategyValidator.load_library(LIBRARY)
+        strength = strengths(judge_points(self.matrix))
+        matches = strategy_matches(self.matrix, strategies)
+        for i in range(len(self.closes)):
+            features = self.snapshot_features(i)
+            self.assertEqual(strength[i], TheJudge.verdict_strength(TheJudge.delimit_verdict(features, self.macro)))
+            self.assertEqual(list(matches[i]), [StrategyScanner.is_applicable(s, features) for s in strategies])
+
+    def test_universe_fits_in_a_cycle(self):
+        strategies = StrategyValidator.load_library(LIBRARY)
+        rng = np.random.default_rng(1)
+        closes = [list(100 + np.cumsum(rng.normal(0, 1, 200))) for _ in range(500)]
+        started = time.perf_counter()
+        top = rank(feature_matrix(right_aligned(closes, 200), right_aligned(closes, 200)), strategies, top_k=10)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(len(top), 10)
+        self.assertEqual([c["rank_score"] for c in top], sorted((c["rank_score"] for c in top), reverse=True))
+
+class TestUniverseScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db = "test_universe.db"
+        migrations.migrate(self.test_db)
+        rng = np.random.default_rng(7)
+        self.series = {f"S{i:03d}": walk for i, walk in enumerate(random_walks(40, rng, min_len=200))}
+        self.series["QQQ"] = random_walks(1, rng, min_len=200)[0]
+        self.engine = FakeEngine(self.series)
+        self.strategies = StrategyValidator.load_library(LIBRARY)
+
+    def tearDown(self):
+        storage.close_connections(self.test_db)
+        for path in (self.test_db, self.test_db + "-wal", self.test_db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def make(self, **kwargs):
+        scanner = UniverseScanner(self.engine, self.strategies, db_path=self.test_db,
+                                  settings={"top_k": 3, "enrich_workers": 2}, **kwargs)
+        self.addCleanup(scanner.close)
+        return scanner
+
+    def test_bar_store_upsert_and_prune(self):
+        bar_store.write_bars("5m", {"AMD": as_bars([1.0, 2.0, 3.0])}, self.test_db)
+        bar_store.write_bars("5m", {"AMD": as_bars([9.0, float("nan")])}, self.test_db)  # Rewrites bar 0, skips NaN
+        self.assertEqual(bar_store.load_closes(["AMD", "NONE"], "5m", 2, self.test_db), {"AMD": [2.0, 3.0]})
+        self.assertEqual(bar_store.load_bars("AMD", "5m", 5, self.test_db)["close"], [9.0, 2.0, 3.0])
+        self.assertEqual(bar_store.prune(450, now=1_800_000_900, db_path=self.test_db), 2)
+        self.assertEqual(bar_store.symbols("5m", self.test_db), ["AMD"])
+
+    def test_only_top_k_enriched(self):
+        symbols = [s for s in self.series if s != "QQQ"]
+        scanner = self.make(symbols=symbols, held_fn=lambda: {"S039"})
+        result = scanner.run_cycle()
+
+        self.assertEqual(result["universe_size"], 40)
+        self.assertEqual(self.engine.bulk_calls, [("5m", "5d", 41), ("1h", "1mo", 41)])  # One download per interval
+        top = [c["symbol"] for c in result["candidates"]]
+        self.assertEqual(len(top), 3)
+        self.assertEqual(sorted(self.engine.iv_calls), sorted(top))
+        self.assertEqual(set(result["verdicts"]), set(top))
+        self.assertIn("S039", result["snapshots"])  # Held position: bars for exits
+        self.assertTrue(all(sig["symbol"] in top for sig in result["signals"]))
+
+        scanner.run_cycle()  # Store is fresh: no new downloads inside refresh_secs
+        self.assertEqual(len(self.engine.bulk_calls), 2)
+
+    def test_stored_symbols_when_no_list(self):
+        bar_store.write_bars("5m", {s: as_bars(self.series[s]) for s in ("S001", "QQQ")}, self.test_db)
+        self.assertEqual(self.make().watchlist, ["S001"])
+
+    def test_sector_etfs_match_snapshot_mode(self):
+        rng = np.random.default_rng(11)
+        self.series.update({s: walk for s, walk in zip(("AMD", "SMH"), random_walks(2, rng, min_len=200))})
+        scanner = self.make(symbols=["AMD", "S001"])
+        scanner.refresh()
+        self.assertEqual(set(bar_store.symbols("5m", self.test_db)), {"AMD", "S001", "SMH", "QQQ"})
+        scan = scanner.scan(["AMD", "S001"], {"vix": 15.0})
+        snapshot = scanner._snapshot("AMD", scan["closes"]["AMD"], [], scan["sectors"])
+        self.assertEqual(snapshot["sector_etf"], "SMH")
+        self.assertEqual(snapshot["sector_closes"], scan["sectors"]["SMH"])
+        self.assertEqual(scanner._snapshot("S001", scan["closes"]["S001"], [], scan["sectors"])["sector_etf"], "QQQ")
+
+    def test_fresh_store_seeded_from_watchlist(self):
+        rng = np.random.default_rng(3)
+        seeds = [s for s in WATCHLIST if s != "QQQ"]
+        self.series.update({s: walk for s, walk in zip(seeds, random_walks(len(seeds), rng, min_len=200))})
+        scanner = self.make()
+        self.assertEqual(scanner.watchlist, seeds)
+        result = scanner.run_cycle()
+        self.assertEqual(result["universe_size"], len(seeds))
+        self.assertEqual(bar_store.symbols("5m", self.test_db), sorted(seeds + ["QQQ"]))
+
+if __name__ == '__main__':
+    unittest.main()
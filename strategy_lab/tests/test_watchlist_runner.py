@@ -0,0 +1,74 @@
+import time
+import unittest
+from strategy_lab.watchlist_runner import WatchlistRunner, rank_score
+
+class FakeEngine:
+    """Deterministic snapshots; SLOW symbols sleep past the deadline."""
+
+    def __init__(self, slow=(), delay=0.5):
+        self.slow = set(slow)
+        self.delay = delay
+        self.macro_calls = 0
+        self.fetches = []
+
+    def fetch_macro_stats(self):
+        self.macro_calls += 1
+        return {"vix": 15.0, "spy_trend": "Bullish"}
+
+    def fetch_snapshot(self, symbol):
+        self.fetches.append(symbol)
+        if symbol in self.slow:
+            time.sleep(self.delay)
+        if symbol == "EMPTY":
+            return {}
+        trend = 1.0 if symbol != "DOWN" else -1.0
+        closes = [100 + trend * i * 0.5 for i in range(60)]
+        return {
+            "closes": closes,
+            "current_price": closes[-1],
+            "day_high": max(closes[-5:]),
+            "day_low": min(closes[-5:]),
+            "volume": 1_000_000,
+            "current_iv": 20.0,
+        }
+
+class TestWatchlistRunner(unittest.TestCase):
+
+    def make_runner(self, engine, watchlist, deadline=5.0):
+        runner = WatchlistRunner(engine, [], watchlist=watchlist, fetch_workers=4,
+                                 analysis_workers=2, deadline_secs=deadline, use_processes=False)
+        self.addCleanup(runner.close)
+        return runner
+
+    def test_macro_fetched_once_and_all_symbols_analyzed(self):
+        engine = FakeEngine()
+        result = self.make_runner(engine, ["UP", "DOWN", "EMPTY"]).run_cycle()
+        self.assertEqual(engine.macro_calls, 1)
+        self.assertEqual(set(result["verdicts"]), {"UP", "DOWN"})
+        self.assertEqual(result["latency"]["UP"]["status"], "OK")
+        self.assertEqual(result["latency"]["EMPTY"]["status"], "NO_DATA")
+        self.assertFalse(result["deadline_hit"])
+
+    def test_deadline_marks_slow_symbols(self):
+        result = self.make_runner(FakeEngine(slow=["SLOW"]), ["UP", "SLOW"], deadline=0.2).run_cycle()
+        self.assertTrue(result["deadline_hit"])
+        self.assertEqual(result["latency"]["SLOW"]["status"], "TIMEOUT")
+        self.assertIn("UP", result["verdicts"])
+
+    def test_straggling_fetch_is_reused_not_resubmitted(self):
+        engine = FakeEngine(slow=["SLOW"], delay=0.4)
+        runner = self.make_runner(engine, ["UP", "SLOW"], deadline=0.25)
+        self.assertEqual(runner.run_cycle()["latency"]["SLOW"]["status"], "TIMEOUT")
+        result = runner.run_cycle()  # The first fetch lands during this cycle
+        self.assertEqual(engine.fetches.count("SLOW"), 1)
+        self.assertEqual(result["latency"]["SLOW"]["status"], "OK")
+        self.assertEqual(engine.fetches.count("UP"), 2)
+
+    def test_rank_score(self):
+        self.assertEqual(rank_score("BULLISH", 2), 2.0)
+        self.assertEqual(rank_score("BEARISH", 2), -2.0)
+        self.assertEqual(rank_score("NEUTRAL", 0), 1.0)
+        self.assertGreater(rank_score("BEARISH", -2), rank_score("NEUTRAL", -2))
+
+if __name__ == '__main__':
+    unittest.main()
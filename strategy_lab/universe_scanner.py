@@ -0,0 +1,417 @@
+"""
+Universe Scanner
+Ranks a few hundred symbols per cycle instead of a watchlist of ten:
+  1. Bars come from the local store (bar_store); one bulk download per interval refreshes it
+  2. Every symbol's features in ONE vectorized pass: a symbols x features matrix
+     (same tags as MarketFeatureEngine, encoded as numbers)
+  3. Judge points + strategy matches scored for the whole matrix at once, best first
+  4. Only the top-K go on to the expensive part (option chain IV + sentiment),
+     then through the normal per-symbol Features -> Judge -> Scanner path
+Each symbol is compared against its own sector ETF (SectorCorrelations.sector_for,
+e.g. AMD -> SMH), the same one its per-symbol snapshot uses; the ETFs' bars are
+kept in the store next to the universe.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from strategy_lab import bar_store, storage, telemetry
+from strategy_lab.config import UNIVERSE_SETTINGS, WATCHLIST
+from strategy_lab.correlation import SectorCorrelations
+from strategy_lab.watchlist_runner import NEUTRAL_SENTIMENT, analyze_symbol
+
+# Feature matrix columns. Tags are encoded so Judge points are arithmetic:
+#   trend / htf_trend:   UP=1, SIDEWAYS=0, DOWN=-1, UNKNOWN=NaN
+#   key_level:           AT_SUPPORT=1, MIDDLE=0, AT_RESISTANCE=-1
+#   divergence:          BULL_DIV=1, NONE=0, BEAR_DIV=-1
+#   sector_correlation:  WITH_SECTOR=1, AGAINST_SECTOR=0, UNKNOWN=NaN
+FEATURES = ("trend", "htf_trend", "key_level", "divergence", "sector_correlation", "sma_200", "current_price")
+COL = {name: i for i, name in enumerate(FEATURES)}
+
+TREND_CODES = {"UP": 1.0, "SIDEWAYS": 0.0, "DOWN": -1.0, "UNKNOWN": np.nan}
+LABELS = {
+    "trend": {1: "UP", 0: "SIDEWAYS", -1: "DOWN"},
+    "htf_trend": {1: "UP", 0: "SIDEWAYS", -1: "DOWN"},
+    "key_level": {1: "AT_SUPPORT", 0: "MIDDLE", -1: "AT_RESISTANCE"},
+    "divergence": {1: "BULL_DIV", 0: "NONE", -1: "BEAR_DIV"},
+    "sector_correlation": {1: "WITH_SECTOR", 0: "AGAINST_SECTOR"},
+}
+
+NO_IV_HISTORY_RANK = 50  # MarketFeatureEngine.calculate_iv_rank without history
+
+
+# --- Vectorized features (rows = symbols, right-aligned, NaN-padded on the left) ---
+
+def right_aligned(series: List[List[float]], width: int) -> np.ndarray:
+    """Ragged close lists -> (N, width) matrix; the newest close is always in the last column."""
+    matrix = np.full((len(series), width), np.nan)
+    for i, closes in enumerate(series):
+        tail = closes[-width:]
+        if tail:
+            matrix[i, width - len(tail):] = tail
+    return matrix
+
+
+def _counts(closes: np.ndarray) -> np.ndarray:
+    return np.count_nonzero(~np.isnan(closes), axis=1)
+
+
+def _tail_mean(closes: np.ndarray, n: int) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return closes[:, -n:].mean(axis=1)
+
+
+def trend(closes: np.ndarray) -> np.ndarray:
+    """calculate_trend for every row: price vs SMA20 vs SMA50 (NaN = UNKNOWN, < 50 bars)."""
+    price, sma20, sma50 = closes[:, -1], _tail_mean(closes, 20), _tail_mean(closes, 50)
+    codes = np.where((price > sma20) & (sma20 > sma50), 1.0,
+                     np.where((price < sma20) & (sma20 < sma50), -1.0, 0.0))
+    return np.where(_counts(closes) >= 50, codes, np.nan)
+
+
+def rsi(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    calculate_rsi for every row, quirks included: the average gain is the sum of the
+    last `period` up-moves / period (and likewise for losses), wherever they occurred.
+    """
+    deltas = np.diff(closes, axis=1)
+    up = deltas > 0
+    down = deltas < 0
+    # Up-moves counted from the right: keep only the newest `period` of them
+    recent_up = up & (np.cumsum(up[:, ::-1], axis=1)[:, ::-1] <= period)
+    recent_down = down & (np.cumsum(down[:, ::-1], axis=1)[:, ::-1] <= period)
+    avg_gain = np.where(recent_up, deltas, 0.0).sum(axis=1) / period
+    avg_loss = -np.where(recent_down, deltas, 0.0).sum(axis=1) / period
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    return np.where(_counts(closes) >= period + 1, values, 50.0)
+
+
+def key_levels(closes: np.ndarray) -> np.ndarray:
+    """calculate_key_levels for every row: within 10% of the 50-bar range from its low / high."""
+    window = closes[:, -50:]
+    price = closes[:, -1]
+    with np.errstate(invalid="ignore"):
+        low, high = np.nanmin(window, axis=1), np.nanmax(window, axis=1)
+    buffer = (high - low) * 0.10
+    codes = np.where(price <= low + buffer, 1.0, np.where(price >= high - buffer, -1.0, 0.0))
+    return np.where(_counts(closes) >= 50, codes, 0.0)
+
+
+def divergence(closes: np.ndarray) -> np.ndarray:
+    """calculate_rsi_divergence for every row: 10-bar price slope vs RSI slope."""
+    price_slope = closes[:, -1] - closes[:, -10]
+    rsi_slope = rsi(closes) - rsi(closes[:, :-10])
+    codes = np.where((price_slope < 0) & (rsi_slope > 0), 1.0,
+                     np.where((price_slope > 0) & (rsi_slope < 0), -1.0, 0.0))
+    return np.where(_counts(closes) >= 20, codes, 0.0)
+
+
+def feature_matrix(closes: np.ndarray, htf_closes: Optional[np.ndarray] = None,
+                   sector_closes: Optional[np.ndarray] = None, sector_of: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (N symbols x FEATURES) in one pass. `sector_closes` is a single row shared by every
+    symbol, or one row per sector ETF with `sector_of[i]` = the row of symbol i's ETF.
+    Rows with no htf / sector bars get UNKNOWN, as analyze_snapshot does.
+    """
+    n = len(closes)
+    counts = _counts(closes)
+    matrix = np.empty((n, len(FEATURES)))
+    matrix[:, COL["trend"]] = trend(closes)
+    matrix[:, COL["htf_trend"]] = trend(htf_closes) if htf_closes is not None else np.nan
+    matrix[:, COL["key_level"]] = key_levels(closes)
+    matrix[:, COL["divergence"]] = divergence(closes)
+
+    if sector_closes is not None and len(sector_closes):
+        sectors = np.atleast_2d(sector_closes)  # Trend once per ETF, then one lookup per symbol
+        rows = sector_of if sector_of is not None else np.zeros(n, dtype=int)
+        stock, sector = matrix[:, COL["trend"]], trend(sectors)[rows]
+        same = (stock == sector) | (np.isnan(stock) & np.isnan(sector))
+        matrix[:, COL["sector_correlation"]] = np.where(_counts(sectors)[rows] > 0, same.astype(float), np.nan)
+    else:
+        matrix[:, COL["sector_correlation"]] = np.nan
+
+    matrix[:, COL["sma_200"]] = np.where(counts >= 200, _tail_mean(closes, 200), 0.0)
+    matrix[:, COL["current_price"]] = np.where(counts > 0, closes[:, -1], 0.0)
+    return matrix
+
+
+def features_at(matrix: np.ndarray, row: int) -> Dict:
+    """One row back as MarketFeatureEngine tags (for display / debugging)."""
+    features = {}
+    for name, col in COL.items():
+        value = matrix[row, col]
+        if name in LABELS:
+            features[name] = "UNKNOWN" if np.isnan(value) else LABELS[name][int(value)]
+        else:
+            features[name] = float(value)
+    return features
+
+
+# --- Vectorized Judge + Scanner ---
+
+def judge_points(matrix: np.ndarray) -> np.ndarray:
+    """
+    TheJudge's technical points per symbol: trend confluence (+-2), key level (+-1),
+    divergence (+-2). Sentiment and IV only exist after enrichment.
+    """
+    t, h = matrix[:, COL["trend"]], matrix[:, COL["htf_trend"]]
+    confluence = np.where((t == 1) & (h == 1), 2, np.where((t == -1) & (h == -1), -2, 0))
+    return (confluence + matrix[:, COL["key_level"]] + 2 * matrix[:, COL["divergence"]]).astype(int)
+
+
+def strengths(points: np.ndarray) -> np.ndarray:
+    """Judge points -> verdict strength (+2 STRONG BUY .. -2 STRONG SELL)."""
+    return np.select([points >= 3, points >= 1, points <= -3, points <= -1], [2, 1, -2, -1], 0)
+
+
+def strategy_matches(matrix: np.ndarray, strategies: List[Dict]) -> np.ndarray:
+    """StrategyScanner.is_applicable for every (symbol, strategy): (N x S) bool."""
+    t, h = matrix[:, COL["trend"]], matrix[:, COL["htf_trend"]]
+    matches = np.ones((len(matrix), len(strategies)), dtype=bool)
+    for j, strategy in enumerate(strategies):
+        rules = strategy.get("entry_rules", {})
+        required = rules.get("trend")
+        if required:
+            code = TREND_CODES.get(required)
+            matches[:, j] &= np.isnan(t) if code is None or np.isnan(code) else (t == code)
+        if not rules.get("min_iv_rank", 0) <= NO_IV_HISTORY_RANK <= rules.get("max_iv_rank", 100):
+            matches[:, j] = False
+        direction = strategy.get("direction")
+        if direction == "BULLISH":
+            matches[:, j] &= h != -1
+        elif direction == "BEARISH":
+            matches[:, j] &= h != 1
+    return matches
+
+
+def rank_scores(strength: np.ndarray, strategies: List[Dict]) -> np.ndarray:
+    """watchlist_runner.rank_score for every (symbol, strategy): (N x S)."""
+    scores = np.empty((len(strength), len(strategies)))
+    for j, strategy in enumerate(strategies):
+        direction = strategy.get("direction")
+        if direction == "BULLISH":
+            scores[:, j] = strength
+        elif direction == "BEARISH":
+            scores[:, j] = -strength
+        else:
+            scores[:, j] = 1.0 - np.abs(strength)
+    return scores
+
+
+def rank(matrix: np.ndarray, strategies: List[Dict], top_k: int) -> List[Dict]:
+    """
+    Best candidates first: highest strategy rank score, then strongest Judge conviction,
+    then input order. Symbols no strategy matches are dropped.
+    """
+    points = judge_points(matrix)
+    matches = strategy_matches(matrix, strategies)
+    scores = np.where(matches, rank_scores(strengths(points), strategies), -np.inf)
+    best = scores.max(axis=1) if strategies else np.full(len(matrix), -np.inf)
+    has_data = ~np.isnan(matrix[:, COL["trend"]])
+    rows = np.flatnonzero(np.isfinite(best) & has_data)
+    order = rows[np.lexsort((rows, -np.abs(points[rows]), -best[rows]))][:top_k]
+    return [{"row": int(i), "rank_score": float(best[i]), "judge_points": int(points[i]),
+             "strategy_id": strategies[int(np.argmax(scores[i]))].get("id")} for i in order]
+
+
+class UniverseScanner:
+    """
+    The Scout.
+    Same run_cycle() result shape as WatchlistRunner, plus "candidates" and "timings".
+    """
+
+    label = "Universe"
+
+    def __init__(self, engine, strategies: List[Dict], symbols: Optional[List[str]] = None,
+                 db_path: str = storage.DEFAULT_DB_PATH, settings: Optional[Dict] = None,
+                 sentiment_fn: Optional[Callable[[str], Dict]] = None,
+                 held_fn: Optional[Callable[[], Iterable[str]]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.engine = engine
+        self.strategies = strategies
+        self.db_path = db_path
+        self.settings = {**UNIVERSE_SETTINGS, **(settings or {})}
+        self.symbols = list(dict.fromkeys(symbols)) if symbols else None  # None = whatever the store holds (seeded from WATCHLIST)
+        self.sentiment_fn = sentiment_fn
+        self.held_fn = held_fn  # Symbols with open positions: always get a bars snapshot for exits
+        self.clock = clock
+        # Same symbol -> sector ETF map as the per-symbol snapshots
+        self.sectors = getattr(engine, "sectors", None) or SectorCorrelations(engine.fetch_bars)
+        self._last_refresh: Dict[str, float] = {}
+        self.pool = ThreadPoolExecutor(max_workers=self.settings["enrich_workers"], thread_name_prefix="Enrich")
+
+    @property
+    def watchlist(self) -> List[str]:
+        if self.symbols is not None:
+            return self.symbols
+        etfs = set(self.sectors.etfs)
+        stored = [s for s in bar_store.symbols(self.settings["interval"], self.db_path) if s not in etfs]
+        if stored:
+            return stored
+        # Fresh store: seed from the watchlist so refresh() has something to backfill
+        return [s for s in WATCHLIST if s not in etfs]
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Store refresh (network: one bulk download per interval) ---
+
+    def refresh(self) -> Dict[str, int]:
+        """Tops up the bar store for every interval that is due. Returns rows written per interval."""
+        watchlist = self.watchlist
+        universe = list(dict.fromkeys(watchlist + sorted({self.sectors.sector_for(s) for s in watchlist})))
+        written = {}
+        for interval in (self.settings["interval"], self.settings["htf_interval"]):
+            now = self.clock()
+            if now - self._last_refresh.get(interval, 0.0) < self.settings["refresh_secs"][interval]:
+                continue
+            self._last_refresh[interval] = now
+            known = set(bar_store.symbols(interval, self.db_path))
+            missing = [s for s in universe if s not in known]
+            stale = [s for s in universe if s in known]
+            rows = 0
+            for batch, period in ((missing, self.settings["backfill_period"][interval]),
+                                  (stale, self.settings["refresh_period"][interval])):
+                if batch:
+                    rows += bar_store.write_bars(interval, self.engine.fetch_bars(batch, interval, period),
+                                                 self.db_path)
+            written[interval] = rows
+        return written
+
+    # --- Cycle ---
+
+    def scan(self, symbols: List[str], macro: Dict) -> Dict:
+        """Load -> features -> rank for every symbol (no network). Returns candidates + the loaded closes."""
+        lookback = self.settings["lookback_bars"]
+        timings = {}
+
+        started = time.perf_counter()
+        with telemetry.span("universe_load"):
+            closes = bar_store.load_closes(symbols, self.settings["interval"], lookback, self.db_path)
+            htf = bar_store.load_closes(symbols, self.settings["htf_interval"], lookback, self.db_path)
+            etfs = sorted({self.sectors.sector_for(s) for s in symbols})
+            sectors = bar_store.load_closes(etfs, self.settings["interval"], lookback, self.db_path)
+        timings["load_ms"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with telemetry.span("universe_features"):
+            loaded = [s for s in symbols if s in closes]
+            etf_row = {etf: i for i, etf in enumerate(etfs)}
+            matrix = feature_matrix(right_aligned([closes[s] for s in loaded], lookback),
+                                    right_aligned([htf.get(s, []) for s in loaded], lookback),
+                                    right_aligned([sectors.get(etf, []) for etf in etfs], lookback),
+                                    np.array([etf_row[self.sectors.sector_for(s)] for s in loaded], dtype=int))
+            blocked = macro.get("vix", 20) > 30  # Judge blocks everything in a panic
+            ranked = [] if blocked else rank(matrix, self.strategies, self.settings["top_k"])
+        timings["features_ms"] = (time.perf_counter() - started) * 1000
+
+        candidates = [{"symbol": loaded[c["row"]], "features": features_at(matrix, c["row"]),
+                       **{k: v for k, v in c.items() if k != "row"}} for c in ranked]
+        return {"candidates": candidates, "closes": closes, "htf": htf, "sectors": sectors,
+                "loaded": len(loaded), "timings": timings}
+
+    def _snapshot(self, symbol: str, closes: List[float], htf: List[float], sectors: Dict[str, List[float]]) -> Dict:
+        """What YFinanceEngine.fetch_snapshot would return, built from the store."""
+        bars = bar_store.load_bars(symbol, self.settings["interval"], self.settings["lookback_bars"], self.db_path)
+        day = bars["time"][-1] // 86400 if bars["time"] else None
+        today = [i for i, ts in enumerate(bars["time"]) if ts // 86400 == day]
+        day_open = bars["open"][today[0]] if today else closes[-1]
+        return {
+            "symbol": symbol,
+            "current_price": float(closes[-1]),
+            "day_high": float(max(bars["high"][i] for i in today)) if today else float(closes[-1]),
+            "day_low": float(min(bars["low"][i] for i in today)) if today else float(closes[-1]),
+            "day_open": float(day_open),
+            "change_pct": float((closes[-1] - day_open) / day_open * 100) if day_open else 0.0,
+            "volume": int(sum(bars["volume"][i] or 0 for i in today)),
+            "closes": closes,
+            "bars": {k: bars[k] for k in ("time", "open", "high", "low", "close")},
+            "htf_closes": htf,
+            "current_iv": 0.0,
+            "sector_etf": self.sectors.sector_for(symbol),
+            "sector_closes": sectors.get(self.sectors.sector_for(symbol), []),
+        }
+
+    def _enrich(self, symbol: str, snapshot: Dict, macro: Dict) -> Dict:
+        """Option-chain IV + sentiment for one top-K symbol, then the normal per-symbol analysis."""
+        started = time.perf_counter()
+        with telemetry.span("enrich"):
+            snapshot["current_iv"] = self.engine.fetch_current_iv(symbol, snapshot["current_price"])
+            snapshot["sentiment"] = self.sentiment_fn(symbol) if self.sentiment_fn else dict(NEUTRAL_SENTIMENT)
+        fetch_ms = (time.perf_counter() - started) * 1000
+        result = analyze_symbol(symbol, snapshot, self.strategies, macro)
+        result["fetch_ms"] = fetch_ms
+        return result
+
+    def run_cycle(self) -> Dict:
+        cycle_start = time.perf_counter()
+        deadline = cycle_start + self.settings["cycle_deadline_secs"]
+
+        with telemetry.span("macro_fetch"):
+            macro = self.engine.fetch_macro_stats()
+        started = time.perf_counter()
+        with telemetry.span("universe_refresh"):
+            self.refresh()
+        refresh_ms = (time.perf_counter() - started) * 1000
+
+        symbols = self.watchlist
+        scan = self.scan(symbols, macro)
+        telemetry.set_gauge("universe_symbols", scan["loaded"])
+        top = [c["symbol"] for c in scan["candidates"]]
+
+        snapshots = {s: self._snapshot(s, scan["closes"][s], scan["htf"].get(s, []), scan["sectors"]) for s in top}
+        latency = {s: {"fetch_ms": None, "analyze_ms": None, "total_ms": None, "status": "TIMEOUT"} for s in top}
+        pending = {self.pool.submit(self._enrich, s, snapshots[s], macro): s for s in top}
+        done, not_done = wait(pending, timeout=max(0.0, deadline - time.perf_counter()))
+        for fut in not_done:
+            fut.cancel()  # Missed the deadline - skip rather than overrun the cadence
+
+        verdicts: Dict[str, str] = {}
+        signals: List[Dict] = []
+        for fut in done:
+            symbol = pending[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                print(f"⚠️  {symbol}: enrich failed ({e})")
+                latency[symbol]["status"] = "ERROR"
+                continue
+            verdicts[symbol] = result["verdict"]
+            signals.extend(result["signals"])
+            latency[symbol].update(fetch_ms=round(result["fetch_ms"], 1), analyze_ms=round(result["analyze_ms"], 1),
+                                   total_ms=round(result["fetch_ms"] + result["analyze_ms"], 1), status="OK")
+
+        # Open positions outside the top-K still need their bars for exits
+        for symbol in (self.held_fn() if self.held_fn else ()):
+            if symbol not in snapshots and symbol in scan["closes"]:
+                snapshots[symbol] = self._snapshot(symbol, scan["closes"][symbol], [], {})
+
+        order = {s: i for i, s in enumerate(top)}
+        signals.sort(key=lambda sig: (-sig["rank_score"], order.get(sig["symbol"], len(order))))
+        return {
+            "macro": macro,
+            "snapshots": snapshots,
+            "verdicts": verdicts,
+            "signals": signals,
+            "latency": latency,
+            "candidates": scan["candidates"],
+            "universe_size": scan["loaded"],
+            "timings": {"refresh_ms": round(refresh_ms, 1),
+                        **{k: round(v, 1) for k, v in scan["timings"].items()}},
+            "cycle_ms": round((time.perf_counter() - cycle_start) * 1000, 1),
+            "deadline_hit": bool(not_done),
+        }
+
+    @staticmethod
+    def print_latency_report(result: Dict):
+        t = result["timings"]
+        print(f"⏱️  Universe cycle: {result['cycle_ms']:.0f}ms for {result['universe_size']} symbols "
+              f"(refresh {t['refresh_ms']:.0f}ms, load {t['load_ms']:.0f}ms, features {t['features_ms']:.0f}ms)"
+              f"{' (DEADLINE HIT)' if result['deadline_hit'] else ''}")
+        for c in result["candidates"]:
+            row = result["latency"].get(c["symbol"], {})
+            print(f"   {c['symbol']:<6} rank={c['rank_score']:+.0f} judge={c['judge_points']:+d} "
+                  f"trend={c['features']['trend']:<8} {row.get('status', '-')}")
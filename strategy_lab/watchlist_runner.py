@@ -0,0 +1,202 @@
+"""
+Watchlist Runner
+Scans N symbols per cycle instead of one:
+  1. ONE macro fetch shared by every symbol
+  2. Snapshots fetched concurrently (thread pool - network bound)
+  3. Features + Judge + Scanner per symbol in a process pool (CPU bound)
+  4. All signals merged into one ranked list, with per-symbol latency
+
+The process pool is spawned, not forked: the bot already runs the write-behind,
+heartbeat, sentiment and scheduler threads, and a fork taken while one of them
+holds a lock can deadlock the child.
+"""
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from strategy_lab import telemetry
+from strategy_lab.config import WATCHLIST, WATCHLIST_SETTINGS
+from strategy_lab.judge import TheJudge
+from strategy_lab.market_features import MarketFeatureEngine
+from strategy_lab.scanner import StrategyScanner
+
+NEUTRAL_SENTIMENT = {"score": 0, "mentions": 0, "direction": "NEUTRAL"}
+
+
+def analyze_symbol(symbol: str, snapshot: Dict, strategies: List[Dict], macro: Dict) -> Dict:
+    """
+    Pure CPU work for one symbol (runs inside a worker process).
+    Returns verdict + ranked-ready signals.
+    """
+    started = time.perf_counter()
+    features = MarketFeatureEngine.analyze_snapshot(snapshot)
+    verdict = TheJudge.delimit_verdict(features, macro=macro)
+    strength = TheJudge.verdict_strength(verdict)
+
+    signals = []
+    if strength is not None:  # BLOCKED -> no signals
+        for signal in StrategyScanner().scan(strategies, snapshot):
+            signal["symbol"] = symbol
+            signal["verdict"] = verdict
+            signal["rank_score"] = rank_score(signal["direction"], strength)
+            signals.append(signal)
+
+    return {
+        "symbol": symbol,
+        "verdict": verdict,
+        "signals": signals,
+        "analyze_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def rank_score(direction: str, strength: int) -> float:
+    """
+    How well the Judge's conviction backs a strategy's direction.
+    Directional plays want a strong verdict their way; neutral plays want no conviction.
+    """
+    if direction == "BULLISH":
+        return float(strength)
+    if direction == "BEARISH":
+        return float(-strength)
+    return 1.0 - abs(strength)
+
+
+class WatchlistRunner:
+    """
+    The Dispatcher.
+    Keeps its pools alive across cycles; call close() on shutdown.
+    A fetch still running at the deadline keeps its thread; the next cycle waits
+    on that same future instead of queueing a second fetch for the symbol, so
+    stragglers never pile up in the fetch pool.
+    """
+
+    label = "Watchlist"
+
+    def __init__(self, engine, strategies: List[Dict], watchlist: Optional[List[str]] = None,
+                 fetch_workers: Optional[int] = None, analysis_workers: Optional[int] = None,
+                 deadline_secs: Optional[float] = None, use_processes: bool = True,
+                 sentiment_fn: Optional[Callable[[str], Dict]] = None):
+        self.engine = engine
+        self.strategies = strategies
+        self.watchlist = list(watchlist or WATCHLIST)
+        self.deadline_secs = deadline_secs or WATCHLIST_SETTINGS["cycle_deadline_secs"]
+        self.sentiment_fn = sentiment_fn
+
+        self.fetch_pool = ThreadPoolExecutor(
+            max_workers=fetch_workers or WATCHLIST_SETTINGS["fetch_workers"],
+            thread_name_prefix="SnapshotFetch")
+        workers = analysis_workers or WATCHLIST_SETTINGS["analysis_workers"]
+        self.analysis_pool: Executor = (
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if use_processes
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Analysis"))
+        self._fetches: Dict[str, Future] = {}  # symbol -> fetch that outlived an earlier cycle's deadline
+
+    def close(self):
+        self.fetch_pool.shutdown(wait=False, cancel_futures=True)
+        self.analysis_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch(self, symbol: str) -> Dict:
+        started = time.perf_counter()
+        with telemetry.span("snapshot_fetch"):
+            snapshot = self.engine.fetch_snapshot(symbol)
+        if snapshot and snapshot.get("closes"):
+            snapshot["sentiment"] = self.sentiment_fn(symbol) if self.sentiment_fn else dict(NEUTRAL_SENTIMENT)
+        return {"snapshot": snapshot, "fetch_ms": (time.perf_counter() - started) * 1000}
+
+    def run_cycle(self) -> Dict:
+        """
+        Returns:
+            {
+                "macro": {...},
+                "snapshots": {symbol: snapshot},
+                "verdicts": {symbol: verdict},
+                "signals": [...],  # all symbols, best first
+                "latency": {symbol: {"fetch_ms", "analyze_ms", "total_ms", "status"}},
+                "cycle_ms": float, "deadline_hit": bool
+            }
+        """
+        cycle_start = time.perf_counter()
+        deadline = cycle_start + self.deadline_secs
+
+        with telemetry.span("macro_fetch"):
+            macro = self.engine.fetch_macro_stats()  # Once per cycle, shared by all symbols
+
+        latency = {s: {"fetch_ms": None, "analyze_ms": None, "total_ms": None, "status": "TIMEOUT"}
+                   for s in self.watchlist}
+        snapshots: Dict[str, Dict] = {}
+        verdicts: Dict[str, str] = {}
+        signals: List[Dict] = []
+
+        pending: Dict[Future, tuple] = {}
+        for s in self.watchlist:
+            fut = self._fetches.get(s)
+            if fut is None or fut.done():
+                fut = self._fetches[s] = self.fetch_pool.submit(self._fetch, s)
+            pending[fut] = ("fetch", s)
+
+        # Pipeline: each symbol goes to the analysis pool as soon as its data lands
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, symbol = pending.pop(fut)
+                if stage == "fetch":
+                    self._fetches.pop(symbol, None)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    print(f"⚠️  {symbol}: {stage} failed ({e})")
+                    latency[symbol]["status"] = "ERROR"
+                    continue
+
+                if stage == "fetch":
+                    latency[symbol]["fetch_ms"] = round(result["fetch_ms"], 1)
+                    snapshot = result["snapshot"]
+                    if not snapshot or not snapshot.get("closes"):
+                        latency[symbol]["status"] = "NO_DATA"
+                        continue
+                    snapshots[symbol] = snapshot
+                    job = self.analysis_pool.submit(analyze_symbol, symbol, snapshot, self.strategies, macro)
+                    pending[job] = ("analyze", symbol)
+                else:
+                    latency[symbol]["analyze_ms"] = round(result["analyze_ms"], 1)
+                    latency[symbol]["status"] = "OK"
+                    verdicts[symbol] = result["verdict"]
+                    signals.extend(result["signals"])
+
+        # Missed the deadline - skip rather than overrun the cadence. Fetches already
+        # running can't be cancelled; they stay in self._fetches for the next cycle.
+        for fut, (stage, symbol) in pending.items():
+            if fut.cancel() and stage == "fetch":
+                self._fetches.pop(symbol, None)
+
+        for symbol, row in latency.items():
+            if row["fetch_ms"] is not None:
+                row["total_ms"] = round(row["fetch_ms"] + (row["analyze_ms"] or 0), 1)
+
+        # Best conviction first; watchlist order breaks ties
+        order = {s: i for i, s in enumerate(self.watchlist)}
+        signals.sort(key=lambda sig: (-sig["rank_score"], order.get(sig["symbol"], len(order))))
+
+        return {
+            "macro": macro,
+            "snapshots": snapshots,
+            "verdicts": verdicts,
+            "signals": signals,
+            "latency": latency,
+            "cycle_ms": round((time.perf_counter() - cycle_start) * 1000, 1),
+            "deadline_hit": bool(pending),
+        }
+
+    @staticmethod
+    def print_latency_report(result: Dict):
+        print(f"⏱️  Watchlist cycle: {result['cycle_ms']:.0f}ms"
+              f"{' (DEADLINE HIT)' if result['deadline_hit'] else ''}")
+        rows = sorted(result["latency"].items(), key=lambda kv: -(kv[1]["total_ms"] or float("inf")))
+        for symbol, row in rows:
+            fetch = f"{row['fetch_ms']:.0f}" if row["fetch_ms"] is not None else "-"
+            analyze = f"{row['analyze_ms']:.0f}" if row["analyze_ms"] is not None else "-"
+            print(f"   {symbol:<6} fetch={fetch:>6}ms analyze={analyze:>5}ms  {row['status']}")
@@ -1,11 +1,18 @@
 import requests
-import sqlite3
-import time
 import json
 import logging
-import statistics
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from requests.adapters import HTTPAdapter
+
+from strategy_lab import migrations
+from strategy_lab.config import ALPHA_VANTAGE_SETTINGS
+from strategy_lab.data import av_parser
+from strategy_lab.data.request_scheduler import HIGH, NORMAL, RetryLater, get_scheduler
+from strategy_lab.forecast_cache import ForecastCache
+from strategy_lab.raw_archive import RawArchive, default_archive_path, has_legacy_rows
 
 # --- CONFIGURATION ---
 # Replace with your actual Alpha Vantage Key
@@ -19,136 +26,108 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Phrases of Alpha Vantage's per-minute / burst note. Its other "Information"
+# messages (daily quota spent, premium-only endpoint) won't clear on a retry.
+RATE_LIMIT_HINTS = ("per minute", "per second", "sparingly")
+
 class AlphaVantageEngine:
     """
     Professional-grade data engine for Alpha Vantage.
     Features:
-    - Automatic Rate Limiting / Retries
+    - Proactive Rate Limiting (shared token bucket per API key) / Retries
     - Raw Data Persistence (SQLite)
     - Anti-Gravity Analytics
     """
 
-    def __init__(self, api_key: str, db_path: str = DB_PATH):
+    def __init__(self, api_key: str, db_path: str = DB_PATH, settings: Optional[Dict] = None):
         self.api_key = api_key
         self.db_path = db_path
         self.base_url = "https://www.alphavantage.co/query"
+        self.settings = {**ALPHA_VANTAGE_SETTINGS, **(settings or {})}
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=self.settings["max_workers"]))
+        self.scheduler = get_scheduler(
+            "alphavantage", api_key,
+            per_minute=self.settings["requests_per_minute"], per_day=self.settings["requests_per_day"],
+            max_workers=self.settings["max_workers"], max_attempts=self.settings["max_attempts"])
         self._initialize_db()
+        self.forecasts = ForecastCache(self.compute_consensus_forecasts, db_path)
 
     def _initialize_db(self):
-        """Creates the raw persistence layer if it doesn't exist."""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # Raw Data Table: Stores exact JSON responses for replay/audit
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS raw_market_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                function_name TEXT,
-                symbol TEXT,
-                data JSON
-            )
-        ''')
-        
-        # Processed Analysis Table (Optional, for caching consensus)
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS consensus_forecasts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                symbol TEXT,
-                score REAL,
-                details JSON
-            )
-        ''')
-
-        # Strategy Lab: Signals
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                strategy_id TEXT,
-                symbol TEXT,
-                direction TEXT,
-                features JSON,
-                processed BOOLEAN DEFAULT 0
-            ) 
-        ''')
-
-        # Strategy Lab: Trades
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                signal_id INTEGER,
-                strategy_id TEXT,
-                symbol TEXT,
-                status TEXT, -- OPEN, CLOSED
-                entry_price REAL,
-                exit_price REAL,
-                pnl REAL,
-                pnl_pct REAL,
-                entry_date DATETIME,
-                exit_date DATETIME
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Creates the persistence layer if it doesn't exist (shared schema migrations + raw archive)."""
+        migrations.migrate(self.db_path)
+        self.archive = RawArchive(default_archive_path(self.db_path))
+        if has_legacy_rows(self.db_path):
+            # Raw payloads used to live uncompressed in the data lake; moved off the request path
+            logger.warning(f"Legacy raw rows in {self.db_path}: run `python -m strategy_lab.raw_archive --db "
+                           f"{self.db_path}` (the live runner also moves them during off-hours maintenance)")
 
-    def _save_raw(self, function: str, symbol: str, data: Dict):
-        """Saves raw API response to SQLite."""
+    def _save_raw(self, function: str, symbol: str, data: Dict) -> Optional[str]:
+        """Saves raw API response to the archive (deduped + compressed, own DB file). Returns its hash."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
-                "INSERT INTO raw_market_data (function_name, symbol, data) VALUES (?, ?, ?)",
-                (function, symbol, json.dumps(data))
-            )
-            conn.commit()
-            conn.close()
+            return self.archive.store(function, symbol, data)
         except Exception as e:
             logger.error(f"Failed to save raw data: {e}")
+            return None
 
-    def _request(self, function: str, symbol: str, **kwargs) -> Optional[Dict]:
+    def _fetch(self, params: Dict, attempt: int) -> Optional[av_parser.AVResponse]:
         """
-        Robust API Request wrapper with Retries and Backoff.
+        One HTTP attempt; runs on the scheduler's pool once a token is granted.
+        Rate-limit notes and network errors are re-queued (with a fresh token) via RetryLater.
+        Time series / news payloads are parsed into arrays here, once, keyed by the archive hash.
         """
-        params = {
-            "function": function,
-            "symbol": symbol,
-            "apikey": self.api_key,
-            **kwargs
-        }
-
-        retries = 3
-        backoff = 2
+        function, symbol = params["function"], params["symbol"]
+        try:
+            response = self.session.get(self.base_url, params={**params, "apikey": self.api_key},
+                                        timeout=self.settings["request_timeout_secs"])
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Request failed (Attempt {attempt}/{self.settings['max_attempts']}): {e}")
+            raise RetryLater(2 ** attempt, str(e))
 
-        for attempt in range(retries):
-            try:
-                response = requests.get(self.base_url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
+        # Check for API Error Messages
+        if "Error Message" in data:
+            logger.error(f"API Error for {function}: {data['Error Message']}")
+            return None
+        if "Note" in data or "Information" in data:
+            hint = str(data.get("Note") or data.get("Information"))
+            if any(phrase in hint.lower() for phrase in RATE_LIMIT_HINTS):
+                # Rate limit hit despite the bucket (another client on the same key?): wait out the minute
+                logger.warning(f"API Limit Hint: {hint}")
+                self.scheduler.bucket.drain()
+                raise RetryLater(60.0 / self.settings["requests_per_minute"], "rate limited")
+            if "per day" in hint.lower():
+                # Daily quota gone: stop spending requests on it until the UTC day rolls over
+                self.scheduler.bucket.exhaust()
+            logger.error(f"API Information for {function} {symbol}: {hint}")
+            return None
 
-                # Check for API Error Messages
-                if "Error Message" in data:
-                    logger.error(f"API Error for {function}: {data['Error Message']}")
-                    return None
-                if "Note" in data:
-                    # Often means rate limit hit
-                    logger.warning(f"API Limit Hint: {data['Note']}")
-                    time.sleep(10) # Cooldown
-                    continue
+        # Success - Persist, Parse and Return
+        digest = self._save_raw(function, symbol, data)
+        try:
+            columns = av_parser.PARSED.get_or_parse(digest, function, data, symbol)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Parse Error for {function} {symbol}: {e}")
+            columns = None
+        return av_parser.AVResponse(data, digest, columns)
 
-                # Success - Persist and Return
-                self._save_raw(function, symbol, data)
-                return data
+    def request_async(self, function: str, symbol: str, priority: int = NORMAL, **kwargs) -> Future:
+        """
+        Queues a request on the shared scheduler. Identical requests already queued or
+        in flight (same function, symbol and parameters) share one Future.
+        The Future resolves to an AVResponse (raw .data + parsed .columns), or None.
+        """
+        params = {"function": function, "symbol": symbol, **kwargs}
+        key = tuple(sorted(params.items()))
+        return self.scheduler.submit(key, lambda attempt: self._fetch(params, attempt), priority)
 
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"Request failed (Attempt {attempt+1}/{retries}): {e}")
-                time.sleep(backoff ** attempt)
-        
-        logger.error(f"Max retries reached for {function}")
-        return None
+    def _request(self, function: str, symbol: str, priority: int = NORMAL, **kwargs) -> Optional[Dict]:
+        """
+        Rate-limited API request (blocks until the scheduler has run it).
+        """
+        response = self.request_async(function, symbol, priority, **kwargs).result()
+        return response.data if response else None
 
     # --- DATA STREAMS ---
 
@@ -180,19 +159,7 @@ class AlphaVantageEngine:
         Returns 50 if neutral/no data.
         """
         try:
-            ts = intraday_data.get("Time Series (1min)", {})
-            if not ts: return 50.0
-
-            closes = [float(v["4. close"]) for k, v in list(ts.items())[:50]]
-            if not closes: return 50.0
-            
-            # Simple Moving Average Logic
-            current = closes[0]
-            avg = statistics.mean(closes)
-            
-            if current > avg * 1.01: return 75.0 # Bullish
-            if current < avg * 0.99: return 25.0 # Bearish
-            return 50.0
+            return float(av_parser.technical_scores([av_parser.parse_time_series(intraday_data)])[0])
         except Exception as e:
             logger.error(f"Tech Calc Error: {e}")
             return 50.0
@@ -202,38 +169,53 @@ class AlphaVantageEngine:
         Parses News Sentiment API response into a 0-100 score.
         """
         try:
-            feed = sentiment_data.get("feed", [])
-            if not feed: return 50.0
-
-            scores = []
-            for item in feed:
-                # AlphaVantage gives 'overall_sentiment_score' (-0.35 to +0.35 usually)
-                s = float(item.get("overall_sentiment_score", 0))
-                scores.append(s)
-            
-            avg_score = statistics.mean(scores)
-            # Normalize -0.5...0.5 to 0...100
-            normalized = (avg_score + 0.5) * 100
-            return max(0, min(100, normalized))
-
+            return float(av_parser.sentiment_scores([av_parser.parse_news_sentiment(sentiment_data)])[0])
         except Exception as e:
             logger.error(f"Sentiment Calc Error: {e}")
             return 50.0
 
-    def get_consensus_forecast(self, symbol: str) -> Dict:
+    def get_consensus_forecast(self, symbol: str, priority: int = NORMAL) -> Dict:
         """
         The 'Anti-Gravity' Master Function.
         Combines Technicals + Sentiment + Earnings into a single Weighted Score.
         """
-        # 1. Gather Data
-        intraday = self.fetch_intraday(symbol)
-        sentiment = self.fetch_sentiment(symbol)
+        return self.forecasts.get(symbol, priority)
+
+    def get_consensus_forecasts(self, symbols: List[str], priority: int = NORMAL) -> List[Dict]:
+        """
+        Forecasts for many symbols, served from the forecast cache (memory, then the
+        consensus_forecasts table) while fresh; stale ones are refreshed in the background.
+        """
+        return self.forecasts.get_many(symbols, priority)
+
+    def compute_consensus_forecasts(self, symbols: List[str], priority: int = NORMAL) -> List[Dict]:
+        """
+        Uncached: every request is queued up front and dispatched concurrently
+        as fast as the quota allows, then the whole batch is scored at once
+        from the pre-parsed arrays.
+        """
+        # 1. Gather Data (all at once)
+        logger.info(f"Fetching Intraday + News Sentiment for {', '.join(symbols)}...")
+        pending = [(symbol,
+                    self.request_async("TIME_SERIES_INTRADAY", symbol, priority, interval="1min", outputsize="full"),
+                    self.request_async("NEWS_SENTIMENT", symbol, priority, tickers=symbol, limit=50))
+                   for symbol in symbols]
         # earnings = self.fetch_earnings(symbol) # Optional inclusion
+        series = [_columns(intraday.result()) for _, intraday, _ in pending]
+        news = [_columns(sentiment.result()) for _, _, sentiment in pending]
 
-        # 2. Compute Component Scores
-        tech_score = self.calculate_technical_score(intraday)
-        sent_score = self.calculate_sentiment_score(sentiment)
-        
+        # 2. Compute Component Scores (vectorized across the batch)
+        tech_scores = av_parser.technical_scores(series)
+        sent_scores = av_parser.sentiment_scores(news)
+        # Failed / quota-dropped requests score a neutral 50: flag them so nobody caches the result
+        # (a news feed with no articles parses to empty columns: real data, not a failure)
+        missing = [[name for name, columns in (("intraday", s), ("news", n)) if columns is None]
+                   for s, n in zip(series, news)]
+        return [self._consensus(symbol, float(tech), float(sent), gaps)
+                for (symbol, _, _), tech, sent, gaps in zip(pending, tech_scores, sent_scores, missing)]
+
+    def _consensus(self, symbol: str, tech_score: float, sent_score: float,
+                   missing_data: Optional[List[str]] = None) -> Dict:
         # 3. Weighted Consensus
         # Weights: Technicals (40%), Sentiment (40%), Institutional Gravity (20% - Bias)
         gravity_bias = 55.0 # Assumes slight institutional long bias
@@ -255,11 +237,16 @@ class AlphaVantageEngine:
             },
             "timestamp": datetime.now().isoformat()
         }
+        if missing_data:
+            result["missing_data"] = missing_data  # Scored without these inputs
         
-        # Cache Result
+        # Cached (memory + consensus_forecasts) by ForecastCache
         logger.info(f"Consensus Generated: {decision} ({consensus})")
         return result
 
+def _columns(response: Optional[av_parser.AVResponse]) -> Optional[av_parser.Columns]:
+    return response.columns if response else None
+
 # --- EXECUTION ---
 if __name__ == "__main__":
     print("--- Professional Data Architect ---")
@@ -275,4 +262,4 @@ if __name__ == "__main__":
     
     print("\nFINAL FORECAST:")
     print(json.dumps(forecast, indent=2))
-    print(f"\nRaw Data saved to: {DB_PATH}")
+    print(f"\nRaw Data saved to: {engine.archive.path}")